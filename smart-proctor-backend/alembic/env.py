@@ -9,6 +9,7 @@ from alembic import context
 # 1. IMPORT YOUR APP'S CONFIG & MODELS
 # ---------------------------------------------------------
 import os
+import re
 import sys
 from dotenv import load_dotenv
 
@@ -36,6 +37,16 @@ if config.config_file_name is not None:
 # Set the target metadata so Alembic knows what tables to generate
 target_metadata = Base.metadata
 
+# Partitions of integrity_violations are created (and detached) at runtime
+# by app.partition_maintenance, and the default partition by migration
+# 4b7e1f0c9a2d; no model declares them, so autogenerate must not drop them.
+PARTITION_NAME = re.compile(r"^integrity_violations_(p\d{4}_\d{2}(_\d{2})?|default)$")
+
+def include_name(name, type_, parent_names) -> bool:
+    if type_ == "table":
+        return not PARTITION_NAME.match(name)
+    return True
+
 # ---------------------------------------------------------
 # 3. OVERRIDE DATABASE URL
 # ---------------------------------------------------------
@@ -58,6 +69,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -79,7 +91,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
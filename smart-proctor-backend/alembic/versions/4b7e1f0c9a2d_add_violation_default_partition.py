@@ -0,0 +1,30 @@
+"""add integrity_violations default partition
+
+Revision ID: 4b7e1f0c9a2d
+Revises: de09ec78e2e2
+Create Date: 2026-10-18 03:12:40.518204
+
+Catches violations whose timestamp has no range partition (maintenance
+fell behind), so the insert lands instead of failing. crud.partition.ensure
+moves such rows into their range partition when it creates it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e1f0c9a2d'
+down_revision: Union[str, None] = 'de09ec78e2e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE TABLE integrity_violations_default PARTITION OF integrity_violations DEFAULT')
+
+
+def downgrade() -> None:
+    # Rows still in it have no other partition to go to.
+    op.execute('DROP TABLE integrity_violations_default')
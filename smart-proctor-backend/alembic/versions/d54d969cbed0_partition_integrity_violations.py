@@ -0,0 +1,122 @@
+"""partition integrity_violations by timestamp
+
+Revision ID: d54d969cbed0
+Revises: a5e684585c47
+Create Date: 2026-10-18 02:41:07.318275
+
+Rebuilds integrity_violations as a RANGE (timestamp) partitioned table with
+one partition per month, covering the existing rows plus three months
+ahead. Rows are copied in one INSERT ... SELECT, so the table is locked for
+the duration of the copy: schedule the upgrade outside exam hours.
+Afterwards `python -m app.partition_maintenance` keeps partitions ahead.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd54d969cbed0'
+down_revision: Union[str, None] = 'a5e684585c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_integrity_violations_timestamp_id', ['timestamp', 'id']),
+    ('ix_integrity_violations_student_ts_id', ['student_id', 'timestamp', 'id']),
+    ('ix_integrity_violations_type_ts_id', ['violation_type', 'timestamp', 'id']),
+)
+
+
+def _set_aside_old_table(new_name: str) -> None:
+    # Free every name the new table needs: indexes, PK and the id sequence.
+    op.execute('ALTER TABLE integrity_violations ALTER COLUMN id DROP DEFAULT')
+    op.execute('ALTER SEQUENCE integrity_violations_id_seq OWNED BY NONE')
+    op.execute(f'ALTER TABLE integrity_violations RENAME CONSTRAINT integrity_violations_pkey TO {new_name}_pkey')
+    op.execute(f'ALTER TABLE integrity_violations RENAME TO {new_name}')
+
+
+def _columns():
+    return (
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('violation_type', sa.String(), nullable=False),
+        sa.Column('evidence_score', sa.Float(), nullable=True),
+        sa.Column('metadata_log', sa.Text(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id']),
+    )
+
+
+def upgrade() -> None:
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='integrity_violations')
+    op.drop_index('ix_integrity_violations_id', table_name='integrity_violations')
+    _set_aside_old_table('integrity_violations_unpartitioned')
+
+    op.create_table(
+        'integrity_violations',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('integrity_violations_id_seq')"), nullable=False),
+        *_columns(),
+        sa.PrimaryKeyConstraint('id', 'timestamp'),
+        postgresql_partition_by='RANGE (timestamp)',
+    )
+    op.execute('ALTER SEQUENCE integrity_violations_id_seq OWNED BY integrity_violations.id')
+
+    # Monthly partitions (UTC) from the oldest row's month to three months ahead.
+    op.execute("""
+        DO $$
+        DECLARE
+            first_month timestamptz;
+            m timestamptz;
+        BEGIN
+            SELECT date_trunc('month', coalesce(min(timestamp), now()) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+              INTO first_month FROM integrity_violations_unpartitioned;
+            FOR m IN SELECT generate_series(
+                first_month,
+                date_trunc('month', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' + interval '3 months',
+                interval '1 month'
+            ) LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF integrity_violations FOR VALUES FROM (%L) TO (%L)',
+                    'integrity_violations_p' || to_char(m AT TIME ZONE 'UTC', 'YYYY_MM'),
+                    m, (m AT TIME ZONE 'UTC' + interval '1 month') AT TIME ZONE 'UTC'
+                );
+            END LOOP;
+        END $$;
+    """)
+    op.execute(
+        'INSERT INTO integrity_violations (id, student_id, violation_type, evidence_score, metadata_log, timestamp) '
+        'SELECT id, student_id, violation_type, evidence_score, metadata_log, timestamp '
+        'FROM integrity_violations_unpartitioned'
+    )
+    op.drop_table('integrity_violations_unpartitioned')
+
+    # Created on the parent, so every partition (present and future) gets them.
+    for name, columns in INDEXES:
+        op.create_index(name, 'integrity_violations', columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='integrity_violations')
+    _set_aside_old_table('integrity_violations_partitioned')
+
+    op.create_table(
+        'integrity_violations',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('integrity_violations_id_seq')"), nullable=False),
+        *_columns(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute('ALTER SEQUENCE integrity_violations_id_seq OWNED BY integrity_violations.id')
+    op.execute(
+        'INSERT INTO integrity_violations (id, student_id, violation_type, evidence_score, metadata_log, timestamp) '
+        'SELECT id, student_id, violation_type, evidence_score, metadata_log, timestamp '
+        'FROM integrity_violations_partitioned'
+    )
+    # Drops every attached partition with it.
+    op.drop_table('integrity_violations_partitioned')
+
+    op.create_index('ix_integrity_violations_id', 'integrity_violations', ['id'], unique=False)
+    for name, columns in INDEXES:
+        op.create_index(name, 'integrity_violations', columns, unique=False)
@@ -1,56 +1,358 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app import crud, models, schemas
 from app.api import deps
-from app.models.integrity import IntegrityViolation
+from app.core.config import settings
+from app.core.principal_cache import Principal, principal_cache
+from app.core.security import password_pool
+from app.crud.pagination import InvalidCursor
+from app.db.pool import pool_stats, threadpool_stats
+from app.db.replica import replica_monitor
+from app.db.session import AsyncSessionLocal, async_engine, async_read_engine, engine, read_engine
+from app.services import (
+    answer_signature_sink, honeypot_service, keystroke_profiles, partition_maintainer,
+    principal_listener, violation_feed, violation_sink,
+)
+from app.services.log_export import MEDIA_TYPES, encode_export
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK_SIZE = 5000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def _set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    # Absent header = last page.
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
 @router.get("/users", response_model=List[schemas.User])
-def read_users(
-        db: Session = Depends(deps.get_db),
-        skip: int = 0,
-        limit: int = 100,
-        current_user: models.User = Depends(deps.get_current_active_superuser),
+async def read_users(
+        response: Response,
+        db: AsyncSession = Depends(deps.get_async_read_db),
+        cursor: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        current_user: Principal = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
-    Retrieve all users. Admin only.
+    Retrieve all users, ordered by id. Admin only.
+    Pass the X-Next-Cursor response header back as `cursor` for the next page.
     """
-    users = crud.user.get_multi(db, skip=skip, limit=limit)
-    return users
+    try:
+        page = await crud.user.get_page_async(db, cursor=cursor, limit=limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    _set_next_cursor(response, page.next_cursor)
+    return page.items
 
 @router.get("/integrity-logs", response_model=List[schemas.IntegrityLog])
-def read_integrity_logs(
-        db: Session = Depends(deps.get_db),
-        skip: int = 0,
-        limit: int = 100,
-        current_user: models.User = Depends(deps.get_current_active_superuser),
+async def read_integrity_logs(
+        response: Response,
+        db: AsyncSession = Depends(deps.get_async_read_db),
+        cursor: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        violation_type: Optional[str] = None,
+        student_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Get all cheating attempts recorded by Go Bouncer and Python Brain,
+    newest first. Page with the opaque cursor from X-Next-Cursor.
+    A since/until window only reads the partitions it overlaps.
+    """
+    try:
+        page = await crud.integrity.get_page_async(
+            db,
+            cursor=cursor,
+            limit=limit,
+            violation_type=violation_type,
+            student_id=student_id,
+            since=since,
+            until=until,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    _set_next_cursor(response, page.next_cursor)
+    return page.items
+
+@router.get("/students/{student_id}/integrity-logs", response_model=List[schemas.IntegrityLog])
+def read_student_integrity_logs(
+        student_id: int,
+        response: Response,
+        db: Session = Depends(deps.get_read_db),
+        cursor: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    One student's violations, newest first (read replica when available).
+    """
+    try:
+        page = crud.integrity.get_by_student(
+            db, student_id=student_id, cursor=cursor, limit=limit, since=since, until=until
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    _set_next_cursor(response, page.next_cursor)
+    return page.items
+
+@router.get("/integrity-logs/export")
+async def export_integrity_logs(
+        format: Literal["ndjson", "csv"] = "ndjson",
+        gzip: bool = False,
+        violation_type: Optional[str] = None,
+        student_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> StreamingResponse:
+    """
+    Full audit export of integrity logs in id order, streamed from a
+    server-side cursor. Memory use does not depend on the number of rows.
+    """
+    async def body() -> AsyncIterator[bytes]:
+        # The session must live as long as the stream, not the request
+        # handler, so the generator owns it instead of using a dependency.
+        factory, _ = await deps.async_read_sessionmaker()
+        async with factory() as db:
+            chunks = crud.integrity.stream_async(
+                db,
+                chunk_size=EXPORT_CHUNK_SIZE,
+                violation_type=violation_type,
+                student_id=student_id,
+                since=since,
+                until=until,
+            )
+            async for data in encode_export(chunks, format, compress=gzip):
+                yield data
+
+    filename = f"integrity_logs.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+def _sse(event: str, data: str, event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {data}\n\n"
+
+def _violation_event(row: Any) -> str:
+    log = schemas.IntegrityLog.model_validate(row)
+    return _sse("violation", log.model_dump_json(), log.id)
+
+@router.get("/integrity-logs/stream")
+async def stream_integrity_logs(
+        request: Request,
+        violation_type: Optional[str] = None,
+        student_id: Optional[int] = None,
+        last_event_id: Optional[int] = Query(None, description="Resume after this violation id (default: the Last-Event-ID header)"),
+        current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> StreamingResponse:
+    """
+    Server-sent events: a `violation` event (id = violation id) for every
+    new violation. A reconnect with Last-Event-ID replays what was missed,
+    up to VIOLATION_FEED_RESUME_MAX events; beyond that the client gets
+    `reset` and should reload /integrity-logs. A client that falls
+    VIOLATION_FEED_CLIENT_QUEUE events behind gets `dropped` and is
+    disconnected (it can resume the same way).
+    """
+    if last_event_id is None and request.headers.get("last-event-id", "").isdigit():
+        last_event_id = int(request.headers["last-event-id"])
+
+    async def body() -> AsyncIterator[str]:
+        # Subscribed before reading the backlog, so nothing falls in between;
+        # events in both are sent once.
+        client = violation_feed.subscribe(violation_type=violation_type, student_id=student_id)
+        try:
+            replayed = set()
+            async with AsyncSessionLocal() as db:
+                if last_event_id is None:
+                    # Gives the client an id to resume from before any event.
+                    yield _sse("ready", "{}", await crud.integrity.max_id_async(db) or 0)
+                else:
+                    backlog = await crud.integrity.get_after_async(
+                        db,
+                        after_id=last_event_id,
+                        limit=settings.VIOLATION_FEED_RESUME_MAX + 1,
+                        violation_type=violation_type,
+                        student_id=student_id,
+                    )
+                    if len(backlog) > settings.VIOLATION_FEED_RESUME_MAX:
+                        yield _sse("reset", "{}", await crud.integrity.max_id_async(db) or 0)
+                    else:
+                        for row in backlog:
+                            replayed.add(row.id)
+                            yield _violation_event(row)
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        client.queue.get(), settings.VIOLATION_FEED_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    yield _sse("dropped", "{}")
+                    return
+                if event["id"] not in replayed:
+                    yield _violation_event(event)
+        finally:
+            violation_feed.unsubscribe(client)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        # No proxy buffering: events must reach the browser as they happen.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _start_of_today() -> datetime:
+    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+@router.get("/analytics/violations", response_model=schemas.ViolationSummary)
+async def read_violation_summary(
+        db: AsyncSession = Depends(deps.get_async_read_db),
+        since: Optional[datetime] = None,
+        violation_type: Optional[str] = None,
+        current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Violation counts per type since `since` (default: midnight UTC today),
+    e.g. "how many bots today". Served from the rollup table.
+    """
+    since = since or _start_of_today()
+    by_type = await crud.rollup.summary_async(db, since=since, violation_type=violation_type)
+    return {
+        "since": crud.rollup.bucket_of(since),
+        "total": sum(row["count"] for row in by_type),
+        "by_type": by_type,
+    }
+
+@router.get("/analytics/top-offenders", response_model=List[schemas.Offender])
+async def read_top_offenders(
+        db: AsyncSession = Depends(deps.get_async_read_db),
+        since: Optional[datetime] = None,
+        limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+        violation_type: Optional[str] = None,
+        current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Students with the most violations since `since` (default: midnight UTC today).
+    """
+    return await crud.rollup.top_offenders_async(
+        db, since=since or _start_of_today(), limit=limit, violation_type=violation_type
+    )
+
+@router.get("/exams/{exam_id}/risk", response_model=List[schemas.StudentRiskScore])
+async def read_exam_risk(
+        exam_id: str,
+        db: AsyncSession = Depends(deps.get_async_db),
+        limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+        current_user: Principal = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
-    Get all cheating attempts recorded by Go Bouncer and Python Brain.
+    The riskiest students of an exam right now (decayed risk score).
+    An index scan of student_risk; read from the primary, since proctors
+    act on it live.
     """
-    # Direct query to the IntegrityViolation model
-    # (Assuming crud.integrity isn't created yet, we use direct DB access or generic CRUD)
-    logs = db.query(IntegrityViolation).offset(skip).limit(limit).all()
-    return logs
+    return await crud.risk.top_async(db, exam_id=exam_id, limit=limit)
 
 @router.post("/users", response_model=schemas.User)
-def create_user_by_admin(
+async def create_user_by_admin(
         *,
-        db: Session = Depends(deps.get_db),
+        db: AsyncSession = Depends(deps.get_async_db),
         user_in: schemas.UserCreate,
-        current_user: models.User = Depends(deps.get_current_active_superuser),
+        current_user: Principal = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
     Admin override to create a user manually.
+    The password is hashed on the bcrypt pool, not in a threadpool thread.
     """
-    user = crud.user.get_by_email(db, email=user_in.email)
+    user = await crud.user.get_by_email_async(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
-    user = crud.user.create(db, obj_in=user_in)
-    return user
\ No newline at end of file
+    user = await crud.user.create_async(db, obj_in=user_in)
+    return user
+
+@router.get("/exams/{exam_id}/traps", response_model=List[schemas.TrapPhrase])
+async def read_exam_traps(
+        exam_id: str,
+        db: AsyncSession = Depends(deps.get_async_db),
+        current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    List the honeypot trap phrases planted in an exam.
+    """
+    return await crud.trap.get_by_exam_async(db, exam_id=exam_id)
+
+@router.put("/exams/{exam_id}/traps", response_model=List[schemas.TrapPhrase])
+def replace_exam_traps(
+        *,
+        exam_id: str,
+        db: Session = Depends(deps.get_db),
+        traps_in: schemas.TrapPhraseSet,
+        current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Replace the full trap dictionary of an exam (exam-wide and per-question).
+    """
+    traps = crud.trap.replace_for_exam(db, exam_id=exam_id, traps=traps_in.traps)
+    # Other workers pick the change up when their cached automaton expires.
+    honeypot_service.invalidate_trap_scanner(exam_id)
+    return traps
+
+@router.post("/leaks/trace", response_model=List[schemas.LeakAttribution])
+async def trace_leaked_questions(
+        request: Request,
+        db: Session = Depends(deps.get_db),
+        current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Attribute a leaked question. Send the raw pasted text (text/plain,
+    e.g. a whole forum thread) and get back every watermarked student.
+    """
+    text = (await request.body()).decode("utf-8", errors="ignore")
+    # Decoding is CPU-bound and may rebuild the index, so keep it off the loop.
+    return await run_in_threadpool(honeypot_service.trace_leak, text, db)
+
+def _db_pool_stats() -> Dict[str, Any]:
+    pools = {"sync": pool_stats(engine), "async": pool_stats(async_engine.sync_engine)}
+    if read_engine is not None:
+        pools["replica_sync"] = pool_stats(read_engine)
+        pools["replica_async"] = pool_stats(async_read_engine.sync_engine)
+    return pools
+
+@router.get("/system/stats")
+def read_system_stats(
+        current_user: Principal = Depends(deps.get_current_active_superuser),
+) -> Dict[str, Any]:
+    """
+    Live in-process counters for this worker (queue depths, flush latency).
+    """
+    return {
+        "violation_sink": violation_sink.stats(),
+        "answer_signature_sink": answer_signature_sink.stats(),
+        "principal_cache": {**principal_cache.stats(), "broadcast": principal_listener.stats()},
+        "password_hashing": password_pool.stats(),
+        "keystroke_profiles": keystroke_profiles.stats(),
+        "read_replica": replica_monitor.stats(),
+        "violation_feed": violation_feed.stats(),
+        "violation_partitions": partition_maintainer.stats(),
+        "db_pools": _db_pool_stats(),
+        "threadpool": threadpool_stats(),
+    }
@@ -2,7 +2,7 @@ from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, schemas
 from app.api import deps
@@ -12,15 +12,15 @@ from app.core.config import settings
 router = APIRouter()
 
 @router.post("/login", response_model=schemas.Token)
-def login_for_access_token(
-        db: Session = Depends(deps.get_db),
+async def login_for_access_token(
+        db: AsyncSession = Depends(deps.get_async_db),
         form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
     # Authenticate using the CRUD layer (handles bcrypt hash verification)
-    user = crud.user.authenticate(
+    user = await crud.user.authenticate_async(
         db, email=form_data.username, password=form_data.password
     )
 
@@ -1,13 +1,20 @@
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional, Tuple
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.core.principal_cache import Principal, principal_cache
+from app.db.replica import replica_monitor
+from app.db.session import (
+    AsyncReadSessionLocal, AsyncSessionLocal, ReadSessionLocal, SessionLocal,
+    async_read_engine, read_engine,
+)
 
 # OAuth2 Scheme: Points to the login endpoint
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -25,24 +32,73 @@ def get_db() -> Generator:
     finally:
         db.close()
 
-def get_current_user(
-        db: Session = Depends(get_db),
-        token: str = Depends(reusable_oauth2)
-) -> models.User:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Validates JWT and fetches user from DB.
+    Async DB Session Dependency.
+    The route awaits its queries instead of holding a threadpool thread.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# ---------------------------------------------------------
+# READ-ONLY SESSIONS (replica when usable)
+# ---------------------------------------------------------
+# For read-only admin/analytics routes. Results may trail the primary by up
+# to REPLICA_MAX_LAG_SECONDS, so never use these to read back your own write.
+# A connection failure on the replica marks it down, so the following
+# requests go to the primary until the next successful probe.
+def get_read_db() -> Generator:
+    use_replica = ReadSessionLocal is not None and replica_monitor.usable(read_engine)
+    db = (ReadSessionLocal if use_replica else SessionLocal)()
+    try:
+        yield db
+    except OperationalError as e:
+        if use_replica:
+            replica_monitor.mark_down(e)
+        raise
+    finally:
+        db.close()
+
+async def async_read_sessionmaker() -> Tuple[async_sessionmaker, bool]:
+    """
+    (session factory, is replica) for a read-only unit of work. For code
+    that must own its session, e.g. a streaming response body.
     """
+    if AsyncReadSessionLocal is not None and await replica_monitor.usable_async(async_read_engine):
+        return AsyncReadSessionLocal, True
+    return AsyncSessionLocal, False
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    factory, use_replica = await async_read_sessionmaker()
+    async with factory() as db:
+        try:
+            yield db
+        except OperationalError as e:
+            if use_replica:
+                replica_monitor.mark_down(e)
+            raise
+
+def _decode_token(token: str) -> schemas.TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        token_data = schemas.TokenPayload(**payload)
+        return schemas.TokenPayload(**payload)
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
 
+def get_current_user(
+        db: Session = Depends(get_db),
+        token: str = Depends(reusable_oauth2)
+) -> models.User:
+    """
+    Validates JWT and fetches user from DB.
+    """
+    token_data = _decode_token(token)
+
     user = crud.user.get(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -55,9 +111,42 @@ def get_current_active_user(
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_current_active_superuser(
-        current_user: models.User = Depends(get_current_user),
-) -> models.User:
+# --- CACHED PRINCIPAL (no DB round trip on a cache hit) ---
+async def get_current_principal(
+        token: str = Depends(reusable_oauth2)
+) -> Principal:
+    """
+    Resolves the bearer token to a slim user snapshot.
+    On a cache hit neither jwt.decode nor the users lookup runs.
+    A miss looks the user up in its own short-lived session rather than
+    the request's: yield dependencies are torn down only after a streaming
+    body ends, so a request-scoped session would keep its pooled
+    connection idle in a transaction for the life of an export or feed.
+    """
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    token_data = _decode_token(token)
+
+    async with AsyncSessionLocal() as db:
+        user = await crud.user.get_async(db, id=token_data.sub)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    principal = Principal.from_user(user)
+    principal_cache.put(token, token_data, principal)
+    return principal
+
+async def get_current_active_principal(
+        current_user: Principal = Depends(get_current_principal),
+) -> Principal:
+    if not crud.user.is_active(current_user):
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+async def get_current_active_superuser(
+        current_user: Principal = Depends(get_current_principal),
+) -> Principal:
     if not crud.user.is_superuser(current_user):
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
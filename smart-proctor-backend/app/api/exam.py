@@ -1,23 +1,54 @@
+import json
 import logging
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, Header
+from typing import Any, Dict, List, Sequence
+from fastapi import APIRouter, Body, Depends, HTTPException, Header
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app import schemas, models, crud
 from app.api import deps
 from app.core.config import settings
-from app.models.integrity import IntegrityViolation
+from app.core.keystroke_stats import DWELL_BIN_MS, FLIGHT_BIN_MS, KeystrokeStats
+from app.core.principal_cache import Principal
+from app.services import (
+    biometric_engine, collusion_detector, honeypot_service, keystroke_profiles, violation_sink,
+)
+from app.services.biometrics import KeystrokeWindow
+from app.services.collusion import CollusionMatch
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.post("/submit", response_model=schemas.ExamResult)
-def submit_exam(
+# Answers longer than this are trap-scanned in the threadpool instead of inline.
+TRAP_SCAN_INLINE_MAX_CHARS = 20_000
+MAX_LOGGED_TRAP_MATCHES = 20
+# Enough for a full exam synced at once by an offline client.
+MAX_BATCH_SUBMISSIONS = 500
+# One bouncer flush when a whole exam hall disconnects at once.
+MAX_BATCH_BASELINE_UPDATES = 5000
+MAX_BATCH_BIOMETRIC_WINDOWS = 10000
+
+async def _record_violations(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """
+    Hands violations to the write-behind sink as one group, so they are
+    committed in a single transaction. If the sink is saturated
+    (or not running, e.g. in scripts) we fall back to a direct write
+    so evidence is never silently dropped.
+    """
+    if not violation_sink.submit_many(rows):
+        await crud.integrity.create_many_async(db, rows=rows)
+
+def _analyze_submission(
         submission: schemas.ExamSubmission,
-        db: Session = Depends(deps.get_db),
-):
+        scanner,
+        violations: List[Dict[str, Any]],
+        collusion: Sequence[CollusionMatch] = (),
+) -> schemas.ExamResult:
     """
-    Analyzes submission for cheating traces and persists violations to the DB.
+    Runs the honeypot, AI-text and speed checks on one answer and folds in
+    its near-duplicate matches (found beforehand, they need the DB).
+    Violation rows are appended to `violations`; the caller persists them.
     """
     violation_detected = False
     remarks = []
@@ -27,31 +58,62 @@ def submit_exam(
         violation_detected = True
         remarks.append("Automated Tool Detected (Honeypot Triggered)")
 
-        # PERSIST VIOLATION
-        db_log = IntegrityViolation(
+        violations.append(violation_sink.build_row(
             student_id=int(submission.student_id),
             violation_type="BOT_DETECTED",
             evidence_score=0.85,
-            metadata_log="Filled hidden field: phone_extension_secondary"
-        )
-        db.add(db_log)
-        db.commit()
+            metadata_log="Filled hidden field: phone_extension_secondary",
+            exam_id=submission.exam_id,
+        ))
 
     # 2. LLM POISONING CHECK (AI Detection)
-    if settings.HONEYPOT_TRAP_WORD.lower() in submission.answer_text.lower():
+    matches = honeypot_service.find_trap_words(
+        submission.answer_text, scanner, submission.question_id
+    )
+    ai_score = honeypot_service.score_ai_text(submission.answer_text)
+    ai_flagged = ai_score is not None and ai_score.score >= settings.AI_TEXT_FLAG_THRESHOLD
+    if matches or ai_flagged:
         violation_detected = True
-        remarks.append("AI Generation Detected (Trap Word Found)")
+        if matches:
+            remarks.append("AI Generation Detected (Trap Word Found)")
+        else:
+            remarks.append("Likely AI-Generated Text (Statistical Detector)")
+
+        details: Dict[str, Any] = {}
+        if matches:
+            details["trap_matches"] = [
+                {"phrase": m.phrase, "offset": m.start}
+                for m in matches[:MAX_LOGGED_TRAP_MATCHES]
+            ]
+            details["total_matches"] = len(matches)
+        if ai_score is not None:
+            details["ai_text"] = {
+                "perplexity": round(ai_score.perplexity, 3),
+                "burstiness": round(ai_score.burstiness, 4),
+                "score": round(ai_score.score, 4),
+            }
 
-        db_log = IntegrityViolation(
+        violations.append(violation_sink.build_row(
             student_id=int(submission.student_id),
             violation_type="AI_PLAGIARISM",
-            evidence_score=0.99,
-            metadata_log=f"Found trap word: {settings.HONEYPOT_TRAP_WORD}"
-        )
-        db.add(db_log)
-        db.commit()
+            evidence_score=round(honeypot_service.ai_evidence(bool(matches), ai_score), 4),
+            metadata_log=json.dumps(details),
+            exam_id=submission.exam_id,
+        ))
+
+    # 3. COLLUSION CHECK (Near-Duplicate Answers)
+    if collusion:
+        violation_detected = True
+        remarks.append("Possible Collusion (Near-Duplicate Answer)")
 
-    # 3. SPEED CHECK
+        violations.extend(collusion_detector.build_rows(
+            exam_id=submission.exam_id,
+            question_id=submission.question_id,
+            student_id=int(submission.student_id),
+            matches=list(collusion),
+        ))
+
+    # 4. SPEED CHECK
     if submission.time_taken_seconds < 60:
         remarks.append("Suspiciously Fast Submission")
 
@@ -59,6 +121,7 @@ def submit_exam(
         return schemas.ExamResult(
             student_id=submission.student_id,
             exam_id=submission.exam_id,
+            question_id=submission.question_id,
             status="FLAGGED",
             security_remarks="; ".join(remarks),
             score=0
@@ -67,28 +130,208 @@ def submit_exam(
     return schemas.ExamResult(
         student_id=submission.student_id,
         exam_id=submission.exam_id,
+        question_id=submission.question_id,
         status="PASSED",
         score=85,
         security_remarks="Integrity Verified"
     )
 
-# --- INTERNAL ENDPOINT FOR BOUNCER SERVICE ---
+def _analyze_batch(
+        submissions: List[schemas.ExamSubmission],
+        scanners: Dict[str, Any],
+        collusion: List[List[CollusionMatch]],
+        violations: List[Dict[str, Any]],
+) -> List[schemas.ExamResult]:
+    return [
+        _analyze_submission(submission, scanners[submission.exam_id], violations, matches)
+        for submission, matches in zip(submissions, collusion)
+    ]
+
+async def _find_collusion(db: AsyncSession, submission: schemas.ExamSubmission) -> List[CollusionMatch]:
+    return await collusion_detector.check_async(
+        db,
+        exam_id=submission.exam_id,
+        question_id=submission.question_id,
+        student_id=int(submission.student_id),
+        answer_text=submission.answer_text,
+    )
+
+@router.post("/submit", response_model=schemas.ExamResult)
+async def submit_exam(
+        submission: schemas.ExamSubmission,
+        db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Analyzes submission for cheating traces and persists violations to the DB.
+    """
+    violations: List[Dict[str, Any]] = []
+    scanner = await honeypot_service.get_trap_scanner_async(db, submission.exam_id)
+    collusion = await _find_collusion(db, submission)
+    if len(submission.answer_text) > TRAP_SCAN_INLINE_MAX_CHARS:
+        # Very long answers are scanned off the event loop.
+        result = await run_in_threadpool(_analyze_submission, submission, scanner, violations, collusion)
+    else:
+        result = _analyze_submission(submission, scanner, violations, collusion)
+
+    # PERSIST VIOLATIONS (write-behind, off the request path)
+    if violations:
+        await _record_violations(db, violations)
+    return result
+
+@router.post("/submit:batch", response_model=List[schemas.ExamResult])
+async def submit_exam_batch(
+        submissions: List[schemas.ExamSubmission] = Body(..., min_length=1, max_length=MAX_BATCH_SUBMISSIONS),
+        db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Batch variant of /submit for syncing a whole exam in one round trip.
+    Returns one ExamResult per submission, in request order; all resulting
+    violations are persisted together in one transaction.
+    """
+    # One trap automaton lookup per distinct exam, not per answer.
+    scanners = {}
+    for exam_id in {s.exam_id for s in submissions}:
+        scanners[exam_id] = await honeypot_service.get_trap_scanner_async(db, exam_id)
+
+    # One catch-up read for all the questions, one signature write for all answers.
+    collusion = await collusion_detector.check_many_async(db, [
+        (s.exam_id, s.question_id, int(s.student_id), s.answer_text) for s in submissions
+    ])
+
+    violations: List[Dict[str, Any]] = []
+    if sum(len(s.answer_text) for s in submissions) > TRAP_SCAN_INLINE_MAX_CHARS:
+        results = await run_in_threadpool(_analyze_batch, submissions, scanners, collusion, violations)
+    else:
+        results = _analyze_batch(submissions, scanners, collusion, violations)
+
+    if violations:
+        await _record_violations(db, violations)
+    return results
+
+@router.post("/watermark", response_model=schemas.WatermarkedQuestion)
+async def watermark_question(
+        question: schemas.WatermarkRequest,
+        current_user: Principal = Depends(deps.get_current_active_principal),
+) -> Any:
+    """
+    Returns the question text with the caller's invisible watermark embedded,
+    so a leaked copy can be traced back to them.
+    """
+    return {"text": honeypot_service.watermark_question(question.text, current_user.id)}
+
+# --- INTERNAL ENDPOINTS FOR BOUNCER SERVICE ---
+def _keystroke_delta(data: schemas.KeystrokeUpdate) -> KeystrokeStats:
+    flight_times = data.flight_times
+    if data.new_flight_time is not None and not flight_times:
+        # Legacy senders only report the session average.
+        flight_times = [data.new_flight_time]
+    return keystroke_profiles.build_delta(flight_times, data.dwell_times)
+
 @router.post("/internal/update-baseline", dependencies=[Depends(deps.verify_internal_key)])
-def update_keystroke_baseline(
+async def update_keystroke_baseline(
         data: schemas.KeystrokeUpdate,  # [FIX] Matches schemas/exam.py class name
-        db: Session = Depends(deps.get_db)
+        db: AsyncSession = Depends(deps.get_async_db),
 ) -> Any:
     """
     Internal Endpoint: Called only by the Go Bouncer service.
-    Updates the biometric baseline (typing speed) for a user.
+    Folds a session's keystroke samples into the user's biometric profile.
+    Updates are coalesced in memory and flushed in the background, so the
+    user's existence is checked here (one indexed EXISTS) to keep the 404
+    for unknown users.
     """
-    user = crud.user.get(db, id=data.user_id)
-    if not user:
+    if not await crud.user.exists_async(db, id=data.user_id):
         raise HTTPException(status_code=404, detail="User not found")
+    # End the read transaction so the pooled connection goes back before
+    # the (possibly write-through) update.
+    await db.commit()
+
+    delta = _keystroke_delta(data)
+    if not keystroke_profiles.record(data.user_id, delta):
+        # Store not running (scripts) or saturated: write through.
+        await run_in_threadpool(keystroke_profiles.write, {data.user_id: delta})
+
+    logger.info(
+        f"🧬 Keystroke DNA updated for User {data.user_id}: "
+        f"{delta.flight.count} flight / {delta.dwell.count} dwell samples"
+    )
+    return {"status": "success", "msg": "Baseline updated securely."}
 
-    # Update the baseline
-    # Ensure your User model has this field, or use generic profile field
-    # For now we log it as successful integration
-    logger.info(f"🧬 Keystroke DNA updated for User {user.id}: {data.new_flight_time}ms")
+@router.post(
+    "/internal/update-baseline:batch",
+    response_model=List[schemas.KeystrokeUpdateResult],
+    dependencies=[Depends(deps.verify_internal_key)],
+)
+async def update_keystroke_baselines(
+        updates: List[schemas.KeystrokeUpdate] = Body(..., min_length=1, max_length=MAX_BATCH_BASELINE_UPDATES),
+) -> Any:
+    """
+    Internal Endpoint: bulk variant of /internal/update-baseline for the
+    bouncer's periodic flush. Everything is applied synchronously in one
+    transaction (one UPDATE ... FROM (VALUES ...) for all users) and each
+    item gets its own status. Items carrying an idempotency_key that was
+    already applied are reported as duplicates and skipped, so a failed
+    flush can simply be resent.
+    """
+    items = [(data.idempotency_key, data.user_id, _keystroke_delta(data)) for data in updates]
+
+    statuses = await run_in_threadpool(keystroke_profiles.write_batch, items)
+    return [
+        schemas.KeystrokeUpdateResult(
+            idempotency_key=data.idempotency_key, user_id=data.user_id, status=status
+        )
+        for data, status in zip(updates, statuses)
+    ]
 
-    return {"status": "success", "msg": "Baseline updated securely."}
\ No newline at end of file
+@router.post(
+    "/internal/biometrics:score",
+    response_model=List[schemas.BiometricScore],
+    dependencies=[Depends(deps.verify_internal_key)],
+)
+def score_keystroke_windows(
+        windows: List[schemas.BiometricWindow] = Body(..., min_length=1, max_length=MAX_BATCH_BIOMETRIC_WINDOWS),
+        db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Internal Endpoint: scores windows of live keystroke samples (any mix of
+    students) against each student's typing model. Mismatches are logged as
+    BIOMETRIC_MISMATCH; CPU-bound, so it runs in the threadpool.
+    """
+    scores = biometric_engine.process(
+        db, [KeystrokeWindow(w.user_id, w.flight_times, w.dwell_times) for w in windows]
+    )
+    return [score._asdict() for score in scores]
+
+@router.get(
+    "/internal/keystroke-profile/{user_id}",
+    response_model=schemas.KeystrokeProfile,
+    dependencies=[Depends(deps.verify_internal_key)],
+)
+async def read_keystroke_profile(
+        user_id: int,
+        db: AsyncSession = Depends(deps.get_async_db),
+) -> Any:
+    """
+    Internal Endpoint: the bouncer's baseline for a student, fetched at
+    connect time. One primary-key read; includes updates this worker has
+    not flushed yet.
+    """
+    obj = await crud.keystroke.get_async(db, user_id=user_id)
+    pending = keystroke_profiles.pending_for(user_id)
+    if obj is None and pending is None:
+        raise HTTPException(status_code=404, detail="No keystroke profile")
+    stats = crud.keystroke.to_stats(obj) if obj is not None else KeystrokeStats()
+    if pending is not None:
+        stats.merge(pending)
+    return schemas.KeystrokeProfile(
+        user_id=user_id,
+        flight_count=stats.flight.count,
+        flight_mean=stats.flight.mean,
+        flight_std=stats.flight.std,
+        flight_bin_ms=FLIGHT_BIN_MS,
+        flight_histogram=stats.flight.hist.tolist(),
+        dwell_count=stats.dwell.count,
+        dwell_mean=stats.dwell.mean,
+        dwell_std=stats.dwell.std,
+        dwell_bin_ms=DWELL_BIN_MS,
+        dwell_histogram=stats.dwell.hist.tolist(),
+    )
@@ -2,17 +2,18 @@ from typing import Any
 from fastapi import APIRouter, Body, Depends, HTTPException
 from fastapi.encoders import jsonable_encoder
 from pydantic.networks import EmailStr
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import crud, models, schemas
+from app import crud, schemas
 from app.api import deps
 from app.core.config import settings
+from app.core.principal_cache import Principal
 
 router = APIRouter()
 
 @router.get("/me", response_model=schemas.User)
-def read_user_me(
-        current_user: models.User = Depends(deps.get_current_active_user),
+async def read_user_me(
+        current_user: Principal = Depends(deps.get_current_active_principal),
 ) -> Any:
     """
     Get current user profile.
@@ -20,22 +21,26 @@ def read_user_me(
     return current_user
 
 @router.put("/me", response_model=schemas.User)
-def update_user_me(
+async def update_user_me(
         *,
-        db: Session = Depends(deps.get_db),
+        db: AsyncSession = Depends(deps.get_async_db),
         password: str = Body(None),
         full_name: str = Body(None),
         email: EmailStr = Body(None),
-        current_user: models.User = Depends(deps.get_current_active_user),
+        principal: Principal = Depends(deps.get_current_active_principal),
 ) -> Any:
     """
     Update own user profile.
+    A new password is hashed on the bcrypt pool, not in a threadpool thread.
     """
+    current_user = await crud.user.get_async(db, id=principal.id)
+    if not current_user:
+        raise HTTPException(status_code=404, detail="User not found")
     current_user_data = jsonable_encoder(current_user)
     user_in = schemas.UserUpdate(**current_user_data)
 
     if email is not None and email != current_user.email:
-        if crud.user.get_by_email(db, email=email):
+        if await crud.user.get_by_email_async(db, email=email):
             raise HTTPException(
                 status_code=409,
                 detail="This email is already associated with another account.",
@@ -48,19 +53,20 @@ def update_user_me(
     if email is not None:
         user_in.email = email
 
-    user = crud.user.update(db, db_obj=current_user, obj_in=user_in)
+    user = await crud.user.update_async(db, db_obj=current_user, obj_in=user_in)
     return user
 
 @router.post("/open", response_model=schemas.User)
-def create_user_open(
+async def create_user_open(
         *,
-        db: Session = Depends(deps.get_db),
+        db: AsyncSession = Depends(deps.get_async_db),
         password: str = Body(...),
         email: EmailStr = Body(...),
         full_name: str = Body(None),
 ) -> Any:
     """
     Public registration endpoint.
+    The password is hashed on the bcrypt pool, not in a threadpool thread.
     """
     if not settings.USERS_OPEN_REGISTRATION: # Ensure this is in config.py or default True
         raise HTTPException(
@@ -68,7 +74,7 @@ def create_user_open(
             detail="Open user registration is forbidden on this server",
         )
 
-    user = crud.user.get_by_email(db, email=email)
+    user = await crud.user.get_by_email_async(db, email=email)
     if user:
         raise HTTPException(
             status_code=400,
@@ -76,5 +82,5 @@ def create_user_open(
         )
 
     user_in = schemas.UserCreate(password=password, email=email, full_name=full_name)
-    user = crud.user.create(db, obj_in=user_in)
+    user = await crud.user.create_async(db, obj_in=user_in)
     return user
\ No newline at end of file
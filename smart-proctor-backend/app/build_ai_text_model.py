@@ -0,0 +1,117 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Iterator, List
+
+import numpy as np
+
+# Ensure we can import 'app'
+sys.path.append(os.getcwd())
+
+from app.services.ai_text import (
+    NgramModel, encode_text, fit_calibration, ngram_buckets, sample_features,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# AI-TEXT MODEL BUILDER (offline)
+# ---------------------------------------------------------
+# Counts byte n-grams of a reference corpus of human writing into the hashed
+# tables read by services.ai_text, then calibrates the score on labeled
+# samples (plain text files, one sample per blank-line separated paragraph):
+#
+#   python -m app.build_ai_text_model --corpus essays/*.txt \
+#       --human human_answers.txt --ai generated_answers.txt --out /srv/models/ai_text
+#
+# Point AI_TEXT_MODEL_DIR at --out. Files are written next to the old ones
+# and renamed into place, so running workers keep their current mapping
+# until restarted.
+
+CHUNK_CHARS = 1 << 20
+
+def read_chunks(paths: List[str]) -> Iterator[str]:
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            while True:
+                chunk = f.read(CHUNK_CHARS)
+                if not chunk:
+                    break
+                yield chunk
+
+def read_samples(path: str) -> List[str]:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return [s.strip() for s in f.read().split("\n\n") if s.strip()]
+
+def count_ngrams(paths: List[str], order: int, buckets: int) -> np.ndarray:
+    counts = np.zeros((order, buckets), dtype=np.uint64)
+    for chunk in read_chunks(paths):
+        grams = ngram_buckets(encode_text(chunk), order, buckets)
+        for k, row in enumerate(grams):
+            counts[k] += np.bincount(row, minlength=buckets).astype(np.uint64)
+    return counts
+
+def _write_atomic(path: str, write) -> None:
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+def build(args) -> None:
+    if args.buckets & (args.buckets - 1):
+        raise SystemExit("--buckets must be a power of two.")
+    counts = count_ngrams(args.corpus, args.order, args.buckets)
+    total = int(counts[0].sum())
+    if not total:
+        raise SystemExit("Corpus is empty.")
+    logger.info(f"Counted {total} bytes, {np.count_nonzero(counts[-1])} occupied {args.order}-gram buckets.")
+
+    meta = {
+        "order": args.order,
+        "buckets": args.buckets,
+        "total": total,
+        "alpha": args.alpha,
+        "calibration": None,
+    }
+    counts = np.minimum(counts, np.iinfo(np.uint32).max).astype(np.uint32)
+
+    if args.human and args.ai:
+        model = NgramModel(counts, meta)
+        human, h_kept = sample_features(model, read_samples(args.human))
+        machine, m_kept = sample_features(model, read_samples(args.ai))
+        features = np.vstack([human, machine])
+        labels = np.concatenate([np.zeros(len(human)), np.ones(len(machine))])
+        meta["calibration"] = fit_calibration(features, labels)
+        logger.info(
+            f"Calibrated on {len(human)} human / {len(machine)} generated samples "
+            f"({int((~h_kept).sum() + (~m_kept).sum())} too short): {meta['calibration']}"
+        )
+    else:
+        logger.warning("No --human/--ai samples: model is uncalibrated and will score 0.")
+
+    os.makedirs(args.out, exist_ok=True)
+    # np.save appends .npy to names without it; write through a file object.
+    _write_atomic(os.path.join(args.out, "counts.npy"), lambda p: _save_npy(p, counts))
+    _write_atomic(os.path.join(args.out, "meta.json"), lambda p: _save_json(p, meta))
+    logger.info(f"Model written to {args.out} ({counts.nbytes / 2**20:.0f} MB).")
+
+def _save_npy(path: str, array: np.ndarray) -> None:
+    with open(path, "wb") as f:
+        np.save(f, array)
+
+def _save_json(path: str, meta: dict) -> None:
+    with open(path, "w") as f:
+        json.dump(meta, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the n-gram tables for the AI-text detector.")
+    parser.add_argument("--corpus", nargs="+", required=True, help="Reference text files (human writing).")
+    parser.add_argument("--human", help="Calibration samples written by people.")
+    parser.add_argument("--ai", help="Calibration samples generated by language models.")
+    parser.add_argument("--out", required=True, help="Model directory (AI_TEXT_MODEL_DIR).")
+    parser.add_argument("--order", type=int, default=5)
+    parser.add_argument("--buckets", type=int, default=1 << 22, help="Hash buckets per order (power of two).")
+    parser.add_argument("--alpha", type=float, default=4.0, help="Smoothing mass given to the lower order.")
+    build(parser.parse_args())
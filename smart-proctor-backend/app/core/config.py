@@ -1,5 +1,6 @@
+import os
 import secrets
-from typing import List, Union, Optional
+from typing import Dict, List, Union, Optional
 from pydantic import AnyHttpUrl, EmailStr, field_validator
 from pydantic_settings import BaseSettings
 
@@ -13,6 +14,21 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     INTERNAL_API_KEY: str  # <--- NEW: Required for microservice security
+    # Verified tokens -> user snapshot, so auth skips jwt.decode + a DB lookup.
+    # User writes NOTIFY PRINCIPAL_CACHE_CHANNEL and every worker drops the
+    # user's tokens (services.principal_listener, same LISTEN DSN as the
+    # violation feed). Unset BROADCAST = on when WEB_CONCURRENCY > 1. The TTL
+    # bounds staleness only while a worker's LISTEN connection is down.
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_BROADCAST: Optional[bool] = None
+    PRINCIPAL_CACHE_CHANNEL: str = "principal_invalidations"
+    # bcrypt runs on its own bounded pool so a login storm can't starve
+    # Starlette's shared threadpool. Beyond MAX_PENDING queued hashes,
+    # callers get an immediate 503 + Retry-After.
+    PASSWORD_HASH_WORKERS: int = max(2, os.cpu_count() or 2)
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 2
 
     # DATABASE
     POSTGRES_PORT: int = 5432
@@ -20,12 +36,165 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
+    # Connection budget (app.db.pool): total connections one host may open to
+    # one Postgres server, shared by its WEB_CONCURRENCY gunicorn workers
+    # (start.sh uses the same variable). DB_SYNC_POOL_SHARE of each worker's
+    # share goes to the sync engine, the rest to the async engine. The
+    # threadpool gets the sync share plus THREADPOOL_HEADROOM tokens.
+    DB_CONNECTION_BUDGET: int = 60
+    WEB_CONCURRENCY: int = 4
+    DB_SYNC_POOL_SHARE: float = 0.5
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0
+    THREADPOOL_HEADROOM: int = 8
+    # Behind PgBouncer (transaction pooling): no app-side pool and no
+    # server-side prepared statements.
+    DB_PGBOUNCER_MODE: bool = False
+    # Optional streaming replica for admin/analytics reads (deps.get_read_db).
+    # Same credentials and database as the primary. Reads fall back to the
+    # primary while the replica is unreachable or more than
+    # REPLICA_MAX_LAG_SECONDS behind; its state is re-probed at most every
+    # REPLICA_CHECK_INTERVAL_SECONDS.
+    POSTGRES_REPLICA_SERVER: Optional[str] = None
+    POSTGRES_REPLICA_PORT: Optional[int] = None  # defaults to POSTGRES_PORT
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_INTERVAL_SECONDS: float = 2.0
+    REPLICA_CONNECT_TIMEOUT_SECONDS: int = 2
 
     # EXTERNAL SERVICES
     GO_BOUNCER_URL: str = "http://localhost:8080"
 
     # HONEYPOT
-    HONEYPOT_TRAP_WORD: str = "Cyberdyne"
+    HONEYPOT_TRAP_WORD: str = "Cyberdyne"  # exam-wide default, added to every exam's traps
+    HONEYPOT_TRAP_CACHE_SIZE: int = 256  # compiled trap automata kept per worker
+    HONEYPOT_TRAP_CACHE_TTL_SECONDS: int = 300
+    # Key for zero-width question watermarks. Falls back to SECRET_KEY;
+    # rotating it makes previously leaked watermarks unattributable.
+    WATERMARK_SECRET: Optional[str] = None
+    WATERMARK_EVERY_WORDS: int = 40
+
+    # WRITE-BEHIND VIOLATION SINK
+    # Violations are queued in-process and flushed as one multi-row INSERT
+    # every VIOLATION_SINK_FLUSH_INTERVAL_MS or VIOLATION_SINK_BATCH_SIZE rows.
+    VIOLATION_SINK_MAX_QUEUE: int = 10000
+    VIOLATION_SINK_BATCH_SIZE: int = 500
+    VIOLATION_SINK_FLUSH_INTERVAL_MS: int = 200
+
+    # LIVE VIOLATION FEED (services.violation_feed, /admin/integrity-logs/stream)
+    # "notify": the inserting transaction NOTIFYs VIOLATION_FEED_CHANNEL and
+    # every worker holds one LISTEN connection for all its SSE clients.
+    # "local": in-process only, which sees this worker's writes alone, so it
+    # is only correct with a single worker. Unset = "local" when
+    # WEB_CONCURRENCY is 1, else "notify". LISTEN needs a session-level
+    # connection: behind PgBouncer transaction pooling, point
+    # VIOLATION_FEED_LISTEN_DSN at Postgres itself (or a session pool).
+    VIOLATION_FEED_MODE: Optional[str] = None
+    VIOLATION_FEED_CHANNEL: str = "integrity_violations"
+    VIOLATION_FEED_LISTEN_DSN: Optional[str] = None
+    VIOLATION_FEED_CLIENT_QUEUE: int = 1000  # events a client may lag before it is dropped
+    VIOLATION_FEED_RESUME_MAX: int = 1000  # missed events replayed on reconnect
+    VIOLATION_FEED_KEEPALIVE_SECONDS: float = 15.0
+
+    # KEYSTROKE PROFILES
+    # Updates are merged per user in memory and written every
+    # KEYSTROKE_FLUSH_INTERVAL_MS, so a burst for one user costs one row write.
+    KEYSTROKE_FLUSH_INTERVAL_MS: int = 500
+    KEYSTROKE_MAX_PENDING_USERS: int = 50000
+    # How long idempotency keys of batched updates are remembered
+    # (a bouncer retrying later than this could double-apply).
+    KEYSTROKE_UPDATE_KEY_TTL_HOURS: int = 48
+
+    # KEYSTROKE BIOMETRICS (services.biometrics)
+    # A window whose Mahalanobis distance from the student's own feature model
+    # exceeds BIOMETRIC_MISMATCH_DISTANCE is logged as BIOMETRIC_MISMATCH.
+    # Students need BIOMETRIC_MIN_ENROLLED_WINDOWS enrolled windows first.
+    BIOMETRIC_MISMATCH_DISTANCE: float = 4.5
+    BIOMETRIC_MIN_ENROLLED_WINDOWS: int = 20
+    BIOMETRIC_WINDOW_SIZE: int = 128  # samples per window; longer windows are truncated
+    BIOMETRIC_MIN_WINDOW_SAMPLES: int = 16
+
+    # COLLUSION DETECTION (services.collusion)
+    # Answers to the same question whose estimated Jaccard similarity of word
+    # 3-grams reaches COLLUSION_JACCARD_THRESHOLD are logged as
+    # COLLUSION_SUSPECTED. 128 permutations in 16 bands of 8 make pairs above
+    # ~0.8 candidates with >99% probability, pairs below ~0.5 rarely.
+    COLLUSION_NUM_PERM: int = 128
+    COLLUSION_LSH_BANDS: int = 16
+    COLLUSION_JACCARD_THRESHOLD: float = 0.8
+    COLLUSION_SHINGLE_WORDS: int = 3
+    COLLUSION_MIN_SHINGLES: int = 10  # shorter answers are not compared
+    COLLUSION_MAX_MATCHES: int = 5    # matches logged per answer
+    COLLUSION_INDEX_MAX_QUESTIONS: int = 256  # per-question indexes kept per worker
+
+    # AI-TEXT DETECTOR (services.ai_text)
+    # Directory holding counts.npy + meta.json from app.build_ai_text_model.
+    # Unset = detector off, only trap words flag AI_PLAGIARISM. Answers whose
+    # calibrated score reaches AI_TEXT_FLAG_THRESHOLD are flagged on their own;
+    # a trap-word hit combines its own evidence with the score.
+    AI_TEXT_MODEL_DIR: Optional[str] = None
+    AI_TEXT_MIN_CHARS: int = 200  # shorter answers are not scored
+    AI_TEXT_MAX_CHARS: int = 4000  # only this prefix of longer answers is scored
+    AI_TEXT_FLAG_THRESHOLD: float = 0.9
+    HONEYPOT_TRAP_EVIDENCE: float = 0.99
+
+    # ANALYTICS
+    # Width of a violation_rollups bucket. Changing it requires a rollup rebuild.
+    VIOLATION_ROLLUP_BUCKET_SECONDS: int = 3600
+
+    # LIVE RISK SCORE (crud.risk)
+    # Every violation adds RISK_WEIGHTS[type] (RISK_DEFAULT_WEIGHT for other
+    # types) times its evidence_score to the student's risk, which halves
+    # every RISK_HALF_LIFE_SECONDS without new events.
+    RISK_HALF_LIFE_SECONDS: float = 600.0
+    RISK_DEFAULT_WEIGHT: float = 1.0
+    RISK_WEIGHTS: Dict[str, float] = {
+        "BOT_DETECTED": 3.0,
+        "AI_PLAGIARISM": 2.0,
+        "COLLUSION_SUSPECTED": 2.0,
+        "BIOMETRIC_MISMATCH": 1.5,
+        "TAB_SWITCH": 0.5,
+    }
+
+    # VIOLATION PARTITIONS (crud.partition, app.partition_maintenance)
+    # integrity_violations is range-partitioned on timestamp, one partition
+    # per "day" or "month" (UTC). Maintenance keeps VIOLATION_PARTITIONS_AHEAD
+    # future partitions and, with a retention set, detaches ("detach") or
+    # drops ("drop") partitions that ended more than that many days ago.
+    # The rollup keeps aggregate history for expired partitions.
+    # Every worker also runs the "ahead" part on startup and every
+    # VIOLATION_PARTITION_CHECK_INTERVAL_SECONDS (services.partition_maintainer);
+    # with less than VIOLATION_PARTITION_MIN_RUNWAY_DAYS covered afterwards,
+    # startup fails and later checks log errors. Rows outside every range
+    # go to the default partition meanwhile.
+    VIOLATION_PARTITION_INTERVAL: str = "month"
+    VIOLATION_PARTITIONS_AHEAD: int = 3
+    VIOLATION_PARTITION_CHECK_INTERVAL_SECONDS: int = 3600
+    VIOLATION_PARTITION_MIN_RUNWAY_DAYS: int = 14
+    VIOLATION_RETENTION_DAYS: Optional[int] = None  # None = keep everything
+    VIOLATION_RETENTION_ACTION: str = "detach"
+
+    # METRICS (app.core.metrics, /metrics)
+    # Each worker writes a snapshot of its counters and histograms to
+    # METRICS_DIR every METRICS_FLUSH_INTERVAL_SECONDS; /metrics sums the
+    # snapshots of all workers. Unset = this worker's metrics only.
+    METRICS_DIR: Optional[str] = None
+    METRICS_FLUSH_INTERVAL_SECONDS: float = 1.0
+
+    # QUERY PROFILER (app.core.query_profiler)
+    # Counts and times every request's statements: Server-Timing header, a
+    # QUERY_PROFILER_LOG_SAMPLE_RATE sample of requests slower than
+    # QUERY_PROFILER_SLOW_REQUEST_MS to first byte or repeating one statement
+    # QUERY_PROFILER_REPEAT_THRESHOLD times (likely N+1) is logged.
+    # Query budgets are keyed "METHOD /route/template"; other routes get
+    # QUERY_BUDGET_DEFAULT (None = unlimited). Going over is logged, or
+    # raised as QueryBudgetExceeded with QUERY_BUDGET_ENFORCE (set it in tests).
+    QUERY_PROFILER_ENABLED: bool = True
+    QUERY_PROFILER_SERVER_TIMING: bool = True
+    QUERY_PROFILER_SLOW_REQUEST_MS: float = 500.0
+    QUERY_PROFILER_LOG_SAMPLE_RATE: float = 0.1
+    QUERY_PROFILER_REPEAT_THRESHOLD: int = 5
+    QUERY_BUDGET_DEFAULT: Optional[int] = 20
+    QUERY_BUDGET_ENFORCE: bool = False
+    QUERY_BUDGETS: Dict[str, int] = {}
 
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
@@ -42,6 +211,13 @@ class Settings(BaseSettings):
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         return f"postgresql+psycopg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def SQLALCHEMY_REPLICA_DATABASE_URI(self) -> Optional[str]:
+        if not self.POSTGRES_REPLICA_SERVER:
+            return None
+        port = self.POSTGRES_REPLICA_PORT or self.POSTGRES_PORT
+        return f"postgresql+psycopg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_REPLICA_SERVER}:{port}/{self.POSTGRES_DB}"
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -0,0 +1,114 @@
+import math
+import sys
+from array import array
+from typing import Iterable, Optional
+
+# ---------------------------------------------------------
+# HISTOGRAM LAYOUT
+# ---------------------------------------------------------
+# Fixed bins so two histograms can always be added element-wise. The last
+# bin also counts everything above the range. Changing a layout invalidates
+# the stored histograms.
+FLIGHT_BIN_MS = 40.0
+DWELL_BIN_MS = 20.0
+HISTOGRAM_BINS = 50  # flight: 0-2000 ms, dwell: 0-1000 ms
+
+def _empty_histogram() -> array:
+    return array("I", bytes(4 * HISTOGRAM_BINS))
+
+# Stored as little-endian uint32, whatever the host byte order.
+def histogram_from_bytes(raw: Optional[bytes]) -> array:
+    if not raw:
+        return _empty_histogram()
+    hist = array("I")
+    hist.frombytes(raw)
+    if sys.byteorder == "big":
+        hist.byteswap()
+    return hist
+
+def histogram_to_bytes(hist: array) -> bytes:
+    if sys.byteorder == "big":
+        hist = array("I", hist)
+        hist.byteswap()
+    return hist.tobytes()
+
+# ---------------------------------------------------------
+# RUNNING STATISTICS
+# ---------------------------------------------------------
+class RunningStats:
+    """
+    Count, mean and sum of squared deviations (Welford) plus a fixed-bin
+    histogram. `add` is O(1) per sample and `merge` combines two summaries
+    in O(bins) (Chan et al.), so no history is ever rescanned.
+    """
+    __slots__ = ("count", "mean", "m2", "hist", "_bin_width")
+
+    def __init__(
+            self,
+            bin_width: float,
+            count: int = 0,
+            mean: float = 0.0,
+            m2: float = 0.0,
+            hist: Optional[array] = None,
+    ):
+        self._bin_width = bin_width
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.hist = hist if hist is not None else _empty_histogram()
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def add(self, x: float) -> None:
+        if not (x > 0 and math.isfinite(x)):
+            return  # missing or corrupt sample
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.hist[min(int(x // self._bin_width), HISTOGRAM_BINS - 1)] += 1
+
+    def add_many(self, xs: Iterable[float]) -> None:
+        for x in xs:
+            self.add(x)
+
+    def merge(self, other: "RunningStats") -> None:
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+        else:
+            total = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / total
+            self.m2 += other.m2 + delta * delta * self.count * other.count / total
+            self.count = total
+        for i, n in enumerate(other.hist):
+            if n:
+                self.hist[i] += n
+
+    def copy(self) -> "RunningStats":
+        return RunningStats(self._bin_width, self.count, self.mean, self.m2, array("I", self.hist))
+
+class KeystrokeStats:
+    """
+    Flight-time and dwell-time statistics of one user.
+    """
+    __slots__ = ("flight", "dwell")
+
+    def __init__(self, flight: Optional[RunningStats] = None, dwell: Optional[RunningStats] = None):
+        self.flight = flight or RunningStats(FLIGHT_BIN_MS)
+        self.dwell = dwell or RunningStats(DWELL_BIN_MS)
+
+    def merge(self, other: "KeystrokeStats") -> None:
+        self.flight.merge(other.flight)
+        self.dwell.merge(other.dwell)
+
+    def copy(self) -> "KeystrokeStats":
+        return KeystrokeStats(self.flight.copy(), self.dwell.copy())
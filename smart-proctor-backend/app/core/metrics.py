@@ -0,0 +1,313 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as Tally
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# METRICS (Prometheus text format)
+# ---------------------------------------------------------
+# Observations only touch in-process lists (a bisect and two additions
+# under one uncontended lock, ~1 us); a daemon thread writes a snapshot of
+# them to METRICS_DIR/<pid>.json every flush interval, and /metrics sums
+# the snapshots of every worker, exited ones included, so counters survive
+# worker restarts. Scrapes may lag the other workers by one interval.
+#
+# Labels must stay bounded: routes are path templates, never raw paths.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 7.5, 10)
+
+_lock = threading.Lock()
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # label values -> values; children keep a reference to their list.
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def _width(self) -> int:
+        raise NotImplementedError
+
+    def _values_for(self, labelvalues: Tuple[str, ...]) -> List[float]:
+        values = self._series.get(labelvalues)
+        if values is None:
+            with _lock:
+                values = self._series.setdefault(labelvalues, [0.0] * self._width())
+        return values
+
+class _CounterChild:
+    __slots__ = ("_values",)
+
+    def __init__(self, values: List[float]):
+        self._values = values
+
+    def inc(self, amount: float = 1.0) -> None:
+        with _lock:
+            self._values[0] += amount
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _width(self) -> int:
+        return 1
+
+    def labels(self, *labelvalues: str) -> _CounterChild:
+        return _CounterChild(self._values_for(labelvalues))
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_values")
+
+    def __init__(self, bounds: Tuple[float, ...], values: List[float]):
+        self._bounds = bounds
+        self._values = values
+
+    def observe(self, amount: float) -> None:
+        # `le` is inclusive. Slot len(bounds) is the +Inf bucket, the last one the sum.
+        i = bisect_left(self._bounds, amount)
+        with _lock:
+            self._values[i] += 1
+            self._values[-1] += amount
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(float(b) for b in buckets)
+
+    def _width(self) -> int:
+        return len(self.buckets) + 2
+
+    def labels(self, *labelvalues: str) -> _HistogramChild:
+        return _HistogramChild(self.buckets, self._values_for(labelvalues))
+
+# ---------------------------------------------------------
+# DEFINITIONS
+# ---------------------------------------------------------
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template (streams: until the stream ends).",
+    ["method", "route", "status"],
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to get a connection from an engine's pool (queueing or connecting).",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT_SECONDS.", ["pool"]
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "bcrypt run time in the password hash pool (excluding queueing).",
+    ["operation"],
+    buckets=(0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 5),
+)
+DETECTOR_SECONDS = Histogram(
+    "detector_duration_seconds",
+    "Run time of one integrity detector invocation.",
+    ["detector"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+VIOLATIONS_WRITTEN = Counter(
+    "violations_written_total", "Violations committed to integrity_violations.", ["violation_type"]
+)
+METRICS = (
+    REQUEST_SECONDS, DB_POOL_WAIT_SECONDS, DB_POOL_TIMEOUTS,
+    PASSWORD_HASH_SECONDS, DETECTOR_SECONDS, VIOLATIONS_WRITTEN,
+)
+
+# Bound once, so the hot paths skip the label lookup.
+# Trap words, AI text and collusion (MinHash + LSH query) are timed as pure
+# computation; biometrics per scored batch, its DB reads and writes included.
+TRAP_SCAN_SECONDS = DETECTOR_SECONDS.labels("trap_words")
+AI_TEXT_SECONDS = DETECTOR_SECONDS.labels("ai_text")
+COLLUSION_SECONDS = DETECTOR_SECONDS.labels("collusion")
+BIOMETRICS_SECONDS = DETECTOR_SECONDS.labels("biometrics")
+
+def count_violations(rows: Iterable[Dict[str, Any]]) -> None:
+    for violation_type, n in Tally(row["violation_type"] for row in rows).items():
+        VIOLATIONS_WRITTEN.labels(violation_type).inc(n)
+
+# ---------------------------------------------------------
+# SNAPSHOTS AND EXPOSITION
+# ---------------------------------------------------------
+Snapshot = Dict[str, Dict[str, List[float]]]  # metric -> JSON label values -> values
+
+def snapshot() -> Snapshot:
+    with _lock:
+        return {
+            metric.name: {json.dumps(labels): list(values) for labels, values in metric._series.items()}
+            for metric in METRICS
+        }
+
+def _merge(total: Snapshot, part: Snapshot) -> None:
+    for name, series in part.items():
+        into = total.setdefault(name, {})
+        for labels, values in series.items():
+            current = into.get(labels)
+            if current is None or len(current) != len(values):
+                # New series, or written before a bucket change: latest layout wins.
+                into[labels] = list(values)
+            else:
+                into[labels] = [a + b for a, b in zip(current, values)]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labelset(names: Sequence[str], values: Sequence[str], *extra: str) -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    parts.extend(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format(total: Snapshot) -> str:
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for labels, values in sorted(total.get(metric.name, {}).items()):
+            labelvalues = json.loads(labels)
+            labelset = _labelset(metric.labelnames, labelvalues)
+            if metric.kind == "counter":
+                lines.append(f"{metric.name}{labelset} {values[0]}")
+                continue
+            cumulative = 0.0
+            for bound, count in zip(metric.buckets + (float("inf"),), values):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{metric.name}_bucket{_labelset(metric.labelnames, labelvalues, le)} {cumulative}")
+            lines.append(f"{metric.name}_sum{labelset} {values[-1]}")
+            lines.append(f"{metric.name}_count{labelset} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+def render() -> str:
+    """
+    This worker's live values plus the last snapshot of every other
+    worker in METRICS_DIR, in Prometheus text format.
+    """
+    total: Snapshot = {}
+    if settings.METRICS_DIR:
+        own = f"{os.getpid()}.json"
+        for filename in os.listdir(settings.METRICS_DIR):
+            if not filename.endswith(".json") or filename == own:
+                continue
+            try:
+                with open(os.path.join(settings.METRICS_DIR, filename)) as f:
+                    _merge(total, json.load(f))
+            except (OSError, ValueError):
+                continue  # vanished mid-scrape; counted again next time
+    _merge(total, snapshot())
+    return _format(total)
+
+class MetricsPublisher:
+    """
+    Writes this worker's snapshot to METRICS_DIR on an interval, and once
+    more on stop. Files are replaced atomically, so a scrape never reads
+    a partial one.
+    """
+
+    def __init__(self, directory: Optional[str], interval: float):
+        self._directory = directory
+        self._interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if not self._directory or self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join(5.0)
+        self._thread = None
+        self._write()
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self._interval):
+            self._write()
+
+    def _write(self) -> None:
+        path = os.path.join(self._directory, f"{os.getpid()}.json")
+        try:
+            with open(path + ".tmp", "w") as f:
+                json.dump(snapshot(), f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.warning(f"Could not publish metrics: {e}")
+
+# Instantiate for easy import
+metrics_publisher = MetricsPublisher(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL_SECONDS)
+
+# ---------------------------------------------------------
+# REQUEST TIMING
+# ---------------------------------------------------------
+def route_template(scope) -> str:
+    """
+    The matched route's path template including router prefixes, e.g.
+    "/api/v1/admin/students/{student_id}/integrity-logs".
+    Recent FastAPI versions store routes of included routers with their
+    own path only; the prefix is then the leading, static part of the
+    request path that the template does not cover.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "<unmatched>"
+    extra = scope["path"].count("/") - template.count("/")
+    if extra <= 0:
+        return template
+    return "/".join(scope["path"].split("/", extra + 1)[:extra + 1]) + template
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task per request) that
+    times every HTTP request into REQUEST_SECONDS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._children: Dict[Tuple[str, str, str], _HistogramChild] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the (shared) scope.
+            key = (scope["method"], route_template(scope), str(status))
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = REQUEST_SECONDS.labels(*key)
+            child.observe(time.perf_counter() - started)
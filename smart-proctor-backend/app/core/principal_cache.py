@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.schemas.token import TokenPayload
+
+# ---------------------------------------------------------
+# AUTHENTICATED PRINCIPAL
+# ---------------------------------------------------------
+@dataclass(frozen=True)
+class Principal:
+    """
+    Slim, immutable snapshot of the authenticated user.
+    Holds what auth checks and /users/me need; never the password hash.
+    """
+    id: int
+    email: str
+    full_name: Optional[str]
+    is_active: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user: Any) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+        )
+
+class PrincipalCache:
+    """
+    Bounded LRU of token -> (verified claims, principal).
+
+    An entry lives until the earlier of `ttl_seconds` and the token's own
+    `exp`, so a hit never outlives the JWT. Writes to a user drop every
+    token cached for them (see crud.user.update/remove). With a `channel`,
+    `stage_invalidation` also NOTIFYs it in the writing transaction, and
+    services.principal_listener drops the tokens in every other worker
+    once (and only if) the write commits.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float, channel: Optional[str] = None):
+        self._maxsize = maxsize
+        self._ttl = ttl_seconds
+        self.channel = channel
+        self._entries: "OrderedDict[str, Tuple[float, TokenPayload, Principal]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    self._drop(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, token: str, claims: TokenPayload, principal: Principal) -> None:
+        expires_at = time.time() + self._ttl
+        if claims.exp is not None:
+            expires_at = min(expires_at, claims.exp)
+        with self._lock:
+            self._drop(token)
+            self._entries[token] = (expires_at, claims, principal)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self._maxsize:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            tokens = self._tokens_by_user.get(user_id)
+            if not tokens:
+                return
+            for token in list(tokens):
+                self._drop(token)
+            self.invalidations += 1
+
+    def _notify_stmt(self, user_id: int):
+        if self.channel is None:
+            return None
+        return text("SELECT pg_notify(:channel, :user_id)").bindparams(
+            channel=self.channel, user_id=str(user_id)
+        )
+
+    def stage_invalidation(self, db: Session, user_id: int) -> None:
+        """
+        Queues the cross-worker invalidation in the current transaction.
+        Does not commit.
+        """
+        stmt = self._notify_stmt(user_id)
+        if stmt is not None:
+            db.execute(stmt)
+
+    async def stage_invalidation_async(self, db: AsyncSession, user_id: int) -> None:
+        stmt = self._notify_stmt(user_id)
+        if stmt is not None:
+            await db.execute(stmt)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "capacity": self._maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+    def _drop(self, token: str) -> None:
+        # Caller holds the lock.
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[2].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[2].id]
+
+# Instantiate for easy import
+_broadcast = settings.PRINCIPAL_CACHE_BROADCAST
+if _broadcast is None:
+    _broadcast = settings.WEB_CONCURRENCY > 1
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    channel=settings.PRINCIPAL_CACHE_CHANNEL if _broadcast else None,
+)
@@ -0,0 +1,219 @@
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# QUERY PROFILES
+# ---------------------------------------------------------
+# The profile of the current request lives in a ContextVar: Starlette copies
+# the context into the threadpool for sync routes and dependencies, and
+# SQLAlchemy's greenlets inherit it for AsyncSession, so both engines' cursor
+# events land in the right profile. Code outside a request (the write-behind
+# sinks, the feed listener) has no profile and is not recorded.
+_current: ContextVar[Optional["QueryProfile"]] = ContextVar("query_profile", default=None)
+
+_PARAM = re.compile(r"%\(\w+\)s|\$\d+|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\?(?:, \?)*\)")
+_ROWS = re.compile(r"\(\.\.\.\)(?:, \(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    The statement with parameters and literals replaced by "?" and
+    expanded IN lists / multi-row VALUES collapsed, so the same query
+    with different arguments (or batch sizes) has one fingerprint.
+    """
+    normalized = _PARAM.sub("?", _SPACE.sub(" ", statement).strip())
+    return _ROWS.sub("(...)", _LIST.sub("(...)", normalized))
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    A request issued more statements than its route's budget allows.
+    An AssertionError, so a test hitting the route fails like any assert.
+    """
+
+class QueryProfile:
+    """
+    Statements one request sent to the database: count, total time spent
+    in the driver, and how often each fingerprint repeated.
+    """
+
+    __slots__ = ("count", "db_seconds", "fingerprints")
+
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.db_seconds += seconds
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        Fingerprints seen at least `threshold` times, most frequent first:
+        the usual shape of an N+1 (one query per row of a previous one).
+        """
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_seconds * 1000:.2f};desc="{self.count} queries"'
+
+    def check_budget(self, budget: Optional[int], label: str) -> None:
+        if budget is not None and self.count > budget:
+            top = ", ".join(f"{n}x {fp[:120]}" for fp, n in self.fingerprints.most_common(3))
+            raise QueryBudgetExceeded(f"{label} issued {self.count} queries (budget {budget}): {top}")
+
+@contextmanager
+def profile_queries() -> Iterator[QueryProfile]:
+    """
+    Records the statements of the enclosed block (outside a request,
+    e.g. in a test or benchmark):
+
+        with profile_queries() as profile:
+            crud.user.update(db, db_obj=user, obj_in=update)
+        profile.check_budget(3, "user update")
+    """
+    profile = QueryProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+# Callbacks given (label, profile) of every profiled request that finishes,
+# whatever thread served it: TestClient runs the app in its own event loop,
+# where a profile_queries() block of the test does not reach.
+_request_observers: List[Callable[[str, QueryProfile], None]] = []
+
+@contextmanager
+def capture_requests() -> Iterator[List[Tuple[str, QueryProfile]]]:
+    """
+    Collects (label, profile) of the requests that finish in the enclosed
+    block, e.g. a test calling routes through TestClient:
+
+        with capture_requests() as requests:
+            client.post("/api/v1/exam/submit", json=answer)
+        [(label, profile)] = requests
+    """
+    captured: List[Tuple[str, QueryProfile]] = []
+    observer = lambda label, profile: captured.append((label, profile))
+    _request_observers.append(observer)
+    try:
+        yield captured
+    finally:
+        _request_observers.remove(observer)
+
+# ---------------------------------------------------------
+# ENGINE INSTRUMENTATION
+# ---------------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_profiler_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    if profile is None:
+        return
+    started = conn.info.get("query_profiler_started")
+    if started:
+        profile.record(statement, time.perf_counter() - started.pop())
+
+def instrument(engine) -> None:
+    """
+    Attaches the cursor event hooks to a sync engine or, through its
+    sync_engine, an async one. No-op when the profiler is disabled.
+    """
+    if not settings.QUERY_PROFILER_ENABLED:
+        return
+    target = getattr(engine, "sync_engine", engine)
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+# ---------------------------------------------------------
+# PER-REQUEST PROFILING
+# ---------------------------------------------------------
+def budget_for(method: str, route: str) -> Optional[int]:
+    return settings.QUERY_BUDGETS.get(f"{method} {route}", settings.QUERY_BUDGET_DEFAULT)
+
+class QueryProfilerMiddleware:
+    """
+    Pure ASGI middleware that profiles each HTTP request's statements.
+
+    - Adds `Server-Timing: db;dur=<ms>;desc="<n> queries"` to the response
+      (statements issued before the headers went out; a streaming body's
+      later ones only count towards the budget and the log).
+    - Logs a sample of requests that were slow to start responding or
+      repeated a fingerprint QUERY_PROFILER_REPEAT_THRESHOLD times.
+    - Checks the route's query budget: over budget is logged, or raised
+      as QueryBudgetExceeded when QUERY_BUDGET_ENFORCE is set (tests).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_PROFILER_ENABLED:
+            return await self.app(scope, receive, send)
+
+        profile = QueryProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        first_byte: Optional[float] = None
+
+        async def send_with_timing(message):
+            nonlocal first_byte
+            if message["type"] == "http.response.start":
+                first_byte = time.perf_counter() - started
+                if settings.QUERY_PROFILER_SERVER_TIMING and profile.count:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", profile.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+        self._report(scope, profile, first_byte)
+
+    def _report(self, scope, profile: QueryProfile, first_byte: Optional[float]) -> None:
+        if not profile.count and not _request_observers:
+            return
+        method, route = scope["method"], route_template(scope)
+        label = f"{method} {route}"
+        for observer in list(_request_observers):
+            observer(label, profile)
+        if not profile.count:
+            return
+
+        budget = budget_for(method, route)
+        if budget is not None and profile.count > budget:
+            if settings.QUERY_BUDGET_ENFORCE:
+                profile.check_budget(budget, label)
+            logger.warning(f"Query budget exceeded: {label} issued {profile.count} queries (budget {budget}).")
+
+        slow = first_byte is not None and first_byte * 1000 >= settings.QUERY_PROFILER_SLOW_REQUEST_MS
+        repeated = profile.repeated(settings.QUERY_PROFILER_REPEAT_THRESHOLD)
+        if (slow or repeated) and random.random() < settings.QUERY_PROFILER_LOG_SAMPLE_RATE:
+            detail = "; ".join(f"{n}x {fp}" for fp, n in (repeated or profile.fingerprints.most_common(3)))
+            logger.warning(
+                f"{'Slow request' if slow else 'Repeated queries'}: {label} "
+                f"{(first_byte or 0) * 1000:.0f} ms to first byte, {profile.count} queries, "
+                f"{profile.db_seconds * 1000:.1f} ms in DB. {'Possible N+1' if repeated else 'Top'}: {detail}"
+            )
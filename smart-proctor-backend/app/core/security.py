@@ -1,8 +1,13 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+from typing import Any, Callable, Dict, TypeVar, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_SECONDS
 
 # ---------------------------------------------------------
 # PASSWORD HASHING ENGINE
@@ -12,19 +17,122 @@ from app.core.config import settings
 # change algorithms in the future (without locking users out).
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
+class PasswordHashPoolSaturated(Exception):
+    """
+    Raised when too many hashes are already queued. Mapped to a fast
+    503 + Retry-After in app.main instead of making the caller wait.
+    """
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
+class PasswordHashPool:
+    """
+    Dedicated, size-bounded executor for bcrypt.
+
+    bcrypt releases the GIL, so `max_workers` threads hash in parallel.
+    Admission control caps in-flight + queued work at `max_pending`;
+    everything past that is rejected immediately.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, retry_after: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="bcrypt"
+        )
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._retry_after = retry_after
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        # TIMING METRICS (guarded by _lock)
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait_ms = 0.0
+        self._total_run_ms = 0.0
+        self._max_wait_ms = 0.0
+        self._max_run_ms = 0.0
+
+    def _submit(self, fn: Callable[..., T], *args: Any) -> "Future[T]":
+        with self._lock:
+            if self._pending >= self._max_pending:
+                self._rejected += 1
+                raise PasswordHashPoolSaturated(self._retry_after)
+            self._pending += 1
+
+        queued_at = time.perf_counter()
+
+        def timed() -> T:
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                PASSWORD_HASH_SECONDS.labels(fn.__name__).observe(finished - started)
+                wait_ms = (started - queued_at) * 1000
+                run_ms = (finished - started) * 1000
+                with self._lock:
+                    self._pending -= 1
+                    self._completed += 1
+                    self._total_wait_ms += wait_ms
+                    self._total_run_ms += run_ms
+                    self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+                    self._max_run_ms = max(self._max_run_ms, run_ms)
+
+        return self._executor.submit(timed)
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        return self._submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable[..., T], *args: Any) -> T:
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            done = self._completed
+            return {
+                "workers": self._max_workers,
+                "pending": self._pending,
+                "max_pending": self._max_pending,
+                "completed": done,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._total_wait_ms / done, 3) if done else 0.0,
+                "avg_run_ms": round(self._total_run_ms / done, 3) if done else 0.0,
+                "max_wait_ms": round(self._max_wait_ms, 3),
+                "max_run_ms": round(self._max_run_ms, 3),
+            }
+
+password_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies a plain-text password against the stored hash.
     Used during the Login process.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_pool.run(pwd_context.verify, plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """
     Generates a secure hash for storage in PostgreSQL.
     Used during Registration.
     """
-    return pwd_context.hash(password)
+    return password_pool.run(pwd_context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Event-loop friendly variant: awaits the bcrypt pool without
+    occupying a Starlette threadpool thread.
+    """
+    return await password_pool.run_async(pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_pool.run_async(pwd_context.hash, password)
 
 # ---------------------------------------------------------
 # JWT (JSON WEB TOKEN) FACTORY
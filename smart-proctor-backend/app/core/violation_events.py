@@ -0,0 +1,93 @@
+import json
+import logging
+from typing import Any, Callable, Dict, List, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+MAX_PAYLOAD_BYTES = 7500
+MODES = ("notify", "local")
+
+Listener = Callable[[List[Dict[str, Any]]], None]
+
+class ViolationEvents:
+    """
+    Announces committed violations to the live feed (services.violation_feed).
+
+    Lives below the CRUD layer so crud.integrity can publish without
+    importing the services. In "notify" mode `stage` adds the NOTIFY to
+    the inserting transaction, so listeners hear about rows exactly when
+    (and only if) they commit; payloads carry ids, not rows. In "local"
+    mode `committed` hands the rows to in-process listeners.
+    """
+
+    def __init__(self, mode: str, channel: str):
+        if mode not in MODES:
+            raise ValueError(f"Violation feed mode must be one of {MODES}")
+        self.mode = mode
+        self.channel = channel
+        self._listeners: List[Listener] = []
+
+    def add_listener(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def _payloads(self, rows: Sequence[Dict[str, Any]], ids: Sequence[int]) -> List[str]:
+        # {"ids": [...], "since": oldest timestamp}; "since" lets the reader
+        # prune partitions. Split so every payload stays under the limit.
+        since = min(row["timestamp"] for row in rows).isoformat()
+        payloads, chunk, size = [], [], 0
+        for id_ in ids:
+            size += len(str(id_)) + 1
+            chunk.append(id_)
+            if size >= MAX_PAYLOAD_BYTES - 100:
+                payloads.append(json.dumps({"ids": chunk, "since": since}))
+                chunk, size = [], 0
+        if chunk:
+            payloads.append(json.dumps({"ids": chunk, "since": since}))
+        return payloads
+
+    def _notify_stmt(self, rows, ids):
+        if self.mode != "notify" or not ids:
+            return None
+        return text("SELECT pg_notify(:channel, p) FROM unnest(CAST(:payloads AS text[])) AS p").bindparams(
+            channel=self.channel, payloads=self._payloads(rows, ids)
+        )
+
+    def stage(self, db: Session, rows: Sequence[Dict[str, Any]], ids: Sequence[int]) -> None:
+        """
+        Queues the notification in the current transaction. Does not commit.
+        """
+        stmt = self._notify_stmt(rows, ids)
+        if stmt is not None:
+            db.execute(stmt)
+
+    async def stage_async(self, db: AsyncSession, rows: Sequence[Dict[str, Any]], ids: Sequence[int]) -> None:
+        stmt = self._notify_stmt(rows, ids)
+        if stmt is not None:
+            await db.execute(stmt)
+
+    def committed(self, rows: Sequence[Dict[str, Any]], ids: Sequence[int]) -> None:
+        """
+        Call after the commit. Listeners must not block (they run on the
+        writer's thread).
+        """
+        if self.mode != "local" or not self._listeners:
+            return
+        events = [{**row, "id": id_} for row, id_ in zip(rows, ids)]
+        for listener in self._listeners:
+            try:
+                listener(events)
+            except Exception as e:
+                logger.warning(f"Violation feed listener failed: {e}")
+
+# Instantiate for easy import
+violation_events = ViolationEvents(
+    mode=settings.VIOLATION_FEED_MODE or ("local" if settings.WEB_CONCURRENCY == 1 else "notify"),
+    channel=settings.VIOLATION_FEED_CHANNEL,
+)
@@ -1,2 +1,8 @@
 from .crud_user import user
-from .crud_integrity import integrity
\ No newline at end of file
+from .crud_integrity import integrity
+from .crud_honeypot import trap
+from .crud_rollup import rollup
+from .crud_keystroke import keystroke
+from .crud_collusion import answer_signature
+from .crud_partition import partition
+from .crud_risk import risk
@@ -1,7 +1,10 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
-from fastapi.encoders import jsonable_encoder
+from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
 from pydantic import BaseModel
+from sqlalchemy import Select, column, insert, inspect as sa_inspect, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from app.crud.pagination import Page, build_page, decode_cursor, parse_cursor_int
 from app.db.base_class import Base
 
 # Define generic types for Model, CreateSchema, and UpdateSchema
@@ -9,6 +12,8 @@ ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+_MISSING = object()
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -16,6 +21,11 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         **model**: A SQLAlchemy model class
         """
         self.model = model
+        # Column metadata, read from the mapper once here instead of per write:
+        # attribute key -> Column, and the primary key's attribute keys.
+        mapper = sa_inspect(model)
+        self._columns = {attr.key: attr.columns[0] for attr in mapper.column_attrs}
+        self._primary_key = tuple(mapper.get_property_by_column(c).key for c in mapper.primary_key)
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         return db.query(self.model).filter(self.model.id == id).first()
@@ -23,16 +33,105 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def get_multi(
             self, db: Session, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        # ORDER BY keeps OFFSET paging deterministic; prefer get_page for deep pages.
+        return db.query(self.model).order_by(self.model.id).offset(skip).limit(limit).all()
+
+    def _page_stmt(self, cursor: Optional[str], limit: int) -> Select:
+        stmt = select(self.model).order_by(self.model.id).limit(limit + 1)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, arity=1)
+            stmt = stmt.where(self.model.id > parse_cursor_int(last_id))
+        return stmt
+
+    def get_page(
+            self, db: Session, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> Page[ModelType]:
+        """
+        Keyset pagination on the primary key: cost is O(limit) at any depth.
+        """
+        rows = list(db.scalars(self._page_stmt(cursor, limit)).all())
+        return build_page(rows, limit, key_of=lambda obj: (obj.id,))
+
+    async def get_async(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        # By `id`, like `get`, not db.get(): the primary key of a partitioned
+        # table also holds the partition key (integrity_violations: id, timestamp).
+        return await db.scalar(select(self.model).where(self.model.id == id))
+
+    async def get_multi_async(
+            self, db: AsyncSession, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        result = await db.scalars(
+            select(self.model).order_by(self.model.id).offset(skip).limit(limit)
+        )
+        return list(result.all())
+
+    async def get_page_async(
+            self, db: AsyncSession, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> Page[ModelType]:
+        rows = list((await db.scalars(self._page_stmt(cursor, limit))).all())
+        return build_page(rows, limit, key_of=lambda obj: (obj.id,))
+
+    # ---------------------------------------------------------
+    # WRITES (INSERT / UPDATE ... RETURNING)
+    # ---------------------------------------------------------
+    # Every write returns the whole row, so the object is complete without
+    # a refresh SELECT; `_commit` keeps it loaded through the commit.
+    def _column_values(
+            self, obj_in: Union[BaseModel, Dict[str, Any]], *, exclude_unset: bool = False
+    ) -> Dict[str, Any]:
+        """
+        The input's values for columns of the model; other fields are ignored.
+        """
+        data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=exclude_unset)
+        return {key: value for key, value in data.items() if key in self._columns}
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)  # type: ignore
-        db.add(db_obj)
+    def _commit(self, db: Session, db_objs: Sequence[ModelType]) -> None:
+        """
+        Commits, then restores the column values RETURNING loaded into
+        `db_objs`. The commit expires them (expire_on_commit), and reading
+        an expired object costs a SELECT: the round trip RETURNING saved.
+        """
+        loaded = [
+            (obj, {key: obj.__dict__[key] for key in self._columns if key in obj.__dict__})
+            for obj in db_objs
+        ]
         db.commit()
-        db.refresh(db_obj)
+        for obj, state in loaded:
+            for key, value in state.items():
+                set_committed_value(obj, key, value)
+
+    def _insert_stmt(self, obj_in: Union[CreateSchemaType, Dict[str, Any]]):
+        return insert(self.model).values(**self._column_values(obj_in)).returning(self.model)
+
+    def create(self, db: Session, *, obj_in: Union[CreateSchemaType, Dict[str, Any]]) -> ModelType:
+        db_obj = db.scalars(self._insert_stmt(obj_in)).one()
+        self._commit(db, [db_obj])
         return db_obj
 
+    async def create_async(
+            self, db: AsyncSession, *, obj_in: Union[CreateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        # AsyncSession does not expire on commit: nothing to restore.
+        db_obj = (await db.scalars(self._insert_stmt(obj_in))).one()
+        await db.commit()
+        return db_obj
+
+    def bulk_create(
+            self, db: Session, *, objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]]
+    ) -> List[ModelType]:
+        """
+        Inserts all rows with one multi-row INSERT ... RETURNING and commits.
+        Objects come back in input order.
+        """
+        if not objs_in:
+            return []
+        db_objs = list(db.scalars(
+            insert(self.model).returning(self.model, sort_by_parameter_order=True),
+            [self._column_values(obj_in) for obj_in in objs_in],
+        ).all())
+        self._commit(db, db_objs)
+        return db_objs
+
     def update(
             self,
             db: Session,
@@ -40,21 +139,94 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             db_obj: ModelType,
             obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.model_dump(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        """
+        One UPDATE ... RETURNING of the columns that actually change (none:
+        no statement at all). Primary key columns are never updated.
+        """
+        stmt = self._update_stmt(db_obj, obj_in)
+        if stmt is None:
+            return db_obj
+        updated = db.scalars(stmt).one()
+        self._copy_row(updated, db_obj)
+        self._commit(db, [updated])
+        return db_obj
+
+    async def update_async(
+            self,
+            db: AsyncSession,
+            *,
+            db_obj: ModelType,
+            obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        stmt = self._update_stmt(db_obj, obj_in)
+        if stmt is None:
+            return db_obj
+        updated = (await db.scalars(stmt)).one()
+        self._copy_row(updated, db_obj)
+        await db.commit()
         return db_obj
 
+    def _update_stmt(self, db_obj: ModelType, obj_in: Union[UpdateSchemaType, Dict[str, Any]]):
+        changes = {
+            key: value
+            for key, value in self._column_values(obj_in, exclude_unset=True).items()
+            if key not in self._primary_key and db_obj.__dict__.get(key, _MISSING) != value
+        }
+        if not changes:
+            return None
+        return (
+            update(self.model)
+            .where(*(getattr(self.model, key) == getattr(db_obj, key) for key in self._primary_key))
+            .values(**changes)
+            .returning(self.model)
+        )
+
+    def _copy_row(self, updated: ModelType, db_obj: ModelType) -> None:
+        if updated is not db_obj:
+            # db_obj is detached (or from another session): copy the new row over.
+            for key in self._columns:
+                set_committed_value(db_obj, key, getattr(updated, key))
+
+    def bulk_update(self, db: Session, *, rows: Sequence[Dict[str, Any]]) -> List[ModelType]:
+        """
+        Applies `rows` (each: the primary key plus the columns to set) and
+        commits. Rows setting the same columns share one
+        UPDATE ... FROM (VALUES ...) RETURNING statement. Returns the
+        updated objects in input order; keys that match no row are skipped.
+        """
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for row in rows:
+            changes = tuple(sorted(k for k in row if k in self._columns and k not in self._primary_key))
+            if changes:
+                groups.setdefault(changes, []).append(row)
+
+        by_key: Dict[tuple, ModelType] = {}
+        for changes, group in groups.items():
+            keys = self._primary_key + changes
+            v = values(
+                *(column(key, self._columns[key].type) for key in keys), name="v"
+            ).data([tuple(row[key] for key in keys) for row in group])
+            updated = db.scalars(
+                update(self.model)
+                .where(*(getattr(self.model, key) == v.c[key] for key in self._primary_key))
+                .values({key: v.c[key] for key in changes})
+                .returning(self.model)
+                # Overwrite objects already in the session with the returned row.
+                .execution_options(synchronize_session=False, populate_existing=True)
+            ).all()
+            for obj in updated:
+                by_key[tuple(getattr(obj, key) for key in self._primary_key)] = obj
+
+        db_objs = []
+        for row in rows:
+            obj = by_key.get(tuple(row[key] for key in self._primary_key))
+            if obj is not None:
+                db_objs.append(obj)
+        self._commit(db, list(by_key.values()))
+        return db_objs
+
     def remove(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
+        obj = db.query(self.model).filter(self.model.id == id).first()
         db.delete(obj)
         db.commit()
         return obj
\ No newline at end of file
@@ -0,0 +1,80 @@
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import Integer, LargeBinary, String, column, insert, select, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.collusion import AnswerSignature
+from app.models.user import User
+
+QuestionKey = Tuple[str, str]
+
+class CRUDAnswerSignature:
+    async def get_since_many_async(
+            self,
+            db: AsyncSession,
+            *,
+            after_ids: Dict[QuestionKey, int],
+    ) -> Dict[QuestionKey, List[Tuple[int, int, bytes]]]:
+        """
+        (id, student_id, signature) of each (exam_id, question_id)'s answers
+        with id above its after_id, in id order. One statement for all
+        questions: the VALUES list drives a range scan of the
+        (exam_id, question_id, id) index per question.
+        """
+        found: Dict[QuestionKey, List[Tuple[int, int, bytes]]] = {key: [] for key in after_ids}
+        if not after_ids:
+            return found
+        v = values(
+            column("exam_id", String),
+            column("question_id", String),
+            column("after_id", Integer),
+            name="v",
+        ).data([(exam_id, question_id, after_id) for (exam_id, question_id), after_id in after_ids.items()])
+        result = await db.execute(
+            select(
+                AnswerSignature.exam_id,
+                AnswerSignature.question_id,
+                AnswerSignature.id,
+                AnswerSignature.student_id,
+                AnswerSignature.signature,
+            )
+            .join(v, (AnswerSignature.exam_id == v.c.exam_id) & (AnswerSignature.question_id == v.c.question_id))
+            .where(AnswerSignature.id > v.c.after_id)
+            .order_by(AnswerSignature.id)
+        )
+        for exam_id, question_id, row_id, student_id, signature in result.all():
+            found[(exam_id, question_id)].append((row_id, student_id, signature))
+        return found
+
+    @staticmethod
+    def _insert_known_students(rows: List[Dict[str, Any]]):
+        # One multi-row INSERT ... SELECT; rows of students that don't exist
+        # are skipped by the join instead of failing the FK for all of them.
+        v = values(
+            column("exam_id", String),
+            column("question_id", String),
+            column("student_id", Integer),
+            column("signature", LargeBinary),
+            name="v",
+        ).data([(r["exam_id"], r["question_id"], r["student_id"], r["signature"]) for r in rows])
+        return insert(AnswerSignature).from_select(
+            ["exam_id", "question_id", "student_id", "signature"],
+            select(v.c.exam_id, v.c.question_id, v.c.student_id, v.c.signature)
+            .join(User, User.id == v.c.student_id),
+        )
+
+    def create_many(self, db: Session, *, rows: List[Dict[str, Any]]) -> None:
+        """
+        Stores signatures (exam_id, question_id, student_id, signature dicts)
+        in one transaction.
+        """
+        if rows:
+            db.execute(self._insert_known_students(rows))
+            db.commit()
+
+    async def create_many_async(self, db: AsyncSession, *, rows: List[Dict[str, Any]]) -> None:
+        if rows:
+            await db.execute(self._insert_known_students(rows))
+            await db.commit()
+
+# Instantiate the CRUD object
+answer_signature = CRUDAnswerSignature()
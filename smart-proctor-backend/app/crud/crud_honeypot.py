@@ -0,0 +1,45 @@
+from typing import List
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.models.honeypot import HoneypotTrap
+from app.schemas.exam import TrapPhrase
+
+class CRUDHoneypotTrap(CRUDBase[HoneypotTrap, TrapPhrase, TrapPhrase]):
+    def get_by_exam(self, db: Session, *, exam_id: str) -> List[HoneypotTrap]:
+        return (
+            db.query(HoneypotTrap)
+            .filter(HoneypotTrap.exam_id == exam_id)
+            .order_by(HoneypotTrap.id)
+            .all()
+        )
+
+    async def get_by_exam_async(self, db: AsyncSession, *, exam_id: str) -> List[HoneypotTrap]:
+        result = await db.scalars(
+            select(HoneypotTrap)
+            .where(HoneypotTrap.exam_id == exam_id)
+            .order_by(HoneypotTrap.id)
+        )
+        return list(result.all())
+
+    def replace_for_exam(
+            self, db: Session, *, exam_id: str, traps: List[TrapPhrase]
+    ) -> List[HoneypotTrap]:
+        """
+        Atomically swaps the full trap dictionary of an exam.
+        """
+        db.execute(delete(HoneypotTrap).where(HoneypotTrap.exam_id == exam_id))
+        if traps:
+            db.execute(
+                insert(HoneypotTrap),
+                [
+                    {"exam_id": exam_id, "question_id": t.question_id, "phrase": t.phrase}
+                    for t in traps
+                ],
+            )
+        db.commit()
+        return self.get_by_exam(db, exam_id=exam_id)
+
+# Instantiate the CRUD object
+trap = CRUDHoneypotTrap(HoneypotTrap)
@@ -1,6 +1,16 @@
-from typing import List
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from sqlalchemy import Row, Select, func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core.metrics import count_violations
+from app.core.violation_events import violation_events
 from app.crud.base import CRUDBase
+from app.crud.crud_risk import risk
+from app.crud.crud_rollup import rollup
+from app.crud.pagination import (
+    Page, build_page, decode_cursor, parse_cursor_datetime, parse_cursor_int
+)
 from app.models.integrity import IntegrityViolation
 from app.schemas.exam import IntegrityCreate, IntegrityUpdate
 # You will need to ensure these Schemas exist in the next step
@@ -13,35 +23,250 @@ class CRUDIntegrity(CRUDBase[IntegrityViolation, IntegrityCreate, IntegrityUpdat
             student_id: int,
             violation_type: str,
             evidence_score: float,
-            metadata_log: str
+            metadata_log: str,
+            exam_id: Optional[str] = None
     ) -> IntegrityViolation:
         """
         Custom create method for system-generated violations.
         """
-        db_obj = IntegrityViolation(
-            student_id=student_id,
-            violation_type=violation_type,
-            evidence_score=evidence_score,
-            metadata_log=metadata_log
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        row = {
+            "student_id": student_id,
+            "violation_type": violation_type,
+            "evidence_score": evidence_score,
+            "metadata_log": metadata_log,
+            # Set here rather than by the server default, so the rollup
+            # bucket is known before the INSERT.
+            "timestamp": datetime.now(timezone.utc),
+        }
+        # RETURNING gives the id the feed announces (and the whole row).
+        db_obj = db.scalars(insert(IntegrityViolation).values(**row).returning(IntegrityViolation)).one()
+        row["exam_id"] = exam_id
+        rollup.apply(db, [row])
+        risk.apply(db, [row])
+        violation_events.stage(db, [row], [db_obj.id])
+        self._commit(db, [db_obj])
+        count_violations([row])
+        violation_events.committed([row], [db_obj.id])
         return db_obj
 
+    def create_many(self, db: Session, *, rows: List[Dict[str, Any]]) -> int:
+        """
+        Persists a batch of violations in a single transaction.
+        SQLAlchemy turns the executemany into multi-row INSERT ... VALUES
+        statements, so a batch costs one commit instead of one per row.
+        The violation rollup and the students' risk scores are updated in
+        the same transaction. Rows may carry an "exam_id" for the risk
+        score; the ORM bulk insert ignores keys that are not columns.
+        """
+        if not rows:
+            return 0
+        ids = db.scalars(self._insert_returning_ids(), rows).all()
+        rollup.apply(db, rows)
+        risk.apply(db, rows)
+        violation_events.stage(db, rows, ids)
+        db.commit()
+        count_violations(rows)
+        violation_events.committed(rows, ids)
+        return len(rows)
+
+    async def create_many_async(self, db: AsyncSession, *, rows: List[Dict[str, Any]]) -> int:
+        """
+        Async variant of `create_many`.
+        """
+        if not rows:
+            return 0
+        ids = (await db.scalars(self._insert_returning_ids(), rows)).all()
+        await rollup.apply_async(db, rows)
+        await risk.apply_async(db, rows)
+        await violation_events.stage_async(db, rows, ids)
+        await db.commit()
+        count_violations(rows)
+        violation_events.committed(rows, ids)
+        return len(rows)
+
+    @staticmethod
+    def _insert_returning_ids():
+        # Still one multi-row INSERT per batch; ids come back in row order.
+        return insert(IntegrityViolation).returning(IntegrityViolation.id, sort_by_parameter_order=True)
+
+    # ---------------------------------------------------------
+    # KEYSET PAGINATION (newest first)
+    # ---------------------------------------------------------
+    # Ordered on (timestamp DESC, id DESC); served by the composite indexes
+    # (timestamp, id), (student_id, timestamp, id) and
+    # (violation_type, timestamp, id).
+    #
+    # The table is range-partitioned on timestamp. Postgres scans partitions
+    # newest first and stops once the LIMIT is met, and the plain bounds
+    # below (cursor, since, until) let the planner skip partitions outright;
+    # the row comparison on (timestamp, id) alone does not prune.
+    def _log_page_stmt(
+            self,
+            *,
+            cursor: Optional[str],
+            limit: int,
+            violation_type: Optional[str] = None,
+            student_id: Optional[int] = None,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+    ) -> Select:
+        stmt = select(IntegrityViolation)
+        if violation_type is not None:
+            stmt = stmt.where(IntegrityViolation.violation_type == violation_type)
+        if student_id is not None:
+            stmt = stmt.where(IntegrityViolation.student_id == student_id)
+        if since is not None:
+            stmt = stmt.where(IntegrityViolation.timestamp >= since)
+        if until is not None:
+            stmt = stmt.where(IntegrityViolation.timestamp < until)
+        if cursor:
+            last_ts, last_id = decode_cursor(cursor, arity=2)
+            last_ts = parse_cursor_datetime(last_ts)
+            stmt = stmt.where(
+                IntegrityViolation.timestamp <= last_ts,
+                tuple_(IntegrityViolation.timestamp, IntegrityViolation.id)
+                < tuple_(last_ts, parse_cursor_int(last_id)),
+            )
+        return stmt.order_by(
+            IntegrityViolation.timestamp.desc(), IntegrityViolation.id.desc()
+        ).limit(limit + 1)
+
+    @staticmethod
+    def _log_key(obj: IntegrityViolation):
+        return (obj.timestamp, obj.id)
+
+    def get_page(
+            self,
+            db: Session,
+            *,
+            cursor: Optional[str] = None,
+            limit: int = 100,
+            violation_type: Optional[str] = None,
+            student_id: Optional[int] = None,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+    ) -> Page[IntegrityViolation]:
+        stmt = self._log_page_stmt(
+            cursor=cursor, limit=limit, violation_type=violation_type, student_id=student_id,
+            since=since, until=until,
+        )
+        return build_page(list(db.scalars(stmt).all()), limit, key_of=self._log_key)
+
+    async def get_page_async(
+            self,
+            db: AsyncSession,
+            *,
+            cursor: Optional[str] = None,
+            limit: int = 100,
+            violation_type: Optional[str] = None,
+            student_id: Optional[int] = None,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+    ) -> Page[IntegrityViolation]:
+        stmt = self._log_page_stmt(
+            cursor=cursor, limit=limit, violation_type=violation_type, student_id=student_id,
+            since=since, until=until,
+        )
+        rows = list((await db.scalars(stmt)).all())
+        return build_page(rows, limit, key_of=self._log_key)
+
     def get_by_student(
-            self, db: Session, *, student_id: int, skip: int = 0, limit: int = 100
+            self,
+            db: Session,
+            *,
+            student_id: int,
+            cursor: Optional[str] = None,
+            limit: int = 100,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+    ) -> Page[IntegrityViolation]:
+        """
+        Get a student's violations, newest first. `since` / `until` restrict
+        the scan to the partitions of that window.
+        """
+        return self.get_page(
+            db, cursor=cursor, limit=limit, student_id=student_id, since=since, until=until
+        )
+
+    # ---------------------------------------------------------
+    # LIVE FEED (ids ascending)
+    # ---------------------------------------------------------
+    # `id > after_id` uses each partition's primary key (id, timestamp).
+    # Ids are assigned at insert, not at commit, so a row committed late
+    # can carry a smaller id than one already delivered.
+    async def get_after_async(
+            self,
+            db: AsyncSession,
+            *,
+            after_id: int,
+            limit: int,
+            violation_type: Optional[str] = None,
+            student_id: Optional[int] = None,
     ) -> List[IntegrityViolation]:
         """
-        Get all violations for a specific student.
+        Violations with an id above `after_id`, oldest first (feed resume).
         """
-        return (
-            db.query(IntegrityViolation)
-            .filter(IntegrityViolation.student_id == student_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        stmt = select(IntegrityViolation).where(IntegrityViolation.id > after_id)
+        if violation_type is not None:
+            stmt = stmt.where(IntegrityViolation.violation_type == violation_type)
+        if student_id is not None:
+            stmt = stmt.where(IntegrityViolation.student_id == student_id)
+        return list((await db.scalars(stmt.order_by(IntegrityViolation.id).limit(limit))).all())
+
+    async def get_by_ids_async(
+            self, db: AsyncSession, *, ids: List[int], since: datetime
+    ) -> List[IntegrityViolation]:
+        """
+        The given violations, oldest first; none is older than `since`.
+        """
+        stmt = select(IntegrityViolation).where(
+            IntegrityViolation.id.in_(ids), IntegrityViolation.timestamp >= since
         )
+        return list((await db.scalars(stmt.order_by(IntegrityViolation.id))).all())
+
+    async def max_id_async(self, db: AsyncSession) -> Optional[int]:
+        return await db.scalar(select(func.max(IntegrityViolation.id)))
+
+    # ---------------------------------------------------------
+    # FULL EXPORT (server-side cursor)
+    # ---------------------------------------------------------
+    # Plain column tuples, not ORM objects: nothing enters the identity map,
+    # and the driver fetches `chunk_size` rows per round trip from a named
+    # cursor, so memory stays flat however large the export is.
+    EXPORT_COLUMNS = (
+        IntegrityViolation.id,
+        IntegrityViolation.timestamp,
+        IntegrityViolation.student_id,
+        IntegrityViolation.violation_type,
+        IntegrityViolation.evidence_score,
+        IntegrityViolation.metadata_log,
+    )
+
+    async def stream_async(
+            self,
+            db: AsyncSession,
+            *,
+            chunk_size: int = 5000,
+            violation_type: Optional[str] = None,
+            student_id: Optional[int] = None,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Yields the matching violations in id order, `chunk_size` rows at a time.
+        """
+        stmt = select(*self.EXPORT_COLUMNS).order_by(IntegrityViolation.id)
+        if violation_type is not None:
+            stmt = stmt.where(IntegrityViolation.violation_type == violation_type)
+        if student_id is not None:
+            stmt = stmt.where(IntegrityViolation.student_id == student_id)
+        if since is not None:
+            stmt = stmt.where(IntegrityViolation.timestamp >= since)
+        if until is not None:
+            stmt = stmt.where(IntegrityViolation.timestamp < until)
+        result = await db.stream(stmt.execution_options(yield_per=chunk_size))
+        async for chunk in result.partitions():
+            yield chunk
 
 # Instantiate the CRUD object
 integrity = CRUDIntegrity(IntegrityViolation)
\ No newline at end of file
@@ -0,0 +1,247 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Float, Integer, LargeBinary, column, delete, func, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.keystroke import KeystrokeProfile, KeystrokeUpdateKey
+from app.models.user import User
+from app.core.keystroke_stats import (
+    DWELL_BIN_MS, FLIGHT_BIN_MS, KeystrokeStats, RunningStats,
+    histogram_from_bytes, histogram_to_bytes,
+)
+
+class CRUDKeystrokeProfile:
+    """
+    Persistence of keystroke profiles. Writes are always set-based: one
+    statement per step for the whole batch of users, never one per user.
+    """
+
+    @staticmethod
+    def to_stats(obj: KeystrokeProfile) -> KeystrokeStats:
+        return KeystrokeStats(
+            RunningStats(
+                FLIGHT_BIN_MS, obj.flight_count, obj.flight_mean, obj.flight_m2,
+                histogram_from_bytes(obj.flight_hist),
+            ),
+            RunningStats(
+                DWELL_BIN_MS, obj.dwell_count, obj.dwell_mean, obj.dwell_m2,
+                histogram_from_bytes(obj.dwell_hist),
+            ),
+        )
+
+    async def get_async(self, db: AsyncSession, *, user_id: int) -> Optional[KeystrokeProfile]:
+        return await db.get(KeystrokeProfile, user_id)
+
+    def _lock_rows(self, db: Session, user_ids: List[int]) -> List[KeystrokeProfile]:
+        """
+        Creates missing profile rows for existing users, then locks and loads
+        all of them in user_id order, so concurrent batches from other
+        workers serialize per user instead of deadlocking. Users that don't
+        exist (any more) are absent from the result.
+        """
+        user_ids = sorted(user_ids)
+        db.execute(
+            pg_insert(KeystrokeProfile)
+            .from_select(["user_id"], select(User.id).where(User.id.in_(user_ids)))
+            .on_conflict_do_nothing(index_elements=[KeystrokeProfile.user_id])
+        )
+        current = db.scalars(
+            select(KeystrokeProfile)
+            .where(KeystrokeProfile.user_id.in_(user_ids))
+            .order_by(KeystrokeProfile.user_id)
+            .with_for_update()
+        ).all()
+        return list(current)
+
+    def _lock_profiles(self, db: Session, user_ids: List[int]) -> Dict[int, KeystrokeStats]:
+        return {obj.user_id: self.to_stats(obj) for obj in self._lock_rows(db, user_ids)}
+
+    def merge_many(self, db: Session, *, deltas: Dict[int, KeystrokeStats]) -> int:
+        """
+        Adds per-user deltas to the stored profiles in one transaction and
+        mirrors the flight mean into users.typing_baseline. Deltas for
+        unknown users are dropped. Returns the number of profiles written.
+        """
+        if not deltas:
+            return 0
+        merged = self._lock_profiles(db, list(deltas))
+        for user_id, stats in merged.items():
+            stats.merge(deltas[user_id])
+        self.write_many(db, profiles=merged)
+        db.commit()
+        return len(merged)
+
+    def merge_batch(
+            self,
+            db: Session,
+            *,
+            items: List[Tuple[Optional[str], int, KeystrokeStats]],
+    ) -> List[str]:
+        """
+        Applies (idempotency_key, user_id, delta) items in one transaction
+        and returns a status per item, in order:
+          "applied"      - merged into the profile
+          "duplicate"    - key seen before (in this batch or an earlier one)
+          "unknown_user" - no such user
+        Keys are recorded in the same transaction as the profile write, so a
+        retried batch is never applied twice and a failed one never counts.
+        """
+        if not items:
+            return []
+        profiles = self._lock_profiles(db, list({user_id for _, user_id, _ in items}))
+
+        statuses = ["unknown_user" if user_id not in profiles else "" for _, user_id, _ in items]
+        first_by_key: Dict[str, int] = {}
+        for i, (key, user_id, _) in enumerate(items):
+            if key is None or statuses[i]:
+                continue
+            if key in first_by_key:
+                statuses[i] = "duplicate"
+            else:
+                first_by_key[key] = i
+        if first_by_key:
+            new_keys = set(db.scalars(
+                pg_insert(KeystrokeUpdateKey)
+                .values([
+                    {"key": key, "user_id": items[i][1]}
+                    for key, i in sorted(first_by_key.items())
+                ])
+                .on_conflict_do_nothing(index_elements=[KeystrokeUpdateKey.key])
+                .returning(KeystrokeUpdateKey.key)
+            ).all())
+            for key, i in first_by_key.items():
+                if key not in new_keys:
+                    statuses[i] = "duplicate"
+
+        touched: Dict[int, KeystrokeStats] = {}
+        for i, (_, user_id, delta) in enumerate(items):
+            if statuses[i]:
+                continue
+            statuses[i] = "applied"
+            profiles[user_id].merge(delta)
+            touched[user_id] = profiles[user_id]
+        self.write_many(db, profiles=touched)
+        db.commit()
+        return statuses
+
+    # ---------------------------------------------------------
+    # WINDOW FEATURE MODELS
+    # ---------------------------------------------------------
+    # Stored as opaque (count, mean bytes, m2 bytes); the math lives in
+    # services.biometrics.
+    def get_feature_models(
+            self, db: Session, *, user_ids: List[int]
+    ) -> Dict[int, Tuple[int, Optional[bytes], Optional[bytes]]]:
+        rows = db.execute(
+            select(
+                KeystrokeProfile.user_id,
+                KeystrokeProfile.feature_count,
+                KeystrokeProfile.feature_mean,
+                KeystrokeProfile.feature_m2,
+            ).where(KeystrokeProfile.user_id.in_(user_ids))
+        ).all()
+        return {user_id: (count, mean, m2) for user_id, count, mean, m2 in rows}
+
+    def lock_feature_models(
+            self, db: Session, *, user_ids: List[int]
+    ) -> Dict[int, Tuple[int, Optional[bytes], Optional[bytes]]]:
+        """
+        Like `get_feature_models`, but creates and row-locks the profiles.
+        Follow with `write_feature_models` and commit.
+        """
+        return {
+            obj.user_id: (obj.feature_count, obj.feature_mean, obj.feature_m2)
+            for obj in self._lock_rows(db, user_ids)
+        }
+
+    def write_feature_models(
+            self, db: Session, *, models: Dict[int, Tuple[int, bytes, bytes]]
+    ) -> None:
+        if not models:
+            return
+        v = values(
+            column("user_id", Integer),
+            column("feature_count", Integer),
+            column("feature_mean", LargeBinary),
+            column("feature_m2", LargeBinary),
+            name="v",
+        ).data([(user_id, *model) for user_id, model in sorted(models.items())])
+        db.execute(
+            update(KeystrokeProfile)
+            .where(KeystrokeProfile.user_id == v.c.user_id)
+            .values(
+                feature_count=v.c.feature_count,
+                feature_mean=v.c.feature_mean,
+                feature_m2=v.c.feature_m2,
+                updated_at=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def prune_update_keys(self, db: Session, *, older_than: datetime) -> int:
+        """
+        Forgets idempotency keys recorded before `older_than`.
+        """
+        result = db.execute(
+            delete(KeystrokeUpdateKey).where(KeystrokeUpdateKey.created_at < older_than)
+        )
+        db.commit()
+        return result.rowcount
+
+    def write_many(self, db: Session, *, profiles: Dict[int, KeystrokeStats]) -> None:
+        """
+        Overwrites stored profiles (which must exist) with `profiles`.
+        Does not commit.
+        """
+        if not profiles:
+            return
+        rows = [
+            (
+                user_id,
+                s.flight.count, s.flight.mean, s.flight.m2, histogram_to_bytes(s.flight.hist),
+                s.dwell.count, s.dwell.mean, s.dwell.m2, histogram_to_bytes(s.dwell.hist),
+            )
+            for user_id, s in sorted(profiles.items())
+        ]
+        v = values(
+            column("user_id", Integer),
+            column("flight_count", Integer),
+            column("flight_mean", Float),
+            column("flight_m2", Float),
+            column("flight_hist", LargeBinary),
+            column("dwell_count", Integer),
+            column("dwell_mean", Float),
+            column("dwell_m2", Float),
+            column("dwell_hist", LargeBinary),
+            name="v",
+        ).data(rows)
+        db.execute(
+            update(KeystrokeProfile)
+            .where(KeystrokeProfile.user_id == v.c.user_id)
+            .values(
+                flight_count=v.c.flight_count,
+                flight_mean=v.c.flight_mean,
+                flight_m2=v.c.flight_m2,
+                flight_hist=v.c.flight_hist,
+                dwell_count=v.c.dwell_count,
+                dwell_mean=v.c.dwell_mean,
+                dwell_m2=v.c.dwell_m2,
+                dwell_hist=v.c.dwell_hist,
+                updated_at=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # Keep the legacy single-number baseline in sync.
+        baselines = [(uid, s.flight.mean) for uid, s in sorted(profiles.items()) if s.flight.count]
+        if baselines:
+            b = values(column("id", Integer), column("typing_baseline", Float), name="b").data(baselines)
+            db.execute(
+                update(User)
+                .where(User.id == b.c.id)
+                .values(typing_baseline=b.c.typing_baseline)
+                .execution_options(synchronize_session=False)
+            )
+
+# Instantiate the CRUD object
+keystroke = CRUDKeystrokeProfile()
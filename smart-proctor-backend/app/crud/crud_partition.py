@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+class Partition(NamedTuple):
+    name: str
+    start: datetime  # inclusive
+    end: datetime    # exclusive
+
+class CRUDPartition:
+    """
+    Maintains the range partitions (on a timestamptz column) of one
+    partitioned table: one partition per day or per month, in UTC.
+
+    `ensure` creates the partitions from the current period up to `ahead`
+    periods in the future, skipping any range an existing partition already
+    covers (so a switch between daily and monthly partitions is safe).
+    `expire` detaches or drops partitions that ended before the retention
+    cutoff; the partition holding "now" is never touched.
+
+    Rows outside every range land in the DEFAULT partition (`<table>_default`,
+    if it exists). `ensure` moves the ones in a range it creates into the
+    new partition, in the same transaction.
+    """
+
+    INTERVALS = ("day", "month")
+
+    def __init__(self, table: str, interval: str):
+        if interval not in self.INTERVALS:
+            raise ValueError(f"Partition interval must be one of {self.INTERVALS}")
+        self.table = table
+        self.interval = interval
+        self.default = f"{table}_default"
+
+    def period_of(self, ts: datetime) -> datetime:
+        ts = ts.astimezone(timezone.utc)
+        if self.interval == "day":
+            return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+        return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    def next_period(self, start: datetime) -> datetime:
+        if self.interval == "day":
+            return start + timedelta(days=1)
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+
+    def name_for(self, start: datetime) -> str:
+        fmt = "%Y_%m_%d" if self.interval == "day" else "%Y_%m"
+        return f"{self.table}_p{start.strftime(fmt)}"
+
+    def list(self, db: Session) -> List[Partition]:
+        """
+        Attached range partitions, oldest first. Bounds are read back from
+        the catalog, so partitions created by the migration count as well.
+        """
+        rows = db.execute(
+            text(
+                "SELECT c.relname, b[1]::timestamptz, b[2]::timestamptz "
+                "FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "CROSS JOIN LATERAL regexp_match("
+                "  pg_get_expr(c.relpartbound, c.oid),"
+                "  'FROM \\(''([^'']+)''\\) TO \\(''([^'']+)''\\)'"
+                ") AS m(b) "
+                "WHERE p.relname = :table AND b IS NOT NULL "
+                "ORDER BY 2"
+            ),
+            {"table": self.table},
+        ).all()
+        return [Partition(name, start, end) for name, start, end in rows]
+
+    def _lock(self, db: Session) -> None:
+        # Serializes maintenance runs (cron overlapping a deploy).
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {"table": self.table})
+
+    def ensure(self, db: Session, *, ahead: int, now: Optional[datetime] = None) -> List[str]:
+        """
+        Creates missing partitions for the current period and `ahead` more.
+        Returns the names created.
+        """
+        self._lock(db)
+        existing = self.list(db)
+        start = self.period_of(now or datetime.now(timezone.utc))
+        created = []
+        for _ in range(ahead + 1):
+            end = self.next_period(start)
+            if not any(p.start < end and start < p.end for p in existing):
+                created.append(self._create(db, start, end))
+            start = end
+        db.commit()
+        return created
+
+    def _create(self, db: Session, start: datetime, end: datetime) -> str:
+        name = self.name_for(start)
+        bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        has_default = db.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": self.default})
+        if not has_default or not db.scalar(
+            text(f'SELECT EXISTS (SELECT 1 FROM "{self.default}" WHERE timestamp >= :start AND timestamp < :end)'),
+            {"start": start, "end": end},
+        ):
+            db.execute(text(f'CREATE TABLE "{name}" PARTITION OF "{self.table}" {bounds}'))
+            return name
+        # Postgres refuses a partition for a range the default partition
+        # holds rows of: build it standalone with those rows, then attach.
+        db.execute(text(f'CREATE TABLE "{name}" (LIKE "{self.table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+        db.execute(
+            text(
+                f'WITH moved AS (DELETE FROM "{self.default}" WHERE timestamp >= :start AND timestamp < :end '
+                f'RETURNING *) INSERT INTO "{name}" SELECT * FROM moved'
+            ),
+            {"start": start, "end": end},
+        )
+        db.execute(text(f'ALTER TABLE "{self.table}" ATTACH PARTITION "{name}" {bounds}'))
+        return name
+
+    def runway(self, db: Session, *, now: Optional[datetime] = None) -> timedelta:
+        """
+        How long from `now` until the first timestamp without a range
+        partition (zero when even `now` has none).
+        """
+        now = now or datetime.now(timezone.utc)
+        covered_until = now
+        for p in self.list(db):
+            if p.start <= covered_until < p.end:
+                covered_until = p.end
+        return covered_until - now
+
+    def default_rows(self, db: Session) -> int:
+        """
+        Rows in the DEFAULT partition, i.e. outside every range partition.
+        """
+        if not db.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": self.default}):
+            return 0
+        return db.scalar(text(f'SELECT count(*) FROM "{self.default}"'))
+
+    def expire(
+            self,
+            db: Session,
+            *,
+            retention_days: int,
+            action: str = "detach",
+            now: Optional[datetime] = None,
+    ) -> List[str]:
+        """
+        Detaches (kept as standalone tables, e.g. for archiving) or drops
+        every partition whose range ended more than `retention_days` ago.
+        Returns the names affected.
+        """
+        if action not in ("detach", "drop"):
+            raise ValueError("action must be 'detach' or 'drop'")
+        if retention_days < 1:
+            raise ValueError("retention_days must be at least 1")
+        self._lock(db)
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+        expired = [p for p in self.list(db) if p.end <= cutoff]
+        for p in expired:
+            if action == "drop":
+                db.execute(text(f'DROP TABLE "{p.name}"'))
+            else:
+                db.execute(text(f'ALTER TABLE "{self.table}" DETACH PARTITION "{p.name}"'))
+        db.commit()
+        return [p.name for p in expired]
+
+# Instantiate the CRUD object
+partition = CRUDPartition("integrity_violations", settings.VIOLATION_PARTITION_INTERVAL)
@@ -0,0 +1,162 @@
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import Select, and_, case, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.risk import StudentRisk
+from app.models.user import User
+
+# exp() of anything below this underflows in Postgres (an error, not 0).
+_MIN_EXPONENT = -700.0
+
+class CRUDRisk:
+    """
+    Incremental maintenance and reads of `student_risk`.
+
+    risk(t) = sum over events of weight[type] * evidence * 2^(-(t - t_event) / half_life)
+
+    `apply`/`apply_async` are called by crud.integrity inside the same
+    transaction as the violation insert. A batch is collapsed into one
+    delta per student, which the upsert adds to the stored score after
+    decaying both to the later of their timestamps.
+    """
+
+    def __init__(self, half_life_seconds: float, weights: Dict[str, float], default_weight: float):
+        self.decay_rate = math.log(2) / half_life_seconds
+        self.weights = weights
+        self.default_weight = default_weight
+
+    def weight_of(self, violation_type: str) -> float:
+        return self.weights.get(violation_type, self.default_weight)
+
+    def rank_key(self, score: float, ts: datetime) -> float:
+        return math.log(score) + self.decay_rate * ts.timestamp()
+
+    def decayed(self, score: float, since: datetime, now: Optional[datetime] = None) -> float:
+        elapsed = ((now or datetime.now(timezone.utc)) - since).total_seconds()
+        return score * math.exp(-self.decay_rate * max(elapsed, 0.0))
+
+    # ---------------------------------------------------------
+    # WRITE PATH
+    # ---------------------------------------------------------
+    def _deltas(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        One row per student: the batch's contribution as of its newest
+        event. Events with no weight or zero evidence are skipped; a
+        missing evidence_score counts as 1.
+        """
+        events: Dict[int, List[Any]] = {}
+        for row in rows:
+            score = row.get("evidence_score")
+            points = self.weight_of(row["violation_type"]) * (1.0 if score is None else score)
+            if points <= 0:
+                continue
+            ts = row.get("timestamp") or datetime.now(timezone.utc)
+            if ts.tzinfo is None:
+                ts = ts.replace(tzinfo=timezone.utc)
+            events.setdefault(row["student_id"], []).append((ts, points, row.get("exam_id")))
+
+        deltas = []
+        # Sorted so concurrent batches lock risk rows in the same order.
+        for student_id in sorted(events):
+            student_events = sorted(events[student_id], key=lambda e: e[0])
+            latest = student_events[-1][0]
+            exam_id = next((e[2] for e in reversed(student_events) if e[2] is not None), None)
+            score = sum(points * math.exp(-self.decay_rate * (latest - ts).total_seconds())
+                        for ts, points, _ in student_events)
+            deltas.append({
+                "student_id": student_id,
+                "exam_id": exam_id,
+                "score": score,
+                "updated_at": latest,
+                "rank_key": self.rank_key(score, latest),
+                "violation_count": len(student_events),
+            })
+        return deltas
+
+    def _upsert_stmt(self, rows: Iterable[Dict[str, Any]]):
+        deltas = self._deltas(rows)
+        if not deltas:
+            return None
+
+        stmt = pg_insert(StudentRisk).values(deltas)
+        new = stmt.excluded
+        updated_at = func.greatest(StudentRisk.updated_at, new.updated_at)
+
+        def decay_to_latest(ts):
+            exponent = -self.decay_rate * func.extract("epoch", updated_at - ts)
+            return func.exp(func.greatest(exponent, _MIN_EXPONENT))
+
+        score = StudentRisk.score * decay_to_latest(StudentRisk.updated_at) + new.score * decay_to_latest(new.updated_at)
+        rank_key = func.ln(score) + self.decay_rate * func.extract("epoch", updated_at)
+        # A submission to another exam starts over; exam-less events keep the exam.
+        restart = and_(new.exam_id.is_not(None), new.exam_id.is_distinct_from(StudentRisk.exam_id))
+
+        return stmt.on_conflict_do_update(
+            index_elements=[StudentRisk.student_id],
+            set_={
+                "exam_id": func.coalesce(new.exam_id, StudentRisk.exam_id),
+                "score": case((restart, new.score), else_=score),
+                "updated_at": case((restart, new.updated_at), else_=updated_at),
+                "rank_key": case((restart, new.rank_key), else_=rank_key),
+                "violation_count": case(
+                    (restart, new.violation_count),
+                    else_=StudentRisk.violation_count + new.violation_count,
+                ),
+            },
+        )
+
+    def apply(self, db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Adds `rows` (violation dicts, optionally carrying an exam_id) to
+        the students' risk. Does not commit.
+        """
+        stmt = self._upsert_stmt(rows)
+        if stmt is not None:
+            db.execute(stmt)
+
+    async def apply_async(self, db: AsyncSession, rows: Iterable[Dict[str, Any]]) -> None:
+        stmt = self._upsert_stmt(rows)
+        if stmt is not None:
+            await db.execute(stmt)
+
+    # ---------------------------------------------------------
+    # READ PATH
+    # ---------------------------------------------------------
+    def _top_stmt(self, *, exam_id: str, limit: int) -> Select:
+        return (
+            select(StudentRisk, User.email, User.full_name)
+            .join(User, User.id == StudentRisk.student_id)
+            .where(StudentRisk.exam_id == exam_id)
+            .order_by(StudentRisk.rank_key.desc(), StudentRisk.student_id)
+            .limit(limit)
+        )
+
+    async def top_async(self, db: AsyncSession, *, exam_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        The `limit` riskiest students of an exam, riskiest first, with
+        their score decayed to now.
+        """
+        now = datetime.now(timezone.utc)
+        result = await db.execute(self._top_stmt(exam_id=exam_id, limit=limit))
+        return [
+            {
+                "student_id": risk.student_id,
+                "email": email,
+                "full_name": full_name,
+                "risk_score": self.decayed(risk.score, risk.updated_at, now),
+                "violation_count": risk.violation_count,
+                "last_event_at": risk.updated_at,
+            }
+            for risk, email, full_name in result.all()
+        ]
+
+# Instantiate the CRUD object
+risk = CRUDRisk(
+    half_life_seconds=settings.RISK_HALF_LIFE_SECONDS,
+    weights=settings.RISK_WEIGHTS,
+    default_weight=settings.RISK_DEFAULT_WEIGHT,
+)
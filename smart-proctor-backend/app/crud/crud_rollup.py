@@ -0,0 +1,211 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Select, delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.integrity import IntegrityViolation
+from app.models.rollup import ViolationRollup
+from app.models.user import User
+
+RollupKey = Tuple[datetime, str, int]
+
+class CRUDRollup:
+    """
+    Incremental maintenance and reads of `violation_rollups`.
+
+    `apply`/`apply_async` are called by crud.integrity inside the same
+    transaction as the violation insert, so the rollup commits (or rolls
+    back) together with the raw rows.
+    """
+
+    def __init__(self, bucket_seconds: int):
+        self.bucket_seconds = bucket_seconds
+
+    def bucket_of(self, ts: Optional[datetime]) -> datetime:
+        if ts is None:
+            ts = datetime.now(timezone.utc)
+        elif ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        epoch = int(ts.timestamp())
+        return datetime.fromtimestamp(epoch - epoch % self.bucket_seconds, timezone.utc)
+
+    # ---------------------------------------------------------
+    # WRITE PATH
+    # ---------------------------------------------------------
+    def _upsert_stmt(self, rows: Iterable[Dict[str, Any]]):
+        """
+        Collapses a batch into one delta per (bucket, type, student) and
+        returns a single multi-row INSERT ... ON CONFLICT DO UPDATE that adds
+        the deltas. Keys are sorted so concurrent batches lock rollup rows in
+        the same order and can't deadlock each other.
+        """
+        deltas: Dict[RollupKey, List[float]] = {}
+        for row in rows:
+            key = (self.bucket_of(row.get("timestamp")), row["violation_type"], row["student_id"])
+            delta = deltas.get(key)
+            if delta is None:
+                delta = deltas[key] = [0, 0.0, 0]
+            delta[0] += 1
+            score = row.get("evidence_score")
+            if score is not None:
+                delta[1] += score
+                delta[2] += 1
+        if not deltas:
+            return None
+
+        values = [
+            {
+                "bucket_start": bucket,
+                "violation_type": violation_type,
+                "student_id": student_id,
+                "violation_count": count,
+                "score_sum": score_sum,
+                "scored_count": scored,
+            }
+            for (bucket, violation_type, student_id), (count, score_sum, scored) in sorted(deltas.items())
+        ]
+        stmt = pg_insert(ViolationRollup).values(values)
+        return stmt.on_conflict_do_update(
+            index_elements=[
+                ViolationRollup.bucket_start,
+                ViolationRollup.violation_type,
+                ViolationRollup.student_id,
+            ],
+            set_={
+                "violation_count": ViolationRollup.violation_count + stmt.excluded.violation_count,
+                "score_sum": ViolationRollup.score_sum + stmt.excluded.score_sum,
+                "scored_count": ViolationRollup.scored_count + stmt.excluded.scored_count,
+            },
+        )
+
+    def apply(self, db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Adds `rows` (violation dicts) to the rollup. Does not commit.
+        """
+        stmt = self._upsert_stmt(rows)
+        if stmt is not None:
+            db.execute(stmt)
+
+    async def apply_async(self, db: AsyncSession, rows: Iterable[Dict[str, Any]]) -> None:
+        stmt = self._upsert_stmt(rows)
+        if stmt is not None:
+            await db.execute(stmt)
+
+    def rebuild(self, db: Session, *, start: datetime, end: datetime) -> int:
+        """
+        Recomputes every bucket in [start, end) from integrity_violations.
+        Both bounds are floored to bucket boundaries. Run it for closed
+        buckets only: rows inserted concurrently into a bucket being rebuilt
+        may be counted twice. Returns the number of rollup rows written.
+        """
+        start, end = self.bucket_of(start), self.bucket_of(end)
+        ts = IntegrityViolation.timestamp
+        bucket = func.to_timestamp(
+            func.floor(func.extract("epoch", ts) / self.bucket_seconds) * self.bucket_seconds
+        )
+        source = (
+            select(
+                bucket,
+                IntegrityViolation.violation_type,
+                IntegrityViolation.student_id,
+                func.count(),
+                func.coalesce(func.sum(IntegrityViolation.evidence_score), 0.0),
+                func.count(IntegrityViolation.evidence_score),
+            )
+            .where(ts >= start, ts < end)
+            .group_by(bucket, IntegrityViolation.violation_type, IntegrityViolation.student_id)
+        )
+        db.execute(
+            delete(ViolationRollup).where(
+                ViolationRollup.bucket_start >= start, ViolationRollup.bucket_start < end
+            )
+        )
+        written = db.execute(
+            pg_insert(ViolationRollup)
+            .from_select(
+                [
+                    "bucket_start", "violation_type", "student_id",
+                    "violation_count", "score_sum", "scored_count",
+                ],
+                source,
+            )
+            .returning(ViolationRollup.bucket_start)
+        ).all()
+        db.commit()
+        return len(written)
+
+    # ---------------------------------------------------------
+    # READ PATH
+    # ---------------------------------------------------------
+    # Both queries range-scan the primary key from `since`, so their cost
+    # grows with the number of (bucket, type, student) groups in the window
+    # and not with the number of raw violations. `since` is floored to its
+    # bucket, i.e. results have bucket resolution.
+    def _summary_stmt(self, *, since: datetime, violation_type: Optional[str]) -> Select:
+        stmt = (
+            select(
+                ViolationRollup.violation_type,
+                func.sum(ViolationRollup.violation_count).label("count"),
+                func.count(func.distinct(ViolationRollup.student_id)).label("students"),
+                (
+                    func.sum(ViolationRollup.score_sum)
+                    / func.nullif(func.sum(ViolationRollup.scored_count), 0)
+                ).label("avg_evidence_score"),
+            )
+            .where(ViolationRollup.bucket_start >= self.bucket_of(since))
+            .group_by(ViolationRollup.violation_type)
+            .order_by(func.sum(ViolationRollup.violation_count).desc())
+        )
+        if violation_type is not None:
+            stmt = stmt.where(ViolationRollup.violation_type == violation_type)
+        return stmt
+
+    def _top_offenders_stmt(
+            self, *, since: datetime, limit: int, violation_type: Optional[str]
+    ) -> Select:
+        totals = (
+            select(
+                ViolationRollup.student_id,
+                func.sum(ViolationRollup.violation_count).label("violation_count"),
+                (
+                    func.sum(ViolationRollup.score_sum)
+                    / func.nullif(func.sum(ViolationRollup.scored_count), 0)
+                ).label("avg_evidence_score"),
+            )
+            .where(ViolationRollup.bucket_start >= self.bucket_of(since))
+            .group_by(ViolationRollup.student_id)
+            .order_by(func.sum(ViolationRollup.violation_count).desc(), ViolationRollup.student_id)
+            .limit(limit)
+        )
+        if violation_type is not None:
+            totals = totals.where(ViolationRollup.violation_type == violation_type)
+        totals = totals.subquery()
+        # Join users only for the final N rows.
+        return (
+            select(totals, User.email, User.full_name)
+            .join(User, User.id == totals.c.student_id)
+            .order_by(totals.c.violation_count.desc(), totals.c.student_id)
+        )
+
+    async def summary_async(
+            self, db: AsyncSession, *, since: datetime, violation_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        result = await db.execute(self._summary_stmt(since=since, violation_type=violation_type))
+        return [dict(row) for row in result.mappings()]
+
+    async def top_offenders_async(
+            self,
+            db: AsyncSession,
+            *,
+            since: datetime,
+            limit: int = 10,
+            violation_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        stmt = self._top_offenders_stmt(since=since, limit=limit, violation_type=violation_type)
+        result = await db.execute(stmt)
+        return [dict(row) for row in result.mappings()]
+
+# Instantiate the CRUD object
+rollup = CRUDRollup(settings.VIOLATION_ROLLUP_BUCKET_SECONDS)
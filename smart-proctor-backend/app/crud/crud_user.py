@@ -1,6 +1,11 @@
 from typing import Any, Dict, Optional, Union
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.security import get_password_hash, verify_password
+from app.core.principal_cache import principal_cache
+from app.core.security import (
+    get_password_hash, get_password_hash_async, verify_password, verify_password_async,
+)
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.student import StudentCreate, StudentUpdate
@@ -10,21 +15,36 @@ class CRUDUser(CRUDBase[User, StudentCreate, StudentUpdate]):
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
 
+    async def get_by_email_async(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        return await db.scalar(select(User).where(User.email == email))
+
+    async def exists_async(self, db: AsyncSession, *, id: int) -> bool:
+        return await db.scalar(select(exists().where(User.id == id)))
+
     def create(self, db: Session, *, obj_in: StudentCreate) -> User:
         """
         Overrides the standard create to handle password hashing.
         """
-        db_obj = User(
-            email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
-            full_name=obj_in.full_name,
-            is_superuser=obj_in.is_superuser,
-            is_active=True
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return super().create(db, obj_in={
+            "email": obj_in.email,
+            "hashed_password": get_password_hash(obj_in.password),
+            "full_name": obj_in.full_name,
+            "is_superuser": obj_in.is_superuser,
+            "is_active": True,
+        })
+
+    async def create_async(self, db: AsyncSession, *, obj_in: StudentCreate) -> User:
+        # End the read transaction (e.g. the caller's email check) so the
+        # pooled connection goes back while bcrypt runs.
+        await db.commit()
+        hashed_password = await get_password_hash_async(obj_in.password)
+        return await super().create_async(db, obj_in={
+            "email": obj_in.email,
+            "hashed_password": hashed_password,
+            "full_name": obj_in.full_name,
+            "is_superuser": obj_in.is_superuser,
+            "is_active": True,
+        })
 
     def update(
             self,
@@ -47,7 +67,45 @@ class CRUDUser(CRUDBase[User, StudentCreate, StudentUpdate]):
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
 
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        if self._update_stmt(db_obj, update_data) is not None:
+            # Cached principals may carry the old email / flags: other workers
+            # drop them when the UPDATE commits, this one right after.
+            principal_cache.stage_invalidation(db, db_obj.id)
+        user = super().update(db, db_obj=db_obj, obj_in=update_data)
+        principal_cache.invalidate_user(user.id)
+        return user
+
+    async def update_async(
+            self,
+            db: AsyncSession,
+            *,
+            db_obj: User,
+            obj_in: Union[StudentUpdate, Dict[str, Any]]
+    ) -> User:
+        """
+        Async variant of `update`; a new password is hashed on the bcrypt
+        pool with no DB connection held.
+        """
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+
+        if "password" in update_data:
+            await db.commit()
+            update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
+
+        if self._update_stmt(db_obj, update_data) is not None:
+            await principal_cache.stage_invalidation_async(db, db_obj.id)
+        user = await super().update_async(db, db_obj=db_obj, obj_in=update_data)
+        principal_cache.invalidate_user(user.id)
+        return user
+
+    def remove(self, db: Session, *, id: int) -> User:
+        principal_cache.stage_invalidation(db, id)
+        user = super().remove(db, id=id)
+        principal_cache.invalidate_user(id)
+        return user
 
     def authenticate(
             self, db: Session, *, email: str, password: str
@@ -63,6 +121,24 @@ class CRUDUser(CRUDBase[User, StudentCreate, StudentUpdate]):
             return None
         return user
 
+    async def authenticate_async(
+            self, db: AsyncSession, *, email: str, password: str
+    ) -> Optional[User]:
+        """
+        Async variant of `authenticate`.
+        bcrypt is CPU-bound, so it runs on the dedicated hashing pool;
+        the event loop and the shared threadpool stay free meanwhile.
+        """
+        user = await self.get_by_email_async(db, email=email)
+        if not user:
+            return None
+        # End the read transaction so the pooled connection goes back while
+        # bcrypt runs (expire_on_commit=False keeps `user` loaded).
+        await db.commit()
+        if not await verify_password_async(password, user.hashed_password):
+            return None
+        return user
+
     def is_active(self, user: User) -> bool:
         return user.is_active
 
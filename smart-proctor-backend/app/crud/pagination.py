@@ -0,0 +1,64 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Generic, List, Optional, Sequence, TypeVar
+
+# ---------------------------------------------------------
+# KEYSET (CURSOR) PAGINATION
+# ---------------------------------------------------------
+# A cursor is the sort key of the last row the client has seen, serialized
+# as base64url JSON. It is opaque to clients: they pass back whatever
+# 'next_cursor' we handed out. The next page is "rows strictly after this
+# key", which an index on the sort key answers in O(limit) no matter how
+# deep the page is.
+
+T = TypeVar("T")
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in key]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *, arity: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if not isinstance(values, list) or len(values) != arity:
+        raise InvalidCursor("Malformed cursor")
+    return values
+
+def parse_cursor_int(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise InvalidCursor("Malformed cursor")
+    return value
+
+def parse_cursor_datetime(value: Any) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor("Malformed cursor")
+
+class Page(Generic[T]):
+    """
+    One page of results plus the cursor for the next one (None = last page).
+    """
+    __slots__ = ("items", "next_cursor")
+
+    def __init__(self, items: List[T], next_cursor: Optional[str]):
+        self.items = items
+        self.next_cursor = next_cursor
+
+def build_page(rows: List[T], limit: int, key_of: Callable[[T], Sequence[Any]]) -> Page[T]:
+    """
+    `rows` must have been fetched with LIMIT limit + 1; the extra row only
+    tells us whether another page exists.
+    """
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    next_cursor = encode_cursor(key_of(items[-1])) if has_more and items else None
+    return Page(items, next_cursor)
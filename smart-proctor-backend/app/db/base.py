@@ -3,4 +3,9 @@ from app.db.base_class import Base
 
 # Import all models here so Alembic can detect them
 from app.models.user import User
-from app.models.integrity import IntegrityViolation
\ No newline at end of file
+from app.models.integrity import IntegrityViolation
+from app.models.honeypot import HoneypotTrap
+from app.models.rollup import ViolationRollup
+from app.models.keystroke import KeystrokeProfile, KeystrokeUpdateKey
+from app.models.collusion import AnswerSignature
+from app.models.risk import StudentRisk
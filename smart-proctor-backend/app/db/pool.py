@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, NamedTuple
+
+import anyio.to_thread
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from app.core.config import settings
+from app.core.metrics import DB_POOL_TIMEOUTS, DB_POOL_WAIT_SECONDS
+
+# ---------------------------------------------------------
+# CONNECTION BUDGET
+# ---------------------------------------------------------
+# DB_CONNECTION_BUDGET is what one host (container) may open against one
+# Postgres server, across all of its WEB_CONCURRENCY gunicorn workers. Each
+# worker splits its share between the sync engine (threadpool routes and the
+# write-behind threads) and the async engine, and caps Starlette's
+# threadpool at what the sync pool can serve, so requests queue visibly in
+# the threadpool instead of blocking on an exhausted pool.
+class PoolBudget(NamedTuple):
+    sync_pool_size: int
+    sync_max_overflow: int
+    async_pool_size: int
+    async_max_overflow: int
+    threadpool_size: int
+
+def _split(total: int):
+    # A quarter of each share is overflow: opened under bursts, closed after.
+    overflow = total // 4
+    return total - overflow, overflow
+
+def compute_budget(budget: int, workers: int, sync_share: float, threadpool_headroom: int) -> PoolBudget:
+    per_worker = max(2, budget // max(workers, 1))
+    sync_total = min(per_worker - 1, max(1, round(per_worker * sync_share)))
+    async_total = per_worker - sync_total
+    sync_size, sync_overflow = _split(sync_total)
+    async_size, async_overflow = _split(async_total)
+    return PoolBudget(
+        sync_pool_size=sync_size,
+        sync_max_overflow=sync_overflow,
+        async_pool_size=async_size,
+        async_max_overflow=async_overflow,
+        threadpool_size=sync_total + threadpool_headroom,
+    )
+
+budget = compute_budget(
+    settings.DB_CONNECTION_BUDGET,
+    settings.WEB_CONCURRENCY,
+    settings.DB_SYNC_POOL_SHARE,
+    settings.THREADPOOL_HEADROOM,
+)
+
+# ---------------------------------------------------------
+# INSTRUMENTED POOLS
+# ---------------------------------------------------------
+# QueuePool has no hook before a checkout starts waiting, so the wait is
+# timed around _do_get (the part that blocks on the queue or connects).
+# Waits also go to Prometheus, labelled with the pool's logging name.
+class _TimedPoolMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        label = self.logging_name or type(self).__name__
+        self._wait_metric = DB_POOL_WAIT_SECONDS.labels(label)
+        self._timeout_metric = DB_POOL_TIMEOUTS.labels(label)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.waited = 0            # checkouts slower than 1 ms (queued or connecting)
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            with self._stats_lock:
+                self.timeouts += 1
+            self._timeout_metric.inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self._wait_metric.observe(elapsed)
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds += elapsed
+                if elapsed > 0.001:
+                    self.waited += 1
+                self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+
+# SQLAlchemy names a pool's logger after its class's module (this one), which
+# sits under the app's INFO logging; keep it as quiet as sqlalchemy.pool.
+logging.getLogger(__name__).setLevel(logging.WARNING)
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def engine_options(pool_size: int, max_overflow: int, *, is_async: bool, name: str = "primary") -> Dict[str, Any]:
+    """
+    create_engine / create_async_engine keyword arguments for one engine.
+    `name` labels the pool's logger and metrics ("primary_sync", ...).
+
+    In DB_PGBOUNCER_MODE connections are not pooled here (PgBouncer does it)
+    and psycopg never prepares statements server-side, which transaction
+    pooling would hand to the wrong backend.
+    """
+    if settings.DB_PGBOUNCER_MODE:
+        return {
+            "poolclass": NullPool,
+            "connect_args": {"prepare_threshold": None},
+        }
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        "pool_logging_name": f"{name}_{'async' if is_async else 'sync'}",
+        "pool_pre_ping": True,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+
+def pool_stats(engine) -> Dict[str, Any]:
+    pool = engine.pool
+    if not isinstance(pool, _TimedPoolMixin):
+        return {"pool": type(pool).__name__}
+    with pool._stats_lock:
+        return {
+            "pool": type(pool).__name__,
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "checkouts": pool.checkouts,
+            "waited": pool.waited,
+            "avg_wait_ms": round(pool.wait_seconds / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+            "max_wait_ms": round(pool.max_wait_seconds * 1000, 3),
+            "timeouts": pool.timeouts,
+        }
+
+def with_connect_args(engine_kwargs: Dict[str, Any], extra: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    `engine_kwargs` with `extra` merged into its connect_args.
+    """
+    merged = dict(engine_kwargs)
+    merged["connect_args"] = {**engine_kwargs.get("connect_args", {}), **extra}
+    return merged
+
+# ---------------------------------------------------------
+# THREADPOOL
+# ---------------------------------------------------------
+# Starlette runs sync routes and run_in_threadpool calls on anyio's default
+# limiter (40 tokens). The limiter belongs to the event loop, so it is sized
+# at startup and kept here for the stats endpoint, which runs in a thread.
+_limiter = None
+
+def configure_threadpool(size: int) -> None:
+    global _limiter
+    _limiter = anyio.to_thread.current_default_thread_limiter()
+    _limiter.total_tokens = size
+
+def threadpool_stats() -> Dict[str, Any]:
+    if _limiter is None:
+        return {"configured": False}
+    stats = _limiter.statistics()
+    return {
+        "size": int(stats.total_tokens),
+        "busy": stats.borrowed_tokens,
+        "waiting": stats.tasks_waiting,
+    }
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Replay lag in seconds. A replica that has replayed everything it received
+# reports 0 even if the primary has been idle (the last replay timestamp
+# would otherwise grow without any real lag). A server that is not in
+# recovery (a primary used as stand-in, e.g. in development) reports 0.
+LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+class ReplicaMonitor:
+    """
+    Decides, per request, whether reads may go to the replica.
+
+    The verdict is cached for `check_interval` seconds; the first request
+    after that re-probes (one probe at a time, the others keep the previous
+    verdict). A failed probe or a failed replica query marks the replica
+    down until the next probe, so at most one interval of requests fails
+    over instead of every request.
+    """
+
+    def __init__(self, enabled: bool, max_lag_seconds: float, check_interval: float):
+        self.enabled = enabled
+        self.max_lag = max_lag_seconds
+        self.check_interval = check_interval
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._async_lock: Optional[asyncio.Lock] = None
+
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+
+    def _due(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.check_interval
+
+    def _record(self, lag: Optional[float], error: Optional[BaseException] = None) -> None:
+        was_healthy = self.healthy
+        self._checked_at = time.monotonic()
+        self.lag = lag
+        self.last_error = repr(error) if error is not None else None
+        self.healthy = error is None and lag is not None and lag <= self.max_lag
+        if was_healthy and not self.healthy:
+            reason = self.last_error or f"lag {lag:.1f}s > {self.max_lag}s"
+            logger.warning(f"Read replica unusable ({reason}); reading from the primary.")
+        elif self.healthy and not was_healthy:
+            logger.info("Read replica usable.")
+
+    def _count(self, use_replica: bool) -> bool:
+        if use_replica:
+            self.replica_reads += 1
+        else:
+            self.primary_fallbacks += 1
+        return use_replica
+
+    def usable(self, engine) -> bool:
+        if self._due() and self._lock.acquire(blocking=False):
+            try:
+                with engine.connect() as conn:
+                    self._record(float(conn.execute(LAG_QUERY).scalar()))
+            except Exception as e:
+                self._record(None, e)
+            finally:
+                self._lock.release()
+        return self._count(self.healthy)
+
+    async def usable_async(self, engine) -> bool:
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        if self._due() and not self._async_lock.locked():
+            async with self._async_lock:
+                try:
+                    async with engine.connect() as conn:
+                        self._record(float((await conn.execute(LAG_QUERY)).scalar()))
+                except Exception as e:
+                    self._record(None, e)
+        return self._count(self.healthy)
+
+    def mark_down(self, error: BaseException) -> None:
+        self._record(None, error)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+            "last_error": self.last_error,
+            "replica_reads": self.replica_reads,
+            "primary_fallbacks": self.primary_fallbacks,
+        }
+
+# Instantiate for easy import
+replica_monitor = ReplicaMonitor(
+    enabled=settings.SQLALCHEMY_REPLICA_DATABASE_URI is not None,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_CHECK_INTERVAL_SECONDS,
+)
@@ -1,7 +1,10 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.query_profiler import instrument
+from app.db.pool import budget, engine_options, with_connect_args
 
 # ---------------------------------------------------------
 # DATABASE ENGINE
@@ -10,15 +13,70 @@ from app.core.config import settings
 # This is a Production Best Practice: It checks if the DB connection
 # is alive before trying to use it, preventing "Stale Connection" errors
 # that plague Python apps in the cloud.
+# Pool sizes come from the per-host connection budget (app.db.pool).
 engine = create_engine(
     str(settings.SQLALCHEMY_DATABASE_URI),
-    pool_pre_ping=True,
-    pool_size=20,  # Handle 20 concurrent connections
-    max_overflow=10 # Allow bursts up to 30
+    **engine_options(budget.sync_pool_size, budget.sync_max_overflow, is_async=False),
 )
 
+instrument(engine)
+
 # ---------------------------------------------------------
 # SESSION FACTORY
 # ---------------------------------------------------------
 # This factory creates new database sessions for every request.
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# ---------------------------------------------------------
+# ASYNC ENGINE (psycopg3 async)
+# ---------------------------------------------------------
+# Same URL, same driver: SQLAlchemy picks psycopg's async connection class
+# when the engine is created with create_async_engine. Routes on this path
+# await the DB instead of parking a Starlette threadpool thread on it.
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    **engine_options(budget.async_pool_size, budget.async_max_overflow, is_async=True),
+)
+instrument(async_engine)
+
+# expire_on_commit=False: objects stay readable after commit without
+# triggering an implicit (and, under asyncio, illegal) lazy refresh.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+# ---------------------------------------------------------
+# READ REPLICA (optional)
+# ---------------------------------------------------------
+# Heavy admin/analytics reads go here through deps.get_read_db, so dashboard
+# polling does not compete with exam submissions on the primary. A short
+# connect timeout keeps a dead replica from stalling requests before they
+# fall back (see app.db.replica). None when no replica is configured.
+read_engine = None
+ReadSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+
+if settings.SQLALCHEMY_REPLICA_DATABASE_URI:
+    # The replica is another server, so it gets its own budget of the same size.
+    _replica_args = {"connect_timeout": settings.REPLICA_CONNECT_TIMEOUT_SECONDS}
+    read_engine = create_engine(
+        settings.SQLALCHEMY_REPLICA_DATABASE_URI,
+        **with_connect_args(
+            engine_options(budget.sync_pool_size, budget.sync_max_overflow, is_async=False, name="replica"),
+            _replica_args,
+        ),
+    )
+    instrument(read_engine)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    async_read_engine = create_async_engine(
+        settings.SQLALCHEMY_REPLICA_DATABASE_URI,
+        **with_connect_args(
+            engine_options(budget.async_pool_size, budget.async_max_overflow, is_async=True, name="replica"),
+            _replica_args,
+        ),
+    )
+    instrument(async_read_engine)
+    AsyncReadSessionLocal = async_sessionmaker(
+        bind=async_read_engine, autoflush=False, expire_on_commit=False
+    )
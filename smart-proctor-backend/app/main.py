@@ -1,10 +1,20 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core import metrics, query_profiler
+from app.core.security import PasswordHashPoolSaturated
 from app.api import api_router
+from app.db.pool import budget, configure_threadpool
+from app.db.session import async_engine, async_read_engine
+from app.services import (
+    answer_signature_sink, keystroke_profiles, partition_maintainer, principal_listener, violation_feed,
+    violation_sink,
+)
 
 # Setup standard Python logging
 logging.basicConfig(level=logging.INFO)
@@ -24,11 +34,39 @@ async def lifespan(app: FastAPI):
     logger.info(f"🚀 Starting {settings.PROJECT_NAME}...")
     logger.info(f"🌍 Environment: Production")
     logger.info(f"🔗 Go Bouncer URL: {settings.GO_BOUNCER_URL}")
+    configure_threadpool(budget.threadpool_size)
+    if settings.DB_PGBOUNCER_MODE:
+        logger.info("🗄️ DB pools: PgBouncer mode (no app-side pooling)")
+    else:
+        logger.info(
+            f"🗄️ DB pools: sync {budget.sync_pool_size}+{budget.sync_max_overflow}, "
+            f"async {budget.async_pool_size}+{budget.async_max_overflow}, "
+            f"threadpool {budget.threadpool_size}"
+        )
+    # Violations need a partition to land in: refuse to start without runway.
+    await asyncio.to_thread(partition_maintainer.check, strict=True)
+    partition_maintainer.start()
+    violation_sink.start()
+    answer_signature_sink.start()
+    keystroke_profiles.start()
+    metrics.metrics_publisher.start()
+    principal_listener.start()
 
     yield  # The application serves requests here
 
     # SHUTDOWN LOGIC
     logger.info(f"🛑 Shutting down {settings.PROJECT_NAME}...")
+    await violation_feed.stop()
+    await principal_listener.stop()
+    # Drain buffered violations before the process exits (blocking, so off the loop).
+    await asyncio.to_thread(violation_sink.stop)
+    await asyncio.to_thread(answer_signature_sink.stop)
+    await asyncio.to_thread(keystroke_profiles.stop)
+    await asyncio.to_thread(metrics.metrics_publisher.stop)
+    await asyncio.to_thread(partition_maintainer.stop)
+    await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
 
 # ---------------------------------------------------------
 # APP INITIALIZATION
@@ -60,7 +98,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset pagination hands out the next cursor in a response header.
+    expose_headers=["X-Next-Cursor"],
 )
+# Per-request statement count / DB time (Server-Timing, budgets, N+1 log).
+app.add_middleware(query_profiler.QueryProfilerMiddleware)
+# Outermost, so the timing covers CORS and every other middleware.
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
+# ---------------------------------------------------------
+# ADMISSION CONTROL
+# ---------------------------------------------------------
+# A saturated bcrypt pool answers immediately instead of queueing,
+# so a login storm degrades into fast retries rather than timeouts.
+@app.exception_handler(PasswordHashPoolSaturated)
+async def password_pool_saturated_handler(request: Request, exc: PasswordHashPoolSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication service busy, please retry."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 # ---------------------------------------------------------
 # ROUTING
@@ -83,6 +140,16 @@ def health_check():
         "documentation": "/docs"
     }
 
+# ---------------------------------------------------------
+# METRICS (Prometheus text format)
+# ---------------------------------------------------------
+# Sums all gunicorn workers (see app.core.metrics). Sync, so reading the
+# per-worker files happens in the threadpool. Not for the public internet:
+# route it to the scraper only.
+@app.get("/metrics", tags=["System Status"], include_in_schema=False)
+def read_metrics() -> Response:
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -4,4 +4,9 @@
 # and won't generate the migration script.
 
 from .user import User
-from .integrity import IntegrityViolation
\ No newline at end of file
+from .integrity import IntegrityViolation
+from .honeypot import HoneypotTrap
+from .rollup import ViolationRollup
+from .keystroke import KeystrokeProfile, KeystrokeUpdateKey
+from .collusion import AnswerSignature
+from .risk import StudentRisk
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Index
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class AnswerSignature(Base):
+    """
+    MinHash signature of one submitted answer (never the answer itself).
+    Every worker's in-memory LSH index is rebuilt and kept current from
+    this table, so near-duplicates are found across workers.
+    """
+    __tablename__ = "answer_signatures"
+    __table_args__ = (
+        # Catch-up reads: "signatures of this question newer than id X".
+        Index("ix_answer_signatures_exam_question_id", "exam_id", "question_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    exam_id = Column(String, nullable=False)
+    question_id = Column(String, nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    # COLLUSION_NUM_PERM little-endian uint32 minimum hashes.
+    signature = Column(LargeBinary, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
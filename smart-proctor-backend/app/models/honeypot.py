@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class HoneypotTrap(Base):
+    """
+    A trap phrase planted (invisibly) in an exam's question text.
+    If a submitted answer contains it, the student pasted the poisoned
+    prompt into an LLM.
+    """
+    __tablename__ = "honeypot_traps"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Scope: every trap belongs to one exam. A NULL question_id means the
+    # trap applies to every question of that exam.
+    # Indexed because the scanner loads all traps of an exam at once.
+    exam_id = Column(String, index=True, nullable=False)
+    question_id = Column(String, nullable=True)
+
+    phrase = Column(String, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
@@ -9,22 +9,36 @@ class IntegrityViolation(Base):
     Once written, these rows should ideally never be updated, only read.
     """
     __tablename__ = "integrity_violations"
-
-    id = Column(Integer, primary_key=True, index=True)
+    __table_args__ = (
+        # Keyset pagination indexes: every listing is ordered on (timestamp, id),
+        # optionally after an equality filter. They also cover the former
+        # single-column indexes on timestamp, student_id and violation_type.
+        Index("ix_integrity_violations_timestamp_id", "timestamp", "id"),
+        Index("ix_integrity_violations_student_ts_id", "student_id", "timestamp", "id"),
+        Index("ix_integrity_violations_type_ts_id", "violation_type", "timestamp", "id"),
+        # Range-partitioned on timestamp (see crud.partition): old months are
+        # detached or dropped whole instead of being deleted row by row, and
+        # time-bounded queries only touch the partitions they need.
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
+    # The primary key must contain the partition key, hence (id, timestamp).
+    # ids still come from one sequence and stay unique.
+    id = Column(Integer, primary_key=True, autoincrement=True)
 
     # ---------------------------------------------------------
     # FOREIGN KEYS
     # ---------------------------------------------------------
     # Links to the 'users' table.
     # nullable=False: A violation MUST belong to a student.
-    student_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     # ---------------------------------------------------------
     # METADATA
     # ---------------------------------------------------------
     # Enum-like string: "BOT_DETECTED", "AI_PLAGIARISM", "TAB_SWITCH"
-    # Indexed so we can quickly count "How many bots today?"
-    violation_type = Column(String, index=True, nullable=False)
+    # Indexed (with timestamp) so we can quickly count "How many bots today?"
+    violation_type = Column(String, nullable=False)
 
     # Confidence score (0.0 to 1.0) or Time Deviation (ms)
     evidence_score = Column(Float, nullable=True)
@@ -38,7 +52,8 @@ class IntegrityViolation(Base):
     # ---------------------------------------------------------
     # 'server_default=func.now()' ensures the DB sets the time
     # precisely when the row is inserted.
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # NOT NULL: it is part of every pagination key and the partition key.
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True)
 
     # ---------------------------------------------------------
     # RELATIONSHIPS
@@ -0,0 +1,55 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class KeystrokeProfile(Base):
+    """
+    Streaming keystroke biometrics of a student.
+
+    Holds running statistics only (Welford count/mean/M2 and fixed-bin
+    histograms, see core.keystroke_stats), never raw samples, so an
+    update costs the same after one session or a thousand.
+    """
+    __tablename__ = "keystroke_profiles"
+
+    # ON DELETE CASCADE: the profile is meaningless without its user.
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    # ---------------------------------------------------------
+    # FLIGHT TIME (ms between keys)
+    # ---------------------------------------------------------
+    flight_count = Column(Integer, nullable=False, default=0)
+    flight_mean = Column(Float, nullable=False, default=0.0)
+    flight_m2 = Column(Float, nullable=False, default=0.0)
+    # uint32 little-endian bin counts
+    flight_hist = Column(LargeBinary, nullable=True)
+
+    # ---------------------------------------------------------
+    # DWELL TIME (ms a key is held down)
+    # ---------------------------------------------------------
+    dwell_count = Column(Integer, nullable=False, default=0)
+    dwell_mean = Column(Float, nullable=False, default=0.0)
+    dwell_m2 = Column(Float, nullable=False, default=0.0)
+    dwell_hist = Column(LargeBinary, nullable=True)
+
+    # ---------------------------------------------------------
+    # WINDOW FEATURE MODEL (services.biometrics)
+    # ---------------------------------------------------------
+    # Count, mean vector and M2 matrix of the per-window feature vectors
+    # enrolled so far, as little-endian float64 arrays.
+    feature_count = Column(Integer, nullable=False, default=0, server_default="0")
+    feature_mean = Column(LargeBinary, nullable=True)
+    feature_m2 = Column(LargeBinary, nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+class KeystrokeUpdateKey(Base):
+    """
+    Idempotency keys of applied baseline updates, so the bouncer can safely
+    retry a batch. Pruned after KEYSTROKE_UPDATE_KEY_TTL_HOURS.
+    """
+    __tablename__ = "keystroke_update_keys"
+
+    key = Column(String(128), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
\ No newline at end of file
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from app.db.base_class import Base
+
+class StudentRisk(Base):
+    """
+    Live, time-decayed risk score per student.
+
+    Maintained in the same transaction as every violation insert (see
+    crud.risk): each event adds its weighted evidence to the previous
+    value decayed to the event time, so an update is O(1) and never reads
+    integrity_violations.
+    """
+    __tablename__ = "student_risk"
+    __table_args__ = (
+        # Top-K per exam: one backward range scan, no sort.
+        Index("ix_student_risk_exam_rank", "exam_id", "rank_key"),
+    )
+
+    # ON DELETE CASCADE: same reasoning as violation_rollups.
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # The exam the student's latest submission belonged to. Events that
+    # carry no exam (e.g. biometric mismatches) count towards it; a
+    # submission to a different exam starts the score over.
+    exam_id = Column(String, nullable=True)
+
+    # ---------------------------------------------------------
+    # SCORE
+    # ---------------------------------------------------------
+    # `score` is the value as of `updated_at` (the latest event); the
+    # current value is score * 2^(-(now - updated_at) / half-life).
+    score = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    # ln(score) + decay_rate * epoch(updated_at). Decay multiplies every
+    # score by the same factor, so this orders students by their current
+    # score at any moment and never needs rewriting as time passes.
+    rank_key = Column(Float, nullable=False)
+    violation_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from app.db.base_class import Base
+
+class ViolationRollup(Base):
+    """
+    Pre-aggregated violation counts per (time bucket, type, student).
+
+    Maintained incrementally in the same transaction as every violation
+    insert (see crud.rollup), so analytics read O(buckets) rows instead of
+    scanning integrity_violations.
+    """
+    __tablename__ = "violation_rollups"
+
+    # ---------------------------------------------------------
+    # KEY
+    # ---------------------------------------------------------
+    # bucket_start leads the primary key, so time-range queries
+    # ("bots today") are a single index range scan.
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    violation_type = Column(String, primary_key=True)
+    # ON DELETE CASCADE: deleting a user (which already cascades their
+    # violations in the ORM) must not be blocked by their rollup rows.
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    # ---------------------------------------------------------
+    # AGGREGATES
+    # ---------------------------------------------------------
+    violation_count = Column(Integer, nullable=False, default=0)
+    # evidence_score is nullable, so the average is score_sum / scored_count.
+    score_sum = Column(Float, nullable=False, default=0.0)
+    scored_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,69 @@
+import argparse
+import logging
+import sys
+import os
+from datetime import timedelta
+
+# Ensure we can import 'app'
+sys.path.append(os.getcwd())
+
+from app.db.session import SessionLocal
+from app.core.config import settings
+from app import crud
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# VIOLATION PARTITION MAINTENANCE
+# ---------------------------------------------------------
+# Creates integrity_violations partitions ahead of time and expires old ones
+# under the retention policy. Rows in a range without a partition land in
+# the default partition until one is created. This runs on every deploy
+# (start.sh); the app's workers also create partitions ahead on their own
+# (services.partition_maintainer), so cron is only needed for retention.
+# Exits non-zero when fewer than VIOLATION_PARTITION_MIN_RUNWAY_DAYS are
+# covered afterwards.
+#
+#   python -m app.partition_maintenance
+#   python -m app.partition_maintenance --ahead 6 --retention-days 365 --action drop
+#   python -m app.partition_maintenance --list
+
+def main(ahead: int, retention_days, action: str) -> None:
+    db = SessionLocal()
+    try:
+        created = crud.partition.ensure(db, ahead=ahead)
+        for name in created:
+            logger.info(f"Created partition {name}.")
+        runway = crud.partition.runway(db)
+        if runway < timedelta(days=settings.VIOLATION_PARTITION_MIN_RUNWAY_DAYS):
+            logger.error(f"Violation partitions cover only {runway} from now.")
+            sys.exit(1)
+        if retention_days is not None:
+            expired = crud.partition.expire(db, retention_days=retention_days, action=action)
+            for name in expired:
+                logger.info(f"Expired partition {name} ({action}).")
+    finally:
+        db.close()
+
+def show() -> None:
+    db = SessionLocal()
+    try:
+        for p in crud.partition.list(db):
+            print(f"{p.name:<40} {p.start.isoformat()}  ->  {p.end.isoformat()}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create upcoming and expire old violation partitions.")
+    parser.add_argument("--ahead", type=int, default=settings.VIOLATION_PARTITIONS_AHEAD,
+                        help="Future partitions to keep ready.")
+    parser.add_argument("--retention-days", type=int, default=settings.VIOLATION_RETENTION_DAYS,
+                        help="Expire partitions that ended more than this many days ago.")
+    parser.add_argument("--action", choices=("detach", "drop"), default=settings.VIOLATION_RETENTION_ACTION)
+    parser.add_argument("--list", action="store_true", help="Only print the current partitions.")
+    args = parser.parse_args()
+    if args.list:
+        show()
+    else:
+        main(args.ahead, args.retention_days, args.action)
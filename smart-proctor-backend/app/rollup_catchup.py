@@ -0,0 +1,46 @@
+import argparse
+import logging
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Ensure we can import 'app'
+sys.path.append(os.getcwd())
+
+from app.db.session import SessionLocal
+from app import crud
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# VIOLATION ROLLUP CATCH-UP
+# ---------------------------------------------------------
+# The rollup is normally maintained on every insert (crud.integrity).
+# This job recomputes closed buckets from the raw rows: run it once after
+# deploying the rollup to backfill history, or after rows were written or
+# deleted outside crud.integrity.
+#
+#   python -m app.rollup_catchup --hours 24
+#   python -m app.rollup_catchup --since 2024-01-01T00:00:00+00:00
+
+def catch_up(start: datetime, end: datetime) -> None:
+    db = SessionLocal()
+    try:
+        written = crud.rollup.rebuild(db, start=start, end=end)
+    finally:
+        db.close()
+    logger.info(f"Rebuilt rollup buckets [{start.isoformat()}, {end.isoformat()}): {written} rows.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild closed violation rollup buckets.")
+    parser.add_argument("--hours", type=int, default=24, help="How far back to rebuild.")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Rebuild from this instant instead.")
+    args = parser.parse_args()
+
+    # Stop at the start of the current (still open) bucket.
+    end = crud.rollup.bucket_of(datetime.now(timezone.utc))
+    start = args.since or end - timedelta(hours=args.hours)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    catch_up(start, end)
@@ -2,6 +2,9 @@ from .token import Token, TokenPayload
 from .student import Student, StudentCreate, StudentUpdate
 # ADD KeystrokeUpdate to the end of this list 👇
 from .exam import ExamSubmission, ExamResult, IntegrityLog, IntegrityCreate, IntegrityUpdate, KeystrokeUpdate
+from .exam import KeystrokeProfile, KeystrokeUpdateResult, BiometricWindow, BiometricScore
+from .exam import TrapPhrase, TrapPhraseSet
+from .exam import WatermarkRequest, WatermarkedQuestion, LeakAttribution
 
 # ---------------------------------------------------------
 # ALIASES (CRITICAL FIX)
@@ -10,4 +13,5 @@ from .exam import ExamSubmission, ExamResult, IntegrityLog, IntegrityCreate, Int
 # We map the 'Student' schemas to 'User' here so the code finds them.
 User = Student
 UserCreate = StudentCreate
-UserUpdate = StudentUpdate
\ No newline at end of file
+UserUpdate = StudentUpdate
+from .analytics import ViolationTypeSummary, ViolationSummary, Offender, StudentRiskScore
\ No newline at end of file
@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+# ---------------------------------------------------------
+# VIOLATION ANALYTICS (served from violation_rollups)
+# ---------------------------------------------------------
+class ViolationTypeSummary(BaseModel):
+    violation_type: str
+    count: int
+    students: int  # distinct students with at least one violation
+    avg_evidence_score: Optional[float] = None
+
+class ViolationSummary(BaseModel):
+    since: datetime  # floored to the rollup bucket
+    total: int
+    by_type: List[ViolationTypeSummary]
+
+class Offender(BaseModel):
+    student_id: int
+    email: str
+    full_name: Optional[str] = None
+    violation_count: int
+    avg_evidence_score: Optional[float] = None
+
+# ---------------------------------------------------------
+# LIVE RISK (served from student_risk)
+# ---------------------------------------------------------
+class StudentRiskScore(BaseModel):
+    student_id: int
+    email: str
+    full_name: Optional[str] = None
+    risk_score: float  # decayed to the time of the request
+    violation_count: int  # events since the score (re)started
+    last_event_at: datetime
@@ -44,16 +44,88 @@ class IntegrityLog(IntegrityBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+# ---------------------------------------------------------
+# HONEYPOT TRAPS (Admin)
+# ---------------------------------------------------------
+class TrapPhrase(BaseModel):
+    phrase: str = Field(..., min_length=1, max_length=500)
+    # None = applies to every question of the exam
+    question_id: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class TrapPhraseSet(BaseModel):
+    traps: List[TrapPhrase] = Field(..., max_length=20000)
+
+# ---------------------------------------------------------
+# WATERMARKS (Leak Attribution)
+# ---------------------------------------------------------
+class WatermarkRequest(BaseModel):
+    text: str = Field(..., min_length=1)
+
+class WatermarkedQuestion(BaseModel):
+    text: str
+
+class LeakAttribution(BaseModel):
+    user_id: Optional[int] = None  # None = valid watermark, but no matching user
+    token: str
+    occurrences: int
+    first_offset: int
+
 # ---------------------------------------------------------
 # EXAM RESULT (Output)
 # ---------------------------------------------------------
 class ExamResult(BaseModel):
     student_id: int
     exam_id: str
+    question_id: Optional[str] = None
     status: str = Field(..., description="PASSED, FLAGGED, or REVIEW_REQUIRED")
     score: Optional[int] = 0
     security_remarks: Optional[str] = None
 
 class KeystrokeUpdate(BaseModel):
     user_id: int
-    new_flight_time: float
\ No newline at end of file
+    # Legacy: the session's average flight time, counted as one sample.
+    new_flight_time: Optional[float] = None
+    # Raw per-keystroke samples (ms) collected by the bouncer.
+    flight_times: List[float] = Field(default_factory=list, max_length=20000)
+    dwell_times: List[float] = Field(default_factory=list, max_length=20000)
+    # Set by batch senders; a retried item with the same key is applied once.
+    idempotency_key: Optional[str] = Field(None, min_length=1, max_length=128)
+
+class KeystrokeUpdateResult(BaseModel):
+    idempotency_key: Optional[str] = None
+    user_id: int
+    status: str = Field(..., description="applied, duplicate or unknown_user")
+
+class KeystrokeProfile(BaseModel):
+    """
+    What the Go bouncer loads at connect time.
+    Histograms have fixed bins of `*_bin_ms`; the last bin is open-ended.
+    """
+    user_id: int
+    flight_count: int
+    flight_mean: float
+    flight_std: float
+    flight_bin_ms: float
+    flight_histogram: List[int]
+    dwell_count: int
+    dwell_mean: float
+    dwell_std: float
+    dwell_bin_ms: float
+    dwell_histogram: List[int]
+
+# ---------------------------------------------------------
+# BIOMETRIC WINDOW SCORING (Internal)
+# ---------------------------------------------------------
+class BiometricWindow(BaseModel):
+    user_id: int
+    # Paired samples in keystroke order (ms).
+    flight_times: List[float] = Field(..., max_length=1000)
+    dwell_times: List[float] = Field(..., max_length=1000)
+
+class BiometricScore(BaseModel):
+    user_id: int
+    distance: Optional[float] = None  # None = not scored (too few samples / still enrolling)
+    evidence_score: Optional[float] = None
+    flagged: bool
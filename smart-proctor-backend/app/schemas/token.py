@@ -8,4 +8,6 @@ class Token(BaseModel):
 class TokenPayload(BaseModel):
     # We enforce that the subject (User ID) must be an integer,
     # matching the primary key in your PostgreSQL database.
-    sub: Optional[int] = None
\ No newline at end of file
+    sub: Optional[int] = None
+    # Expiry (unix seconds); caches never keep a token past this.
+    exp: Optional[int] = None
\ No newline at end of file
@@ -1,5 +1,13 @@
 from .honeypot import honeypot_service
+from .violation_sink import violation_sink
+from .keystroke_profiles import keystroke_profiles
+from .biometrics import biometric_engine
+from .collusion import answer_signature_sink, collusion_detector
+from .ai_text import ai_text_detector
+from .violation_feed import violation_feed
+from .partition_maintainer import partition_maintainer
+from .principal_listener import principal_listener
 
 # This allows you to do:
 # from app.services import honeypot_service
-# honeypot_service.check_llm_poisoning(...)
\ No newline at end of file
+# honeypot_service.check_llm_poisoning(...)
@@ -0,0 +1,212 @@
+import json
+import logging
+import math
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+# Configure module-level logger
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# HASHED CHARACTER N-GRAM LANGUAGE MODEL
+# ---------------------------------------------------------
+# Text is casefolded and scored as UTF-8 bytes. For every order k = 1..N the
+# count of each byte k-gram lives in a fixed-size hashed table, so the model
+# is a single (N, buckets) uint32 array:
+#
+#   <model dir>/counts.npy   counts[k - 1][bucket(k-gram)]
+#   <model dir>/meta.json    order, buckets, total, alpha, calibration
+#
+# Built offline by `python -m app.build_ai_text_model` and opened with
+# mmap_mode="r": every worker maps the same file, so the pages are shared
+# through the page cache and opening the model costs nothing up front.
+#
+# P(byte | context) is Dirichlet-smoothed order by order:
+#   p_1 = (c_1 + 1) / (total + 256)
+#   p_k = (c_k + alpha * p_{k-1}) / (c_context + alpha)
+
+_PRIME = np.uint64(0x100000001B3)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_IS_SENTENCE_END = np.zeros(256, dtype=bool)
+_IS_SENTENCE_END[list(b".!?\n")] = True
+
+def encode_text(text: str) -> np.ndarray:
+    return np.frombuffer(text.casefold().encode("utf-8"), dtype=np.uint8)
+
+def ngram_buckets(codes: np.ndarray, order: int, buckets: int) -> List[np.ndarray]:
+    """
+    For k = 1..order, the bucket of the k-gram ending at every position
+    from k-1 on (so entry k-1 has len(codes) - k + 1 items). `buckets` must
+    be a power of two: buckets are the top bits of a multiplicative hash.
+    """
+    shift = np.uint64(64 - (buckets.bit_length() - 1))
+    out = []
+    h = codes.astype(np.uint64) + np.uint64(1)
+    for k in range(1, order + 1):
+        if k > 1:
+            # Rolling hash: the k-gram ending at i extends the (k-1)-gram at i-1.
+            h = h[:-1] * _PRIME + codes[k - 1:] + np.uint64(1)
+        out.append(((h + np.uint64(k)) * _GOLDEN >> shift).astype(np.intp))
+    return out
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+class AITextScore(NamedTuple):
+    perplexity: float   # per-byte perplexity of the whole answer
+    burstiness: float   # coefficient of variation of per-sentence log-perplexity
+    score: float        # calibrated P(machine-generated), feeds evidence_score
+
+class NgramModel:
+    """
+    Read-only view of a model directory. Scoring is a handful of vectorized
+    passes over the answer bytes plus one gather per order from the mmapped
+    table; nothing is loaded into process memory.
+    """
+
+    def __init__(self, counts: np.ndarray, meta: Dict):
+        # Plain ndarray view of the mapping: np.memmap's subclass hooks cost
+        # more than the gathers themselves on short answers.
+        self.counts = np.asarray(counts)
+        self.order = int(meta["order"])
+        self.buckets = int(meta["buckets"])
+        self.total = float(meta["total"])
+        self.alpha = float(meta.get("alpha", 4.0))
+        calibration = meta.get("calibration") or {}
+        self.bias = float(calibration.get("bias", 0.0))
+        self.w_perplexity = float(calibration.get("log_perplexity", 0.0))
+        self.w_burstiness = float(calibration.get("burstiness", 0.0))
+        self.calibrated = bool(calibration)
+        if counts.shape != (self.order, self.buckets):
+            raise ValueError(f"counts.npy shape {counts.shape} does not match meta.json")
+        if self.buckets & (self.buckets - 1):
+            raise ValueError("buckets must be a power of two")
+
+    @classmethod
+    def load(cls, path: str) -> "NgramModel":
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        counts = np.load(os.path.join(path, "counts.npy"), mmap_mode="r")
+        return cls(counts, meta)
+
+    def byte_bits(self, codes: np.ndarray) -> np.ndarray:
+        """
+        -log2 P(byte | preceding order-1 bytes) for every byte after the first.
+        """
+        grams = ngram_buckets(codes, self.order, self.buckets)
+        p = (self.counts[0].take(grams[0]) + 1.0) / (self.total + 256.0)
+        for k in range(2, min(self.order, len(codes)) + 1):
+            # The k-gram ending at i (i >= k-1) has as context the (k-1)-gram
+            # ending at i-1, i.e. every (k-1)-gram entry but the last.
+            c_k = self.counts[k - 1].take(grams[k - 1])
+            c_ctx = self.counts[k - 2].take(grams[k - 2][:-1])
+            p[k - 1:] = (c_k + self.alpha * p[k - 1:]) / (c_ctx + self.alpha)
+        return -np.log2(p[1:])
+
+    def score(self, text: str, min_sentence_bytes: int = 20) -> Optional[AITextScore]:
+        codes = encode_text(text)
+        if len(codes) < 2:
+            return None
+        bits = self.byte_bits(codes)
+
+        # Sentence of every scored byte, split after . ! ? and newlines.
+        sentence = np.cumsum(_IS_SENTENCE_END[codes[:-1]])
+        lengths = np.bincount(sentence)
+        sums = np.bincount(sentence, weights=bits)
+        long_enough = lengths >= min_sentence_bytes
+        if long_enough.sum() >= 2:
+            per_sentence = sums[long_enough] / lengths[long_enough]
+            burstiness = float(per_sentence.std() / max(per_sentence.mean(), 1e-9))
+        else:
+            burstiness = 0.0
+
+        mean_bits = float(bits.mean())
+        z = self.bias + self.w_perplexity * mean_bits * math.log(2) + self.w_burstiness * burstiness
+        return AITextScore(
+            perplexity=float(2.0 ** mean_bits),
+            burstiness=burstiness,
+            score=_sigmoid(z) if self.calibrated else 0.0,
+        )
+
+def fit_calibration(features: np.ndarray, labels: np.ndarray, iterations: int = 25) -> Dict[str, float]:
+    """
+    Logistic regression (Newton's method) of label 1 = machine-generated on
+    (log perplexity, burstiness). Used by the offline model builder.
+    """
+    x = np.column_stack([np.ones(len(features)), features])
+    w = np.zeros(x.shape[1])
+    ridge = 1e-3 * np.eye(x.shape[1])
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-(x @ w)))
+        gradient = x.T @ (labels - p) - ridge @ w
+        hessian = (x * (p * (1 - p))[:, None]).T @ x + ridge
+        w = w + np.linalg.solve(hessian, gradient)
+    return {"bias": float(w[0]), "log_perplexity": float(w[1]), "burstiness": float(w[2])}
+
+def sample_features(model: NgramModel, samples: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (log perplexity, burstiness) of every sample the model can score, plus
+    the mask of which samples that was.
+    """
+    scores = [model.score(s) for s in samples]
+    kept = np.array([s is not None for s in scores], dtype=bool)
+    features = np.array([[math.log(s.perplexity), s.burstiness] for s in scores if s is not None])
+    return features.reshape(-1, 2), kept
+
+class AITextDetector:
+    """
+    Lazily opens the model from `model_dir` once per process. Without a
+    configured (or readable) model every answer scores None and only the
+    trap-word check applies.
+    """
+
+    def __init__(self, model_dir: Optional[str], min_chars: int, max_chars: int):
+        self.model_dir = model_dir
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._model: Optional[NgramModel] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> Optional[NgramModel]:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._model = self._open()
+                    self._loaded = True
+        return self._model
+
+    def _open(self) -> Optional[NgramModel]:
+        if not self.model_dir:
+            return None
+        try:
+            model = NgramModel.load(self.model_dir)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"AI-text model at '{self.model_dir}' not loaded: {e}")
+            return None
+        if not model.calibrated:
+            logger.warning(f"AI-text model at '{self.model_dir}' has no calibration; scores will be 0.")
+        return model
+
+    def score(self, text: str) -> Optional[AITextScore]:
+        if len(text) < self.min_chars:
+            return None
+        model = self.model
+        # A prefix is plenty for the statistics and keeps the cost bounded.
+        return model.score(text[:self.max_chars]) if model is not None else None
+
+# Instantiate for easy import
+ai_text_detector = AITextDetector(
+    model_dir=settings.AI_TEXT_MODEL_DIR,
+    min_chars=settings.AI_TEXT_MIN_CHARS,
+    max_chars=settings.AI_TEXT_MAX_CHARS,
+)
@@ -0,0 +1,278 @@
+import json
+import logging
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.metrics import BIOMETRICS_SECONDS
+from app.services.violation_sink import violation_sink
+
+# Configure module-level logger
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# FEATURES
+# ---------------------------------------------------------
+# One vector per window of (flight_time, dwell_time) samples:
+#   flight / dwell median and IQR
+#   digraph latency median (press-to-press: dwell[i] + flight[i+1])
+#   burstiness of flight times, (sigma - mu) / (sigma + mu), in [-1, 1]
+FEATURES = (
+    "flight_median", "flight_iqr", "dwell_median", "dwell_iqr",
+    "digraph_median", "burstiness",
+)
+N_FEATURES = len(FEATURES)
+
+# Samples outside (0, MAX_SAMPLE_MS) are pauses or garbage and ignored.
+MAX_SAMPLE_MS = 2000.0
+
+# Added to every covariance diagonal: keeps the matrix invertible for very
+# consistent typists and stops sub-millisecond jitter from counting as a
+# deviation. ms^2 for latencies, unitless for burstiness.
+VARIANCE_FLOOR = np.array([25.0, 25.0, 9.0, 9.0, 25.0, 1e-3])
+
+_QUANTILES = np.array([0.25, 0.5, 0.75])
+
+class KeystrokeWindow(NamedTuple):
+    user_id: int
+    flight_times: Sequence[float]
+    dwell_times: Sequence[float]
+
+class BiometricScore(NamedTuple):
+    user_id: int
+    distance: Optional[float]        # None = too few samples or no model yet
+    evidence_score: Optional[float]  # P(distance below this) for a genuine typist
+    flagged: bool
+
+def pad_windows(samples: Sequence[Sequence[float]], width: int) -> np.ndarray:
+    """
+    Packs ragged sample lists into an (N, width) float64 matrix, NaN-padded.
+    Invalid samples become NaN as well.
+    """
+    out = np.full((len(samples), width), np.nan)
+    for i, row in enumerate(samples):
+        row = row[:width]
+        out[i, :len(row)] = row
+    out[~((out > 0) & (out < MAX_SAMPLE_MS))] = np.nan
+    return out
+
+def _row_quantiles(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Linear-interpolated quartiles of every row, ignoring NaNs. One sort for
+    the whole matrix instead of nanquantile's per-row Python path.
+    Returns ((N, 3) quartiles, (N,) valid counts).
+    """
+    counts = np.count_nonzero(~np.isnan(values), axis=1)
+    ordered = np.sort(values, axis=1)  # NaNs sort last
+    last = np.maximum(counts - 1, 0)[:, None]
+    pos = last * _QUANTILES[None, :]
+    lo = np.floor(pos).astype(np.intp)
+    hi = np.minimum(lo + 1, last)
+    frac = pos - lo
+    v_lo = np.take_along_axis(ordered, lo, axis=1)
+    v_hi = np.take_along_axis(ordered, hi, axis=1)
+    return v_lo + (v_hi - v_lo) * frac, counts
+
+def extract_features(flight: np.ndarray, dwell: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (N, W) flight and dwell matrices -> ((N, N_FEATURES) features, (N,) valid mask).
+    A window is valid when every feature rests on at least
+    BIOMETRIC_MIN_WINDOW_SAMPLES samples.
+    """
+    fq, f_n = _row_quantiles(flight)
+    dq, d_n = _row_quantiles(dwell)
+    gq, g_n = _row_quantiles(dwell[:, :-1] + flight[:, 1:])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        f_sum = np.nansum(flight, axis=1)
+        mu = f_sum / f_n
+        sigma = np.sqrt(np.nansum((flight - mu[:, None]) ** 2, axis=1) / f_n)
+        burstiness = (sigma - mu) / (sigma + mu)
+
+    features = np.column_stack([
+        fq[:, 1], fq[:, 2] - fq[:, 0],
+        dq[:, 1], dq[:, 2] - dq[:, 0],
+        gq[:, 1],
+        burstiness,
+    ])
+    min_n = settings.BIOMETRIC_MIN_WINDOW_SAMPLES
+    valid = (f_n >= min_n) & (d_n >= min_n) & (g_n >= min_n) & np.isfinite(features).all(axis=1)
+    return features, valid
+
+# ---------------------------------------------------------
+# SCORING
+# ---------------------------------------------------------
+def chi2_cdf(x: np.ndarray, dof: int = N_FEATURES) -> np.ndarray:
+    """
+    Chi-square CDF in closed form (even degrees of freedom only).
+    """
+    half = x / 2.0
+    term = np.ones_like(half)
+    total = np.ones_like(half)
+    for i in range(1, dof // 2):
+        term = term * half / i
+        total += term
+    return 1.0 - np.exp(-half) * total
+
+def mahalanobis(
+        features: np.ndarray, counts: np.ndarray, means: np.ndarray, m2s: np.ndarray
+) -> np.ndarray:
+    """
+    Distance of every feature vector (N, k) from its own model: counts (N,),
+    means (N, k), M2 matrices (N, k, k). One batched solve for all rows.
+    """
+    cov = m2s / np.maximum(counts - 1, 1)[:, None, None]
+    cov = cov + np.diag(VARIANCE_FLOOR)[None, :, :]
+    delta = features - means
+    solved = np.linalg.solve(cov, delta[:, :, None])[:, :, 0]
+    return np.sqrt(np.maximum(np.einsum("ij,ij->i", delta, solved), 0.0))
+
+def _decode_model(model) -> Tuple[int, np.ndarray, np.ndarray]:
+    count, mean, m2 = model
+    if not count or mean is None or m2 is None:
+        return 0, np.zeros(N_FEATURES), np.zeros((N_FEATURES, N_FEATURES))
+    return (
+        count,
+        np.frombuffer(mean, dtype="<f8").copy(),
+        np.frombuffer(m2, dtype="<f8").reshape(N_FEATURES, N_FEATURES).copy(),
+    )
+
+def group_stats(features: np.ndarray, groups: np.ndarray, n_groups: int):
+    """
+    Per-group count, mean and M2 (sum of centered outer products) of
+    `features`, without a Python loop over groups.
+    """
+    counts = np.bincount(groups, minlength=n_groups)
+    sums = np.zeros((n_groups, N_FEATURES))
+    np.add.at(sums, groups, features)
+    means = sums / np.maximum(counts, 1)[:, None]
+    centered = features - means[groups]
+    m2s = np.zeros((n_groups, N_FEATURES, N_FEATURES))
+    np.add.at(m2s, groups, centered[:, :, None] * centered[:, None, :])
+    return counts, means, m2s
+
+def merge_stats(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+    """
+    Chan et al. merge of two batches of (count, mean, M2), vectorized over users.
+    """
+    n = n_a + n_b
+    safe_n = np.maximum(n, 1)
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (n_b / safe_n)[:, None]
+    m2 = m2_a + m2_b + delta[:, :, None] * delta[:, None, :] * (n_a * n_b / safe_n)[:, None, None]
+    return n, mean, m2
+
+class BiometricEngine:
+    """
+    Scores windows of keystroke samples against each student's own window
+    feature model, many students per call.
+
+    Windows of students without an established model enroll them; windows
+    within the threshold keep adapting the model, flagged ones never do.
+    """
+
+    def __init__(self, threshold: float, min_enrolled: int, window_size: int):
+        self.threshold = threshold
+        self.min_enrolled = min_enrolled
+        self.window_size = window_size
+
+    def featurize(self, windows: Sequence[KeystrokeWindow]) -> Tuple[np.ndarray, np.ndarray]:
+        flight = pad_windows([w.flight_times for w in windows], self.window_size)
+        dwell = pad_windows([w.dwell_times for w in windows], self.window_size)
+        return extract_features(flight, dwell)
+
+    def process(self, db: Session, windows: Sequence[KeystrokeWindow]) -> List[BiometricScore]:
+        """
+        Scores `windows`, records BIOMETRIC_MISMATCH violations for flagged
+        ones and folds the rest into the feature models. Returns one score
+        per window, in order.
+        """
+        if not windows:
+            return []
+        started = time.perf_counter()
+        features, valid = self.featurize(windows)
+        user_ids, groups = np.unique(np.array([w.user_id for w in windows]), return_inverse=True)
+
+        models = crud.keystroke.get_feature_models(db, user_ids=user_ids.tolist())
+        decoded = [_decode_model(models.get(int(uid), (0, None, None))) for uid in user_ids]
+        counts = np.array([d[0] for d in decoded])
+        means = np.array([d[1] for d in decoded])
+        m2s = np.array([d[2] for d in decoded])
+
+        scored = valid & (counts[groups] >= self.min_enrolled)
+        distance = np.full(len(windows), np.nan)
+        if scored.any():
+            g = groups[scored]
+            distance[scored] = mahalanobis(features[scored], counts[g], means[g], m2s[g])
+        flagged = scored & (distance > self.threshold)
+        evidence = chi2_cdf(distance ** 2)
+
+        self._record_violations(db, windows, features, distance, evidence, flagged)
+        self._enroll(db, user_ids, features[valid & ~flagged], groups[valid & ~flagged])
+        BIOMETRICS_SECONDS.observe(time.perf_counter() - started)
+
+        return [
+            BiometricScore(
+                user_id=w.user_id,
+                distance=float(distance[i]) if scored[i] else None,
+                evidence_score=float(evidence[i]) if scored[i] else None,
+                flagged=bool(flagged[i]),
+            )
+            for i, w in enumerate(windows)
+        ]
+
+    def _record_violations(self, db, windows, features, distance, evidence, flagged) -> None:
+        rows = [
+            violation_sink.build_row(
+                student_id=windows[i].user_id,
+                violation_type="BIOMETRIC_MISMATCH",
+                evidence_score=round(float(evidence[i]), 4),
+                metadata_log=json.dumps({
+                    "distance": round(float(distance[i]), 3),
+                    "threshold": self.threshold,
+                    "features": dict(zip(FEATURES, np.round(features[i], 3).tolist())),
+                }),
+            )
+            for i in np.flatnonzero(flagged)
+        ]
+        if rows and not violation_sink.submit_many(rows):
+            crud.integrity.create_many(db, rows=rows)
+
+    def _enroll(self, db: Session, user_ids: np.ndarray, features: np.ndarray, groups: np.ndarray) -> None:
+        if not len(features):
+            return
+        n_b, mean_b, m2_b = group_stats(features, groups, len(user_ids))
+        present = np.flatnonzero(n_b)
+        targets = user_ids[present].tolist()
+
+        # Re-read under lock: another worker may have enrolled in between.
+        locked = crud.keystroke.lock_feature_models(db, user_ids=targets)
+        keep = [i for i, uid in enumerate(targets) if uid in locked]
+        if not keep:
+            db.commit()
+            return
+        targets = [targets[i] for i in keep]
+        present = present[keep]
+        decoded = [_decode_model(locked[uid]) for uid in targets]
+        n, mean, m2 = merge_stats(
+            np.array([d[0] for d in decoded]),
+            np.array([d[1] for d in decoded]),
+            np.array([d[2] for d in decoded]),
+            n_b[present], mean_b[present], m2_b[present],
+        )
+        crud.keystroke.write_feature_models(db, models={
+            uid: (int(n[i]), mean[i].astype("<f8").tobytes(), m2[i].astype("<f8").tobytes())
+            for i, uid in enumerate(targets)
+        })
+        db.commit()
+
+# Instantiate for easy import
+biometric_engine = BiometricEngine(
+    threshold=settings.BIOMETRIC_MISMATCH_DISTANCE,
+    min_enrolled=settings.BIOMETRIC_MIN_ENROLLED_WINDOWS,
+    window_size=settings.BIOMETRIC_WINDOW_SIZE,
+)
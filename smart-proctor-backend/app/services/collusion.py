@@ -0,0 +1,416 @@
+import json
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.metrics import COLLUSION_SECONDS
+from app.services.violation_sink import violation_sink
+from app.services.write_behind import WriteBehindSink
+
+# ---------------------------------------------------------
+# MINHASH
+# ---------------------------------------------------------
+# An answer is the set of its word k-grams ("shingles"). For each of
+# `num_perm` random hash functions h(x) = (a*x + b) mod P the signature keeps
+# the minimum over all shingles; the fraction of equal positions in two
+# signatures estimates the Jaccard similarity of the shingle sets.
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_WORD_RE = re.compile(r"\w+")
+
+def shingles(text: str, k: int) -> np.ndarray:
+    """
+    Distinct CRC-32 hashes of the word k-grams of `text` (case-folded).
+    """
+    words = _WORD_RE.findall(text.casefold())
+    grams = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+class MinHasher:
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        # a, b < 2**32 keep a*x + b inside uint64 for 32-bit x (wrap-around
+        # at the very top of the range only perturbs the hash).
+        self._a = rng.integers(1, 2 ** 32, num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, 2 ** 32, num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        return ((self._a * hashes[None, :] + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+# ---------------------------------------------------------
+# LSH INDEX
+# ---------------------------------------------------------
+def _mix64(x: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+class LSHIndex:
+    """
+    MinHash signatures of one question's answers, banded for LSH.
+
+    The signature is cut into `bands` bands of `rows` values; two answers
+    become candidates when any band is identical, which happens with
+    probability 1 - (1 - J^rows)^bands. Lookups touch only the colliding
+    buckets, never the whole index.
+
+    Memory is flat numpy arrays: signatures (4 bytes x num_perm per answer)
+    plus one (uint64 key, int32 slot) pair per band, kept sorted and searched
+    with np.searchsorted. New keys wait in a small dict and are merged into
+    the sorted arrays in bulk. At 128 permutations and 16 bands that is
+    under 1 KB per answer (with array headroom), ~90 MB for 100k answers.
+    """
+
+    MERGE_EVERY = 4096  # minimum pending band keys before a bulk merge
+
+    def __init__(self, num_perm: int, bands: int):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._salt = (np.arange(bands, dtype=np.uint64) + np.uint64(1)) * np.uint64(0x9E3779B97F4A7C15)
+        self._sigs = np.empty((0, num_perm), dtype=np.uint32)
+        self._students = np.empty(0, dtype=np.int64)
+        self.size = 0
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._slots = np.empty(0, dtype=np.int32)
+        self._pending: Dict[int, List[int]] = {}
+        self._pending_count = 0
+        # (student_id, signature hash) of every indexed answer. Answers are
+        # indexed on submit, before they are stored and get a row id, so
+        # this (not the id) is what makes catch-up reads of our own rows,
+        # and overlapping ones, harmless.
+        self._seen: Set[Tuple[int, int]] = set()
+        # Highest row id read back from the table.
+        self.high_water = 0
+        # high_water and monotonic time of the last catch-up sweep (see
+        # CollusionDetector.catch_up_from).
+        self.swept_to = 0
+        self.swept_at = 0.0
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """
+        (n, num_perm) signatures -> (n, bands) uint64 bucket keys.
+        """
+        bands = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows)
+        key = np.zeros(bands.shape[:2], dtype=np.uint64)
+        for j in range(self.rows):
+            key = _mix64(key ^ bands[:, :, j])
+        return _mix64(key ^ self._salt[None, :])
+
+    def _reserve(self, extra: int) -> int:
+        start = self.size
+        capacity = len(self._sigs)
+        if start + extra > capacity:
+            capacity = max(2 * capacity, start + extra)
+            sigs = np.empty((capacity, self._sigs.shape[1]), dtype=np.uint32)
+            sigs[:start] = self._sigs[:start]
+            students = np.empty(capacity, dtype=np.int64)
+            students[:start] = self._students[:start]
+            self._sigs, self._students = sigs, students
+        self.size += extra
+        return start
+
+    @staticmethod
+    def _key(student_id: int, signature: np.ndarray) -> Tuple[int, int]:
+        return student_id, hash(signature.tobytes())
+
+    def add(self, student_id: int, signature: np.ndarray) -> None:
+        key = self._key(student_id, signature)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        slot = self._reserve(1)
+        self._sigs[slot] = signature
+        self._students[slot] = student_id
+        for key in self.band_keys(signature[None, :])[0].tolist():
+            self._pending.setdefault(key, []).append(slot)
+        self._pending_count += self.bands
+        # Merging re-sorts everything, so the pending budget grows with the
+        # index to keep the amortized cost per add logarithmic.
+        if self._pending_count >= max(self.MERGE_EVERY, len(self._keys) // 8):
+            self._merge(np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int32))
+
+    def add_many(self, row_ids: Sequence[int], student_ids: Sequence[int], signatures: np.ndarray) -> None:
+        """
+        Bulk insert of stored rows (index warm-up and catch-up): one
+        vectorized pass and a single merge.
+        """
+        if not len(row_ids):
+            return
+        self.high_water = max(self.high_water, max(row_ids))
+        fresh = []
+        for i, student_id in enumerate(student_ids):
+            key = self._key(student_id, signatures[i])
+            if key not in self._seen:
+                self._seen.add(key)
+                fresh.append(i)
+        if not fresh:
+            return
+        start = self._reserve(len(fresh))
+        self._sigs[start:self.size] = signatures[fresh]
+        self._students[start:self.size] = np.asarray(student_ids)[fresh]
+        keys = self.band_keys(signatures[fresh]).ravel()
+        slots = np.repeat(np.arange(start, self.size, dtype=np.int32), self.bands)
+        self._merge(keys, slots)
+
+    def _merge(self, keys: np.ndarray, slots: np.ndarray) -> None:
+        if self._pending_count:
+            keys = np.concatenate([keys, np.fromiter(
+                (k for k, ss in self._pending.items() for _ in ss),
+                dtype=np.uint64, count=self._pending_count,
+            )])
+            slots = np.concatenate([slots, np.fromiter(
+                (s for ss in self._pending.values() for s in ss),
+                dtype=np.int32, count=self._pending_count,
+            )])
+            self._pending.clear()
+            self._pending_count = 0
+        keys = np.concatenate([self._keys, keys])
+        slots = np.concatenate([self._slots, slots])
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._slots = keys[order], slots[order]
+
+    def candidates(self, signature: np.ndarray) -> np.ndarray:
+        keys = self.band_keys(signature[None, :])[0]
+        found = []
+        if len(self._keys):
+            lo = np.searchsorted(self._keys, keys, side="left")
+            hi = np.searchsorted(self._keys, keys, side="right")
+            for start, end in zip(lo.tolist(), hi.tolist()):
+                if end > start:
+                    found.append(self._slots[start:end])
+        for key in keys.tolist():
+            slots = self._pending.get(key)
+            if slots:
+                found.append(np.asarray(slots, dtype=np.int32))
+        if not found:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(found))
+
+    def query(self, signature: np.ndarray, threshold: float) -> List[Tuple[int, float]]:
+        """
+        (student_id, estimated Jaccard) of indexed answers at or above
+        `threshold`, most similar first, best match per student.
+        """
+        slots = self.candidates(signature)
+        if not len(slots):
+            return []
+        similarity = (self._sigs[slots] == signature[None, :]).mean(axis=1)
+        best: Dict[int, float] = {}
+        for student_id, sim in zip(self._students[slots].tolist(), similarity.tolist()):
+            if sim >= threshold and sim > best.get(student_id, -1.0):
+                best[student_id] = sim
+        return sorted(best.items(), key=lambda item: -item[1])
+
+# ---------------------------------------------------------
+# SIGNATURE STORAGE
+# ---------------------------------------------------------
+class AnswerSignatureSink(WriteBehindSink):
+    """
+    Write-behind buffer for AnswerSignature rows. Signatures of unknown
+    students are skipped (see crud.answer_signature.create_many).
+    """
+
+    name = "answer signature sink"
+
+    def _persist(self, db: Session, rows: List[Dict[str, Any]]) -> None:
+        crud.answer_signature.create_many(db, rows=rows)
+
+# ---------------------------------------------------------
+# DETECTOR
+# ---------------------------------------------------------
+class CollusionMatch(NamedTuple):
+    other_student_id: int
+    similarity: float
+
+class CollusionDetector:
+    """
+    Per-(exam, question) LSH indexes, kept in a bounded LRU per worker.
+
+    Each check first pulls signatures other workers stored since the last
+    check (one indexed read for all questions of a batch), then queries and
+    adds the new answers to the index right away. Their signatures are
+    stored through the write-behind `answer_signature_sink`, so a submit
+    never waits for a commit.
+
+    Catch-up reads are incremental (id above the highest id read). Row ids
+    are not committed in strict order, so a row committed after a higher id
+    was read is picked up by a sweep: at most every CATCHUP_SWEEP_SECONDS
+    per question, the read goes back to CATCHUP_OVERLAP ids below the
+    previous sweep's high water. Already indexed answers are skipped.
+    """
+
+    CATCHUP_OVERLAP = 1000
+    CATCHUP_SWEEP_SECONDS = 30.0
+
+    def __init__(
+            self,
+            num_perm: int,
+            bands: int,
+            threshold: float,
+            shingle_words: int,
+            min_shingles: int,
+            max_questions: int,
+    ):
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.threshold = threshold
+        self.shingle_words = shingle_words
+        self.min_shingles = min_shingles
+        self._max_questions = max_questions
+        self._indexes: "OrderedDict[Tuple[str, str], LSHIndex]" = OrderedDict()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        None for answers too short to compare meaningfully ("Paris").
+        """
+        hashes = shingles(text, self.shingle_words)
+        if len(hashes) < self.min_shingles:
+            return None
+        return self.hasher.signature(hashes)
+
+    def _index_for(self, exam_id: str, question_id: str) -> LSHIndex:
+        key = (exam_id, question_id)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = LSHIndex(self.hasher.num_perm, self.bands)
+            while len(self._indexes) > self._max_questions:
+                self._indexes.popitem(last=False)
+        self._indexes.move_to_end(key)
+        return index
+
+    async def check_async(
+            self,
+            db: AsyncSession,
+            *,
+            exam_id: str,
+            question_id: str,
+            student_id: int,
+            answer_text: str,
+    ) -> List[CollusionMatch]:
+        """
+        Near-duplicates of this answer among other students' answers to the
+        same question, then adds the answer to the index.
+        """
+        return (await self.check_many_async(db, [(exam_id, question_id, student_id, answer_text)]))[0]
+
+    async def check_many_async(
+            self, db: AsyncSession, answers: List[Tuple[str, str, int, str]]
+    ) -> List[List[CollusionMatch]]:
+        """
+        `check_async` for (exam_id, question_id, student_id, answer_text)
+        tuples, in order (later answers are compared with earlier ones):
+        one catch-up read and one signature write for the whole list.
+        """
+        signatures, elapsed = [], []
+        for _, _, _, text in answers:
+            started = time.perf_counter()
+            signatures.append(self.signature(text))
+            elapsed.append(time.perf_counter() - started)
+        results: List[List[CollusionMatch]] = [[] for _ in answers]
+
+        indexes: Dict[Tuple[str, str], LSHIndex] = {}
+        for (exam_id, question_id, _, _), signature in zip(answers, signatures):
+            if signature is not None and (exam_id, question_id) not in indexes:
+                indexes[(exam_id, question_id)] = self._index_for(exam_id, question_id)
+        if indexes:
+            await self._catch_up(db, indexes)
+
+        stored = []
+        for i, ((exam_id, question_id, student_id, _), signature) in enumerate(zip(answers, signatures)):
+            if signature is None:
+                COLLUSION_SECONDS.observe(elapsed[i])
+                continue
+            started = time.perf_counter()
+            index = indexes[(exam_id, question_id)]
+            results[i] = [
+                CollusionMatch(other, sim)
+                for other, sim in index.query(signature, self.threshold)
+                if other != student_id
+            ]
+            index.add(student_id, signature)
+            COLLUSION_SECONDS.observe(elapsed[i] + time.perf_counter() - started)
+            stored.append({
+                "exam_id": exam_id,
+                "question_id": question_id,
+                "student_id": student_id,
+                "signature": signature.astype("<u4").tobytes(),
+            })
+
+        if stored and not answer_signature_sink.submit_many(stored):
+            # Sink saturated (or not running, e.g. in scripts): write through.
+            await crud.answer_signature.create_many_async(db, rows=stored)
+        return results
+
+    def catch_up_from(self, index: LSHIndex, now: float) -> int:
+        """
+        Row id the next catch-up read of `index` starts after.
+        """
+        if now - index.swept_at < self.CATCHUP_SWEEP_SECONDS:
+            return index.high_water
+        after_id = max(0, index.swept_to - self.CATCHUP_OVERLAP)
+        index.swept_to, index.swept_at = index.high_water, now
+        return after_id
+
+    async def _catch_up(self, db: AsyncSession, indexes: Dict[Tuple[str, str], LSHIndex]) -> None:
+        now = time.monotonic()
+        found = await crud.answer_signature.get_since_many_async(
+            db,
+            after_ids={key: self.catch_up_from(index, now) for key, index in indexes.items()},
+        )
+        for key, rows in found.items():
+            if rows:
+                indexes[key].add_many(
+                    [row[0] for row in rows],
+                    [row[1] for row in rows],
+                    np.frombuffer(b"".join(row[2] for row in rows), dtype="<u4").reshape(len(rows), -1),
+                )
+
+    @staticmethod
+    def build_rows(
+            *, exam_id: str, question_id: str, student_id: int, matches: List[CollusionMatch]
+    ) -> List[dict]:
+        """
+        COLLUSION_SUSPECTED rows for both sides of every match.
+        """
+        rows = []
+        for match in matches[:settings.COLLUSION_MAX_MATCHES]:
+            for student, other in ((student_id, match.other_student_id), (match.other_student_id, student_id)):
+                rows.append(violation_sink.build_row(
+                    student_id=student,
+                    violation_type="COLLUSION_SUSPECTED",
+                    evidence_score=round(match.similarity, 4),
+                    metadata_log=json.dumps({
+                        "other_student_id": other,
+                        "exam_id": exam_id,
+                        "question_id": question_id,
+                        "similarity": round(match.similarity, 4),
+                    }),
+                    exam_id=exam_id,
+                ))
+        return rows
+
+# Instantiate for easy import
+answer_signature_sink = AnswerSignatureSink(
+    max_queue=settings.VIOLATION_SINK_MAX_QUEUE,
+    batch_size=settings.VIOLATION_SINK_BATCH_SIZE,
+    flush_interval_ms=settings.VIOLATION_SINK_FLUSH_INTERVAL_MS,
+)
+collusion_detector = CollusionDetector(
+    num_perm=settings.COLLUSION_NUM_PERM,
+    bands=settings.COLLUSION_LSH_BANDS,
+    threshold=settings.COLLUSION_JACCARD_THRESHOLD,
+    shingle_words=settings.COLLUSION_SHINGLE_WORDS,
+    min_shingles=settings.COLLUSION_MIN_SHINGLES,
+    max_questions=settings.COLLUSION_INDEX_MAX_QUESTIONS,
+)
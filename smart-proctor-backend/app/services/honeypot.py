@@ -1,7 +1,17 @@
 import logging
 import re
-from typing import Optional
+import time
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app import crud
 from app.core.config import settings
+from app.core.metrics import AI_TEXT_SECONDS, TRAP_SCAN_SECONDS
+from app.models.honeypot import HoneypotTrap
+from app.schemas.exam import LeakAttribution
+from app.services.ai_text import AITextScore, ai_text_detector
+from app.services.trap_scanner import TrapAutomaton, TrapMatch, TrapScannerCache
+from app.services.watermark import codec, watermark_index
 
 # Configure module-level logger
 logger = logging.getLogger(__name__)
@@ -30,10 +40,71 @@ class HoneypotService:
             return True
         return False
 
+    def __init__(self):
+        self._trap_cache = TrapScannerCache(
+            maxsize=settings.HONEYPOT_TRAP_CACHE_SIZE,
+            ttl_seconds=settings.HONEYPOT_TRAP_CACHE_TTL_SECONDS,
+        )
+        self._default_scanner: Optional[TrapAutomaton] = None
+
+    # ---------------------------------------------------------
+    # TRAP-WORD SCANNING (LLM Poisoning)
+    # ---------------------------------------------------------
     @staticmethod
-    def check_llm_poisoning(answer_text: str) -> bool:
+    def build_trap_scanner(traps: Iterable[HoneypotTrap] = ()) -> TrapAutomaton:
+        """
+        Compiles an exam's trap phrases (plus the global HONEYPOT_TRAP_WORD)
+        into a single automaton.
+        """
+        phrases = [(settings.HONEYPOT_TRAP_WORD, None)]
+        phrases.extend((t.phrase, t.question_id) for t in traps)
+        return TrapAutomaton(phrases)
+
+    def get_trap_scanner(self, db: Session, exam_id: str) -> TrapAutomaton:
+        scanner = self._trap_cache.get(exam_id)
+        if scanner is None:
+            scanner = self.build_trap_scanner(crud.trap.get_by_exam(db, exam_id=exam_id))
+            self._trap_cache.put(exam_id, scanner)
+        return scanner
+
+    async def get_trap_scanner_async(self, db: AsyncSession, exam_id: str) -> TrapAutomaton:
+        scanner = self._trap_cache.get(exam_id)
+        if scanner is None:
+            traps = await crud.trap.get_by_exam_async(db, exam_id=exam_id)
+            scanner = self.build_trap_scanner(traps)
+            self._trap_cache.put(exam_id, scanner)
+        return scanner
+
+    def invalidate_trap_scanner(self, exam_id: str) -> None:
+        self._trap_cache.invalidate(exam_id)
+
+    def find_trap_words(
+            self,
+            answer_text: str,
+            scanner: Optional[TrapAutomaton] = None,
+            question_id: Optional[str] = None,
+    ) -> List[TrapMatch]:
+        """
+        Returns every trap phrase found in the answer, with offsets.
+        Without an exam scanner only the global HONEYPOT_TRAP_WORD is checked.
         """
-        Scans the answer for the specific trigger word injected into the 
+        if scanner is None:
+            if self._default_scanner is None:
+                self._default_scanner = self.build_trap_scanner()
+            scanner = self._default_scanner
+        started = time.perf_counter()
+        matches = scanner.scan(answer_text, question_id=question_id)
+        TRAP_SCAN_SECONDS.observe(time.perf_counter() - started)
+        return matches
+
+    def check_llm_poisoning(
+            self,
+            answer_text: str,
+            scanner: Optional[TrapAutomaton] = None,
+            question_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Scans the answer for the trigger words injected into the
         student's question prompt (e.g., 'Cyberdyne', 'Project 2501').
         
         This detects if the student copied the invisible prompt text 
@@ -42,28 +113,88 @@ class HoneypotService:
         if not answer_text:
             return False
 
-        trap_word = settings.HONEYPOT_TRAP_WORD.lower()
-        if trap_word in answer_text.lower():
-            logger.warning(f"SECURITY EVENT: AI Poisoning detected. Found trap word: '{trap_word}'")
+        matches = self.find_trap_words(answer_text, scanner, question_id)
+        if matches:
+            logger.warning(f"SECURITY EVENT: AI Poisoning detected. Found trap word: '{matches[0].phrase}'")
             return True
 
         return False
 
+    # ---------------------------------------------------------
+    # STATISTICAL AI-TEXT DETECTION
+    # ---------------------------------------------------------
     @staticmethod
-    def detect_watermark(text: str) -> Optional[int]:
+    def score_ai_text(answer_text: str) -> Optional[AITextScore]:
+        """
+        Perplexity and burstiness of the answer under the precomputed n-gram
+        model, plus the calibrated probability that it is machine-generated.
+        None when the answer is too short or no model is configured.
+        """
+        started = time.perf_counter()
+        score = ai_text_detector.score(answer_text)
+        AI_TEXT_SECONDS.observe(time.perf_counter() - started)
+        return score
+
+    @staticmethod
+    def ai_evidence(trap_hit: bool, ai_score: Optional[AITextScore]) -> float:
+        """
+        Evidence that an answer is AI-written: the detector's score, combined
+        (noisy-OR) with HONEYPOT_TRAP_EVIDENCE when a trap word was found.
         """
-        Advanced: Scans for Zero-Width Characters (\u200B) to detect
-        if the text contains a hidden binary watermark.
+        score = ai_score.score if ai_score is not None else 0.0
+        if not trap_hit:
+            return score
+        return 1.0 - (1.0 - settings.HONEYPOT_TRAP_EVIDENCE) * (1.0 - score)
+
+    # ---------------------------------------------------------
+    # ZERO-WIDTH WATERMARKS (Leak Attribution)
+    # ---------------------------------------------------------
+    @staticmethod
+    def watermark_question(text: str, user_id: int) -> str:
+        """
+        Embeds the student's invisible watermark into question text
+        before it is served to them.
+        """
+        watermark_index.register(user_id)
+        return codec.embed(text, user_id, every_words=settings.WATERMARK_EVERY_WORDS)
+
+    @staticmethod
+    def trace_leak(text: str, db: Optional[Session] = None) -> List[LeakAttribution]:
+        """
+        Decodes every watermark in `text` (e.g. a forum dump) and resolves
+        each one to the student the question was served to.
+        """
+        hits = codec.decode(text)
+        if not hits:
+            return []
+
+        grouped: Dict[int, List[int]] = {}
+        for hit in hits:
+            grouped.setdefault(hit.token, []).append(hit.offset)
+        owners = watermark_index.resolve(grouped.keys(), db=db)
+
+        return [
+            LeakAttribution(
+                user_id=owners[token],
+                token=format(token, "012x"),
+                occurrences=len(offsets),
+                first_offset=offsets[0],
+            )
+            for token, offsets in grouped.items()
+        ]
+
+    def detect_watermark(self, text: str, db: Optional[Session] = None) -> Optional[int]:
+        """
+        Advanced: Decodes the zero-width watermark in `text` back into the
+        ID of the student who leaked the question.
         
-        Used to track which student leaked the question.
+        Returns the first attributable user id, or None.
         """
-        # In a full implementation, you would decode the binary sequence 
-        # of zero-width spaces back into an Integer ID.
-        # For now, we detect the presence of the marker.
-        if "\u200B" in text:
-            logger.info("Watermark detected in submission text.")
-            return True
-        return False
+        for leak in self.trace_leak(text, db=db):
+            if leak.user_id is not None:
+                logger.info(f"Watermark detected in submission text (student {leak.user_id}).")
+                return leak.user_id
+        return None
 
 # Instantiate for easy import
 honeypot_service = HoneypotService()
\ No newline at end of file
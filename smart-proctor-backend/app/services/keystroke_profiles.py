@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.keystroke_stats import KeystrokeStats
+from app.db.session import SessionLocal
+from app.services.write_behind import BackgroundFlusher
+
+# Configure module-level logger
+logger = logging.getLogger(__name__)
+
+class KeystrokeProfileStore(BackgroundFlusher):
+    """
+    Coalescing write buffer for keystroke profiles.
+
+    Updates are folded into a per-user in-memory delta (O(samples), no I/O).
+    The flusher thread swaps the pending map out every flush interval and
+    merges all deltas in one transaction (crud.keystroke.merge_many).
+    However many updates a user gets in an interval, their row is locked and
+    written once. Each user's delta is one group for the retry policy (see
+    BackgroundFlusher), so a rejected delta costs only that user's interval.
+    """
+
+    PRUNE_INTERVAL_SECONDS = 3600
+    name = "keystroke profile store"
+
+    def __init__(self, flush_interval_ms: int, max_pending_users: int):
+        super().__init__()
+        self._flush_interval = flush_interval_ms / 1000.0
+        self._max_pending = max_pending_users
+        self._pending: Dict[int, KeystrokeStats] = {}
+        self._lock = threading.Lock()
+
+        # STATS (guarded by _lock)
+        self._updates = 0
+        self._coalesced = 0
+
+    @staticmethod
+    def build_delta(
+            flight_times: Iterable[float] = (),
+            dwell_times: Iterable[float] = (),
+    ) -> KeystrokeStats:
+        delta = KeystrokeStats()
+        delta.flight.add_many(flight_times)
+        delta.dwell.add_many(dwell_times)
+        return delta
+
+    def record(self, user_id: int, delta: KeystrokeStats) -> bool:
+        """
+        Queues `delta` for `user_id`. Returns False when the store is not
+        running or too many users are pending; the caller then writes
+        synchronously with `write`.
+        """
+        if not self.running or self._stopping.is_set():
+            return False
+        with self._lock:
+            pending = self._pending.get(user_id)
+            if pending is None:
+                if len(self._pending) >= self._max_pending:
+                    return False
+                self._pending[user_id] = delta
+            else:
+                pending.merge(delta)
+                self._coalesced += 1
+            self._updates += 1
+        return True
+
+    def write(self, deltas: Dict[int, KeystrokeStats]) -> int:
+        """
+        Merges `deltas` immediately, in the calling thread.
+        """
+        db = SessionLocal()
+        try:
+            return crud.keystroke.merge_many(db, deltas=deltas)
+        finally:
+            db.close()
+
+    def write_batch(self, items: List[Tuple[Optional[str], int, KeystrokeStats]]) -> List[str]:
+        """
+        Applies idempotent (key, user_id, delta) items immediately and returns
+        a status per item. See crud.keystroke.merge_batch.
+        """
+        db = SessionLocal()
+        try:
+            return crud.keystroke.merge_batch(db, items=items)
+        finally:
+            db.close()
+
+    def pending_for(self, user_id: int) -> Optional[KeystrokeStats]:
+        """
+        Copy of this worker's not-yet-flushed delta for `user_id`.
+        """
+        with self._lock:
+            pending = self._pending.get(user_id)
+            return pending.copy() if pending is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buffered = {
+                "running": self.running,
+                "pending_users": len(self._pending),
+                "updates": self._updates,
+                "coalesced": self._coalesced,
+            }
+        return {**buffered, **self._flush_stats()}
+
+    def _swap(self) -> Dict[int, KeystrokeStats]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def _flush_deltas(self, deltas: Dict[int, KeystrokeStats]) -> None:
+        if deltas:
+            self._flush([[item] for item in deltas.items()])
+
+    def _run(self) -> None:
+        last_prune = 0.0
+        while not self._stopping.wait(self._flush_interval):
+            self._flush_deltas(self._swap())
+            if time.monotonic() - last_prune > self.PRUNE_INTERVAL_SECONDS:
+                last_prune = time.monotonic()
+                self._prune_update_keys()
+
+    def _prune_update_keys(self) -> None:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.KEYSTROKE_UPDATE_KEY_TTL_HOURS)
+        db = SessionLocal()
+        try:
+            pruned = crud.keystroke.prune_update_keys(db, older_than=cutoff)
+        except Exception:
+            logger.exception("Pruning keystroke update keys failed.")
+            return
+        finally:
+            db.close()
+        if pruned:
+            logger.info(f"Pruned {pruned} keystroke update keys.")
+
+    def _drain(self) -> None:
+        self._flush_deltas(self._swap())
+
+    def _persist(self, db: Session, rows: List[Tuple[int, KeystrokeStats]]) -> None:
+        crud.keystroke.merge_many(db, deltas=dict(rows))
+
+    def _lost(self, rows: List[Tuple[int, KeystrokeStats]], error: Exception) -> None:
+        logger.error(
+            f"Dropped keystroke updates for {len(rows)} users ({error}): "
+            f"{[user_id for user_id, _ in rows]}"
+        )
+
+# Instantiate for easy import
+keystroke_profiles = KeystrokeProfileStore(
+    flush_interval_ms=settings.KEYSTROKE_FLUSH_INTERVAL_MS,
+    max_pending_users=settings.KEYSTROKE_MAX_PENDING_USERS,
+)
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import Row
+
+# ---------------------------------------------------------
+# INTEGRITY LOG EXPORT ENCODERS
+# ---------------------------------------------------------
+# Each encoder turns one chunk of rows from crud.integrity.stream_async into
+# one bytes chunk. Nothing is accumulated across chunks, so the response
+# body is produced in constant memory.
+
+EXPORT_FIELDS = ("id", "timestamp", "student_id", "violation_type", "evidence_score", "metadata_log")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def encode_ndjson(rows: Sequence[Row]) -> bytes:
+    dumps = json.dumps
+    lines = [
+        dumps(dict(zip(EXPORT_FIELDS, row)), default=_json_default, separators=(",", ":"))
+        for row in rows
+    ]
+    lines.append("")
+    return "\n".join(lines).encode()
+
+def csv_header() -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_FIELDS)
+    return buffer.getvalue().encode()
+
+def encode_csv(rows: Sequence[Row]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        (id_, ts.isoformat() if ts else "", student_id, violation_type,
+         "" if score is None else score, metadata_log or "")
+        for id_, ts, student_id, violation_type, score, metadata_log in rows
+    )
+    return buffer.getvalue().encode()
+
+async def encode_export(
+        chunks: AsyncIterator[Sequence[Row]],
+        fmt: str,
+        compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Streams `chunks` as NDJSON or CSV, optionally as one gzip member.
+    """
+    encode = encode_csv if fmt == "csv" else encode_ndjson
+    # wbits=31 -> gzip container; output is flushed per chunk so the client
+    # sees progress instead of waiting for the compressor's window to fill.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def emit(data: bytes) -> bytes:
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    if fmt == "csv":
+        yield emit(csv_header())
+    async for rows in chunks:
+        yield emit(encode(rows))
+    if compressor is not None:
+        yield compressor.flush()
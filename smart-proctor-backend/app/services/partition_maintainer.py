@@ -0,0 +1,117 @@
+import logging
+import threading
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+# Configure module-level logger
+logger = logging.getLogger(__name__)
+
+class PartitionRunwayTooShort(RuntimeError):
+    """
+    Fewer than VIOLATION_PARTITION_MIN_RUNWAY_DAYS are covered by range
+    partitions and creating more failed.
+    """
+
+class PartitionMaintainer:
+    """
+    Keeps integrity_violations partitions ahead from inside the app, so a
+    deployment that runs for months without a redeploy (start.sh runs
+    app.partition_maintenance) never outruns its partitions.
+
+    `check` runs crud.partition.ensure, then measures the runway: the time
+    until the first timestamp without a range partition. Every worker calls
+    it on startup (raising PartitionRunwayTooShort if the runway is short,
+    so the worker fails to boot instead of quietly degrading) and a daemon
+    thread repeats it every interval (logging instead). Concurrent runs
+    from several workers serialize on crud.partition's advisory lock.
+    Retention (expire) is left to app.partition_maintenance.
+    """
+
+    def __init__(self, ahead: int, interval_seconds: float, min_runway_days: int):
+        self._ahead = ahead
+        self._interval = interval_seconds
+        self._min_runway = timedelta(days=min_runway_days)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._runway: Optional[timedelta] = None
+        self._default_rows = 0
+        self._checks = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="partition-maintainer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def check(self, strict: bool = False) -> timedelta:
+        """
+        Creates missing partitions and returns the runway. A short runway
+        raises when `strict`, otherwise it is logged as an error.
+        """
+        db = SessionLocal()
+        try:
+            try:
+                for name in crud.partition.ensure(db, ahead=self._ahead):
+                    logger.info(f"Created partition {name}.")
+            except Exception:
+                db.rollback()
+                logger.exception("Creating violation partitions failed.")
+            runway = crud.partition.runway(db)
+            default_rows = crud.partition.default_rows(db)
+        finally:
+            db.close()
+        self._runway, self._default_rows = runway, default_rows
+        self._checks += 1
+
+        if default_rows:
+            logger.warning(
+                f"{default_rows} violations are in the default partition (no range partition "
+                f"covers them); they move when their partition is created."
+            )
+        if runway < self._min_runway:
+            message = (
+                f"Violation partitions cover only {runway} from now "
+                f"(minimum {self._min_runway.days} days): check VIOLATION_PARTITIONS_AHEAD and the logs above."
+            )
+            if strict:
+                raise PartitionRunwayTooShort(message)
+            logger.error(message)
+        return runway
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "checks": self._checks,
+            "runway_days": round(self._runway.total_seconds() / 86400, 2) if self._runway is not None else None,
+            "default_partition_rows": self._default_rows,
+        }
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self._interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Violation partition check failed.")
+
+# Instantiate for easy import
+partition_maintainer = PartitionMaintainer(
+    ahead=settings.VIOLATION_PARTITIONS_AHEAD,
+    interval_seconds=settings.VIOLATION_PARTITION_CHECK_INTERVAL_SECONDS,
+    min_runway_days=settings.VIOLATION_PARTITION_MIN_RUNWAY_DAYS,
+)
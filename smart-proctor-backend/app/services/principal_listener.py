@@ -0,0 +1,92 @@
+import asyncio
+import contextvars
+import logging
+from typing import Any, Dict, Optional
+
+import psycopg
+from psycopg import sql
+
+from app.core.config import settings
+from app.core.principal_cache import PrincipalCache, principal_cache
+
+# Configure module-level logger
+logger = logging.getLogger(__name__)
+
+class PrincipalListener:
+    """
+    Applies other workers' principal cache invalidations to this worker.
+
+    One LISTEN connection per worker on the cache's channel; every
+    notification carries a users.id whose cached tokens are dropped. While
+    the connection is down notifications are lost, so the whole cache is
+    cleared on every (re)connect. Does nothing when the cache has no
+    channel (single worker).
+    """
+
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(self, cache: PrincipalCache, listen_dsn: str):
+        self._cache = cache
+        self._listen_dsn = listen_dsn
+        self._task: Optional[asyncio.Task] = None
+
+        # STATS
+        self.listening = False
+        self._notifications = 0
+        self._reconnects = 0
+
+    def start(self) -> None:
+        if self._cache.channel is None or self._task is not None:
+            return
+        # A fresh context: the listener must not inherit a query profile.
+        self._task = asyncio.create_task(self._listen(), name="principal-listener", context=contextvars.Context())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._listen_dsn, autocommit=True) as conn:
+                    await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self._cache.channel)))
+                    self._cache.clear()
+                    self.listening = True
+                    logger.info(f"Principal cache listening on '{self._cache.channel}'.")
+                    async for notify in conn.notifies():
+                        self._notifications += 1
+                        try:
+                            user_id = int(notify.payload)
+                        except ValueError:
+                            logger.warning(f"Ignoring principal invalidation {notify.payload!r}.")
+                            continue
+                        self._cache.invalidate_user(user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Principal cache listener lost: {e}")
+            finally:
+                self.listening = False
+            self._reconnects += 1
+            await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._cache.channel is not None,
+            "listening": self.listening,
+            "notifications": self._notifications,
+            "listener_reconnects": self._reconnects,
+        }
+
+# Instantiate for easy import
+principal_listener = PrincipalListener(
+    principal_cache,
+    listen_dsn=settings.VIOLATION_FEED_LISTEN_DSN
+    or settings.SQLALCHEMY_DATABASE_URI.replace("postgresql+psycopg://", "postgresql://", 1),
+)
@@ -0,0 +1,184 @@
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+class TrapMatch(NamedTuple):
+    phrase: str                 # trap phrase as configured by the examiner
+    start: int                  # offset of the first matched char in the answer
+    end: int                    # offset one past the last matched char
+    question_id: Optional[str]  # None = exam-wide trap
+
+# ---------------------------------------------------------
+# CHARACTER FOLDING
+# ---------------------------------------------------------
+# Answers and trap phrases are compared after folding every character:
+#   - NFKD compatibility decomposition (fullwidth 'Ｃ' -> 'C', 'ﬁ' -> 'fi')
+#   - combining marks dropped, so 'Cybérdyne' still matches 'Cyberdyne'
+#   - format chars (zero-width space/joiner, BOM) dropped, so they can't
+#     be used to split a trap word
+#   - full Unicode casefold ('ß' -> 'ss')
+# Folding is per character, so the answer is never copied. Latin characters
+# come from a fixed table; the rest go through a bounded LRU, since answers
+# are student-controlled and could otherwise walk the whole Unicode range
+# into an ever-growing cache.
+FOLD_LRU_SIZE = 4096
+
+def _fold(ch: str) -> str:
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", ch)
+        if unicodedata.category(c) not in ("Mn", "Cf")
+    ).casefold()
+
+# ASCII, Latin-1 Supplement, Latin Extended-A and -B.
+_FOLD_TABLE: Dict[str, str] = {chr(cp): _fold(chr(cp)) for cp in range(0x250)}
+_fold_other = lru_cache(maxsize=FOLD_LRU_SIZE)(_fold)
+
+def fold_char(ch: str) -> str:
+    folded = _FOLD_TABLE.get(ch)
+    if folded is None:
+        folded = _fold_other(ch)
+    return folded
+
+def fold_text(text: str) -> str:
+    return "".join(fold_char(ch) for ch in text)
+
+# ---------------------------------------------------------
+# AHO-CORASICK AUTOMATON
+# ---------------------------------------------------------
+class TrapAutomaton:
+    """
+    Multi-pattern matcher over folded text (Aho-Corasick).
+
+    Built once per exam; `scan` walks the answer in a single linear pass
+    whose cost depends on the answer length and the number of matches,
+    not on how many trap phrases the exam has.
+    """
+
+    def __init__(self, traps: Iterable[Tuple[str, Optional[str]]]):
+        # State 0 is the root. Per state: outgoing edges, failure link,
+        # and indices (into self._traps) of every phrase ending there.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        # (phrase, question_id, folded length)
+        self._traps: List[Tuple[str, Optional[str], int]] = []
+
+        for phrase, question_id in traps:
+            self._insert(phrase, question_id)
+        self._max_len = max((length for _, _, length in self._traps), default=0)
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self._traps)
+
+    def _insert(self, phrase: str, question_id: Optional[str]) -> None:
+        folded = fold_text(phrase).strip()
+        if not folded:
+            return
+        state = 0
+        for ch in folded:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] += (len(self._traps),)
+        self._traps.append((phrase, question_id, len(folded)))
+
+    def _build_failure_links(self) -> None:
+        # Breadth-first, so a state's failure target is always finalized
+        # before its children are processed.
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for ch, nxt in self._goto[state].items():
+                pending.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                # Inherit outputs of the suffix state (e.g. 'dyne' inside 'cyberdyne').
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def scan(self, text: str, question_id: Optional[str] = None) -> List[TrapMatch]:
+        """
+        Returns every trap occurrence in `text` with offsets into the original
+        (unfolded) string. Question-scoped traps only count for their question;
+        with question_id=None every trap of the exam applies.
+        """
+        if not self._traps or not text:
+            return []
+
+        goto, fail, out, traps = self._goto, self._fail, self._out, self._traps
+        table = _FOLD_TABLE
+        # Ring buffer: original offset of each of the last `size` folded chars,
+        # used to map a match's folded start back into `text`.
+        size = self._max_len
+        origin = [0] * size
+        folded_pos = 0
+        state = 0
+        matches: List[TrapMatch] = []
+
+        for i, ch in enumerate(text):
+            folded = table.get(ch)
+            if folded is None:
+                folded = _fold_other(ch)
+            for fc in folded:
+                while state and fc not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(fc, 0)
+                origin[folded_pos % size] = i
+                folded_pos += 1
+                if out[state]:
+                    for idx in out[state]:
+                        phrase, scope, length = traps[idx]
+                        if scope is not None and question_id is not None and scope != question_id:
+                            continue
+                        start = origin[(folded_pos - length) % size]
+                        matches.append(TrapMatch(phrase, start, i + 1, scope))
+        return matches
+
+# ---------------------------------------------------------
+# PER-EXAM CACHE
+# ---------------------------------------------------------
+class TrapScannerCache:
+    """
+    Bounded LRU of compiled automata keyed by exam_id.
+    Entries expire after `ttl_seconds` so trap edits made through another
+    worker are picked up without coordination.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._maxsize = maxsize
+        self._ttl = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, TrapAutomaton]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, exam_id: str) -> Optional[TrapAutomaton]:
+        with self._lock:
+            entry = self._entries.get(exam_id)
+            if entry is None:
+                return None
+            expires_at, automaton = entry
+            if expires_at < time.monotonic():
+                del self._entries[exam_id]
+                return None
+            self._entries.move_to_end(exam_id)
+            return automaton
+
+    def put(self, exam_id: str, automaton: TrapAutomaton) -> None:
+        with self._lock:
+            self._entries[exam_id] = (time.monotonic() + self._ttl, automaton)
+            self._entries.move_to_end(exam_id)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, exam_id: str) -> None:
+        with self._lock:
+            self._entries.pop(exam_id, None)
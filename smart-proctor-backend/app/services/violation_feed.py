@@ -0,0 +1,190 @@
+import asyncio
+import contextvars
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+import psycopg
+from psycopg import sql
+
+from app import crud
+from app.core.config import settings
+from app.core.violation_events import ViolationEvents, violation_events
+from app.db.session import AsyncSessionLocal
+
+# Configure module-level logger
+logger = logging.getLogger(__name__)
+
+class FeedClient:
+    """
+    One connected SSE client: its filters and its bounded event queue.
+    A `None` in the queue means the client was dropped.
+    """
+
+    def __init__(self, queue_size: int, violation_type: Optional[str], student_id: Optional[int]):
+        self.queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(maxsize=queue_size)
+        self.violation_type = violation_type
+        self.student_id = student_id
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        return (
+            (self.violation_type is None or event["violation_type"] == self.violation_type)
+            and (self.student_id is None or event["student_id"] == self.student_id)
+        )
+
+class ViolationFeed:
+    """
+    Fans committed violations out to this worker's SSE clients.
+
+    In "notify" mode one LISTEN connection per worker (opened with the
+    first client) receives the ids of every committed batch, and one
+    query per batch reads the rows for all clients. In "local" mode the
+    rows come straight from crud.integrity in this process.
+
+    Fan-out never waits: a client whose queue is full is dropped and told
+    so, and resumes with Last-Event-ID. The same happens to every client
+    when the LISTEN connection is lost, since notifications sent while it
+    was down are gone.
+    """
+
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(self, events: ViolationEvents, listen_dsn: str, client_queue_size: int):
+        self._events = events
+        self._listen_dsn = listen_dsn
+        self._client_queue_size = client_queue_size
+        self._clients: Set[FeedClient] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._local_registered = False
+
+        # STATS
+        self.listening = False
+        self._delivered = 0
+        self._dropped = 0
+        self._notifications = 0
+        self._reconnects = 0
+
+    @property
+    def mode(self) -> str:
+        return self._events.mode
+
+    # ---------------------------------------------------------
+    # CLIENTS (event loop only)
+    # ---------------------------------------------------------
+    def subscribe(self, *, violation_type: Optional[str] = None, student_id: Optional[int] = None) -> FeedClient:
+        self._loop = asyncio.get_running_loop()
+        if self.mode == "notify":
+            if self._listener is None or self._listener.done():
+                # A fresh context: the listener outlives the request that started
+                # it and must not inherit its query profile.
+                self._listener = asyncio.create_task(
+                    self._listen(), name="violation-feed-listener", context=contextvars.Context()
+                )
+        elif not self._local_registered:
+            self._events.add_listener(self._from_writer)
+            self._local_registered = True
+        client = FeedClient(self._client_queue_size, violation_type, student_id)
+        self._clients.add(client)
+        return client
+
+    def unsubscribe(self, client: FeedClient) -> None:
+        self._clients.discard(client)
+
+    def _drop(self, client: FeedClient) -> None:
+        self._clients.discard(client)
+        self._dropped += 1
+        while not client.queue.empty():
+            client.queue.get_nowait()
+        client.queue.put_nowait(None)
+
+    def _fan_out(self, events: List[Dict[str, Any]]) -> None:
+        for client in list(self._clients):
+            for event in events:
+                if not client.wants(event):
+                    continue
+                try:
+                    client.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    self._drop(client)
+                    break
+                self._delivered += 1
+
+    def _from_writer(self, events: List[Dict[str, Any]]) -> None:
+        # Local mode: called on the writer's thread (the sink's or the loop's).
+        if self._clients and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._fan_out, events)
+
+    # ---------------------------------------------------------
+    # LISTEN / NOTIFY
+    # ---------------------------------------------------------
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._listen_dsn, autocommit=True) as conn:
+                    await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self._events.channel)))
+                    self.listening = True
+                    logger.info(f"Violation feed listening on '{self._events.channel}'.")
+                    async for notify in conn.notifies():
+                        self._notifications += 1
+                        if self._clients:
+                            await self._deliver(json.loads(notify.payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Violation feed listener lost: {e}")
+            finally:
+                if self.listening:
+                    self.listening = False
+                    for client in list(self._clients):
+                        self._drop(client)
+            self._reconnects += 1
+            await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+    async def _deliver(self, payload: Dict[str, Any]) -> None:
+        async with AsyncSessionLocal() as db:
+            rows = await crud.integrity.get_by_ids_async(
+                db, ids=payload["ids"], since=datetime.fromisoformat(payload["since"])
+            )
+        self._fan_out([
+            {
+                "id": row.id,
+                "student_id": row.student_id,
+                "violation_type": row.violation_type,
+                "evidence_score": row.evidence_score,
+                "metadata_log": row.metadata_log,
+                "timestamp": row.timestamp,
+            }
+            for row in rows
+        ])
+
+    async def stop(self) -> None:
+        for client in list(self._clients):
+            self._drop(client)
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "listening": self.listening,
+            "clients": len(self._clients),
+            "delivered": self._delivered,
+            "dropped_clients": self._dropped,
+            "notifications": self._notifications,
+            "listener_reconnects": self._reconnects,
+        }
+
+# Instantiate for easy import
+violation_feed = ViolationFeed(
+    violation_events,
+    listen_dsn=settings.VIOLATION_FEED_LISTEN_DSN
+    or settings.SQLALCHEMY_DATABASE_URI.replace("postgresql+psycopg://", "postgresql://", 1),
+    client_queue_size=settings.VIOLATION_FEED_CLIENT_QUEUE,
+)
@@ -0,0 +1,271 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+
+# Configure module-level logger
+logger = logging.getLogger(__name__)
+
+class BackgroundFlusher:
+    """
+    Daemon thread that persists buffered writes, and the retry policy for it.
+
+    A flush writes a batch made of groups (items that must land together)
+    in one transaction. Connection-level failures are retried with backoff.
+    A batch the database rejects (IntegrityError / DataError, e.g. a FK to
+    a deleted user) is retried group by group, and only the groups that
+    still fail are quarantined, so one bad item can't take the others down
+    with it. Rejected rows are never retried unchanged.
+
+    Subclasses implement `_run` (the thread body, which exits once
+    `_stopping` is set), `_drain` (the final flush after the thread
+    stopped), `_persist` (write and commit one batch) and `_lost`, and set
+    `name` (thread name and log prefix).
+    """
+
+    MAX_FLUSH_ATTEMPTS = 3
+    name = "background flusher"
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+        # ---------------------------------------------------------
+        # STATS (guarded by _stats_lock)
+        # ---------------------------------------------------------
+        self._stats_lock = threading.Lock()
+        self._written = 0
+        self._failed = 0
+        self._quarantined = 0
+        self._flushes = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=self.name.replace(" ", "-"), daemon=True
+        )
+        self._thread.start()
+        logger.info(f"{self.name.capitalize()} started.")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """
+        Signals the flusher to drain whatever is still buffered and waits
+        for it. Called from the lifespan shutdown hook.
+        """
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error(f"{self.name.capitalize()} did not drain within {timeout}s.")
+        else:
+            logger.info(f"{self.name.capitalize()} drained and stopped.")
+        self._thread = None
+        # Anything that slipped in while the flusher was exiting is written here.
+        self._drain()
+
+    def _flush_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "written": self._written,
+                "failed": self._failed,
+                "quarantined": self._quarantined,
+                "flushes": self._flushes,
+                "last_flush_ms": round(self._last_flush_ms, 3),
+                "max_flush_ms": round(self._max_flush_ms, 3),
+                "avg_flush_ms": round(self._total_flush_ms / self._flushes, 3) if self._flushes else 0.0,
+            }
+
+    def _run(self) -> None:
+        raise NotImplementedError
+
+    def _drain(self) -> None:
+        raise NotImplementedError
+
+    # ---------------------------------------------------------
+    # WRITING
+    # ---------------------------------------------------------
+    def _flush(self, groups: List[List[Any]]) -> None:
+        rows = [row for group in groups for row in group]
+        rejected = self._write(rows)
+        if rejected is None:
+            return
+        if len(groups) == 1 or not isinstance(rejected, (IntegrityError, DataError)):
+            # The database is unreachable, not picky: splitting won't help.
+            self._quarantine(rows, rejected)
+            return
+
+        # Find the offending groups: each one gets its own transaction.
+        logger.warning(
+            f"{self.name.capitalize()}: batch rejected ({getattr(rejected, 'orig', rejected)}); "
+            f"retrying its {len(groups)} groups one by one."
+        )
+        for group in groups:
+            rejected = self._write(group)
+            if rejected is not None:
+                self._quarantine(group, rejected)
+
+    def _write(self, rows: List[Any]) -> Optional[Exception]:
+        """
+        Persists `rows` in one transaction. Connection-level failures are
+        retried; returns None once written, or the error when the database
+        rejects the rows themselves (retrying them unchanged is pointless)
+        or the attempts run out.
+        """
+        for attempt in range(1, self.MAX_FLUSH_ATTEMPTS + 1):
+            started = time.perf_counter()
+            try:
+                with SessionLocal() as db:
+                    self._persist(db, rows)
+            except (IntegrityError, DataError) as e:
+                return e
+            except Exception as e:
+                logger.warning(f"{self.name.capitalize()}: flush attempt {attempt} failed: {e}")
+                if attempt == self.MAX_FLUSH_ATTEMPTS:
+                    return e
+                time.sleep(0.1 * attempt)
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._stats_lock:
+                self._written += len(rows)
+                self._flushes += 1
+                self._last_flush_ms = elapsed_ms
+                self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+                self._total_flush_ms += elapsed_ms
+            return None
+
+    def _persist(self, db: Session, rows: List[Any]) -> None:
+        raise NotImplementedError
+
+    def _quarantine(self, rows: List[Any], error: Exception) -> None:
+        with self._stats_lock:
+            if isinstance(error, (IntegrityError, DataError)):
+                self._quarantined += len(rows)
+            else:
+                self._failed += len(rows)
+        self._lost(rows, getattr(error, "orig", error))
+
+    def _lost(self, rows: List[Any], error: Exception) -> None:
+        logger.error(f"{self.name.capitalize()}: dropped {len(rows)} rows ({error}): {rows}")
+
+class WriteBehindSink(BackgroundFlusher):
+    """
+    Write-behind buffer for rows of one table.
+
+    Request handlers enqueue rows and return immediately. The flusher
+    drains the bounded queue and persists everything it collected within
+    one flush window (or up to `batch_size` rows) as a single transaction,
+    so request latency no longer includes a WAL fsync per write. Each
+    `submit_many` call is one group (see BackgroundFlusher).
+
+    Subclasses implement `_persist` and set `name`.
+    """
+
+    name = "write-behind sink"
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval_ms: int):
+        super().__init__()
+        # Each queue item is a list of rows that must land in the same transaction.
+        self._queue: "queue.Queue[List[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval_ms / 1000.0
+        self._enqueued = 0
+        self._rejected = 0
+
+    def submit_many(self, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Enqueues rows that are persisted together in one transaction.
+
+        Returns False when the sink is not running or the queue is full;
+        the caller is then expected to write the rows synchronously.
+        """
+        if not rows:
+            return True
+        if not self.running or self._stopping.is_set():
+            return False
+        try:
+            self._queue.put_nowait(rows)
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += len(rows)
+            return False
+        with self._stats_lock:
+            self._enqueued += len(rows)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            queued = {
+                "running": self.running,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "enqueued": self._enqueued,
+                "rejected": self._rejected,
+            }
+        return {**queued, **self._flush_stats()}
+
+    # ---------------------------------------------------------
+    # FLUSHER THREAD
+    # ---------------------------------------------------------
+    def _run(self) -> None:
+        while True:
+            groups = self._collect_batch()
+            if groups:
+                self._flush(groups)
+            elif self._stopping.is_set():
+                return
+
+    def _drain(self) -> None:
+        leftovers: List[List[Dict[str, Any]]] = []
+        while True:
+            try:
+                leftovers.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftovers:
+            self._flush(leftovers)
+
+    def _collect_batch(self) -> List[List[Dict[str, Any]]]:
+        """
+        Blocks for the first group, then keeps pulling until the flush window
+        closes or the batch holds `batch_size` rows. Groups submitted
+        together are never split.
+        """
+        try:
+            groups = [self._queue.get(timeout=self._flush_interval)]
+        except queue.Empty:
+            return []
+
+        size = len(groups[0])
+        deadline = time.monotonic() + self._flush_interval
+        while size < self._batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and not self._stopping.is_set():
+                break
+            try:
+                # While draining on shutdown we don't wait for stragglers.
+                if self._stopping.is_set():
+                    group = self._queue.get_nowait()
+                else:
+                    group = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            groups.append(group)
+            size += len(group)
+        return groups
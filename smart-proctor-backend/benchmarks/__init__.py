@@ -0,0 +1,9 @@
+"""
+Offline performance benchmarks for the VerifAI backend.
+
+Run from the backend root so the 'app' package is importable, e.g.:
+    python -m benchmarks.bench_async_db --requests 5000
+
+benchmarks.bench_suite times the hot paths together and compares the
+results against a saved JSON baseline.
+"""
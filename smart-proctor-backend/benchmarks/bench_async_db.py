@@ -0,0 +1,128 @@
+"""
+Side-by-side throughput benchmark: sync SessionLocal vs async AsyncSessionLocal.
+
+Both paths execute the same per-request DB work (load one user by primary key,
+then an optional server-side sleep that stands in for network RTT / commit
+latency). The sync path is dispatched the way FastAPI runs a plain `def`
+route: through Starlette's shared threadpool. The async path awaits the DB
+directly on the event loop, the way the ported routes now do.
+
+Requires a reachable Postgres configured through the usual POSTGRES_* settings
+and at least one row in 'users' (run `python -m app.initial_data` first).
+
+Usage:
+    python -m benchmarks.bench_async_db --requests 5000 --db-latency-ms 2
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import select, text
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.models.user import User
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def _sync_request(user_id: int, latency_s: float) -> None:
+    with SessionLocal() as db:
+        crud.user.get(db, id=user_id)
+        if latency_s:
+            db.execute(text("SELECT pg_sleep(:s)"), {"s": latency_s})
+
+async def _async_request(user_id: int, latency_s: float) -> None:
+    async with AsyncSessionLocal() as db:
+        await crud.user.get_async(db, id=user_id)
+        if latency_s:
+            await db.execute(text("SELECT pg_sleep(:s)"), {"s": latency_s})
+
+async def _drive(
+        label: str,
+        request: Callable[[], Awaitable[None]],
+        total: int,
+) -> Dict[str, float]:
+    """
+    Launches every request at once (worst case: an exam-closing burst)
+    and measures each request's end-to-end latency.
+    """
+    latencies: List[float] = []
+    errors = 0
+    peak_threads = threading.active_count()
+
+    async def one() -> None:
+        nonlocal errors, peak_threads
+        started = time.perf_counter()
+        try:
+            await request()
+        except Exception:
+            errors += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+        peak_threads = max(peak_threads, threading.active_count())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "path": label,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "peak_threads": peak_threads,
+    }
+
+async def main(total: int, latency_ms: float) -> None:
+    latency_s = latency_ms / 1000.0
+
+    async with AsyncSessionLocal() as db:
+        user_id = await db.scalar(select(User.id).limit(1))
+    if user_id is None:
+        raise SystemExit("No users found. Run `python -m app.initial_data` first.")
+
+    # Warm both pools so connection setup is not part of the measurement.
+    await _drive("warmup-sync", lambda: run_in_threadpool(_sync_request, user_id, 0), 50)
+    await _drive("warmup-async", lambda: _async_request(user_id, 0), 50)
+
+    results = [
+        await _drive(
+            "sync (threadpool + SessionLocal)",
+            lambda: run_in_threadpool(_sync_request, user_id, latency_s),
+            total,
+        ),
+        await _drive(
+            "async (event loop + AsyncSession)",
+            lambda: _async_request(user_id, latency_s),
+            total,
+        ),
+    ]
+
+    header = f"{'path':<36}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}{'threads':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['path']:<36}{r['throughput_rps']:>10}{r['p50_ms']:>10}"
+            f"{r['p95_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}{r['peak_threads']:>9}"
+        )
+
+    await async_engine.dispose()
+    engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests fired concurrently per path")
+    parser.add_argument("--db-latency-ms", type=float, default=2.0, help="simulated server-side latency per request")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.db_latency_ms))
@@ -0,0 +1,63 @@
+"""
+CPU benchmark of the keystroke biometrics engine (app/services/biometrics.py).
+
+Times the pure NumPy stages for a batch of synthetic windows spread over many
+students: padding raw sample lists, feature extraction, batched Mahalanobis
+scoring and the per-student enrollment statistics. No database is touched.
+
+Usage:
+    python -m benchmarks.bench_biometrics --windows 10000 --students 2000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.biometrics import (
+    N_FEATURES, KeystrokeWindow, biometric_engine, group_stats, mahalanobis,
+)
+
+def _timed(label: str, fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<22} {best * 1000:8.1f} ms")
+    return result, best
+
+def main(n_windows: int, n_students: int, samples: int, repeat: int) -> None:
+    rng = np.random.default_rng(42)
+    students = rng.integers(0, n_students, n_windows)
+    base_flight = rng.uniform(90, 250, n_students)[students]
+    base_dwell = rng.uniform(60, 130, n_students)[students]
+    flight = [rng.normal(f, 30, samples).tolist() for f in base_flight]
+    dwell = [rng.normal(d, 15, samples).tolist() for d in base_dwell]
+    batch = [KeystrokeWindow(int(uid), f, d) for uid, f, d in zip(students, flight, dwell)]
+
+    print(f"{n_windows} windows x {samples} samples, {n_students} students (best of {repeat})")
+    (features, valid), t_feat = _timed("pad + featurize", lambda: biometric_engine.featurize(batch), repeat)
+
+    # Synthetic models: every student enrolled with the features themselves.
+    user_ids, groups = np.unique(students, return_inverse=True)
+    (counts, means, m2s), t_group = _timed(
+        "group stats (enroll)", lambda: group_stats(features, groups, len(user_ids)), repeat
+    )
+    counts = np.maximum(counts, 30)
+    _, t_score = _timed(
+        "mahalanobis",
+        lambda: mahalanobis(features, counts[groups], means[groups], m2s[groups]),
+        repeat,
+    )
+    total = t_feat + t_group + t_score
+    print(f"  {'total':<22} {total * 1000:8.1f} ms  ({n_windows / total:,.0f} windows/s, "
+          f"{valid.mean():.1%} valid, {N_FEATURES} features)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--windows", type=int, default=10000)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=64, help="samples per window")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.windows, args.students, args.samples, args.repeat)
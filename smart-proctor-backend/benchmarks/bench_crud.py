@@ -0,0 +1,109 @@
+"""
+CRUDBase writes: INSERT/UPDATE ... RETURNING vs the previous
+add -> commit -> refresh pattern (app/crud/base.py).
+
+Times single-row create and update, and --rows rows written one by one vs
+through bulk_create / bulk_update, on the honeypot_traps table. Reports
+latency per call and statements per call (app.core.query_profiler), since
+every statement saved is a round trip: on a remote database the gap grows
+by about one RTT per saved statement. Rows written here are deleted at the
+end.
+
+The output starts with the environment (git revision, Python, platform,
+CPUs, Postgres version) and the round trip of a bare SELECT 1, the floor
+every statement pays; compare runs only within one environment.
+
+Requires a reachable Postgres configured through the usual POSTGRES_*
+settings with the migrations applied.
+
+Usage:
+    python -m benchmarks.bench_crud --repeat 2000 --rows 500
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, text
+
+from app import crud
+from app.core.query_profiler import profile_queries
+from app.db.session import SessionLocal
+from app.models.honeypot import HoneypotTrap
+from benchmarks.bench_suite import environment
+
+EXAM_ID = "bench-crud"
+
+# ---------------------------------------------------------
+# THE PREVIOUS IMPLEMENTATION
+# ---------------------------------------------------------
+def legacy_create(db, obj_in: Dict[str, Any]) -> HoneypotTrap:
+    db_obj = HoneypotTrap(**jsonable_encoder(obj_in))
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+def legacy_update(db, db_obj: HoneypotTrap, obj_in: Dict[str, Any]) -> HoneypotTrap:
+    obj_data = jsonable_encoder(db_obj)
+    for field in obj_data:
+        if field in obj_in:
+            setattr(db_obj, field, obj_in[field])
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+# ---------------------------------------------------------
+# MEASUREMENT
+# ---------------------------------------------------------
+def timed(label: str, fn: Callable[[int], Any], repeat: int) -> None:
+    fn(-1)  # warm-up
+    with profile_queries() as profile:
+        started = time.perf_counter()
+        for i in range(repeat):
+            fn(i)
+        elapsed = time.perf_counter() - started
+    print(f"{label:44s} {elapsed / repeat * 1e6:9.1f} us/call  {profile.count / repeat:5.1f} statements/call")
+
+def main(repeat: int, rows: int) -> None:
+    db = SessionLocal()
+    try:
+        env = environment()
+        env["postgres"] = db.execute(text("SHOW server_version")).scalar()
+        print(", ".join(f"{key}={value}" for key, value in env.items()))
+        timed("round trip: SELECT 1", lambda i: db.execute(text("SELECT 1")), repeat)
+        db.rollback()
+
+        print(f"single rows ({repeat} calls)")
+        timed("create: add, commit, refresh", lambda i: legacy_create(db, {"exam_id": EXAM_ID, "phrase": f"a{i}"}), repeat)
+        timed("create: INSERT ... RETURNING", lambda i: crud.trap.create(db, obj_in={"exam_id": EXAM_ID, "phrase": f"b{i}"}), repeat)
+        obj = crud.trap.create(db, obj_in={"exam_id": EXAM_ID, "phrase": "c"})
+        timed("update: encode, commit, refresh", lambda i: legacy_update(db, obj, {"phrase": f"c{i}"}), repeat)
+        timed("update: UPDATE ... RETURNING", lambda i: crud.trap.update(db, db_obj=obj, obj_in={"phrase": f"d{i}"}), repeat)
+
+        batches = max(1, repeat // rows)
+        print(f"{rows} rows per call ({batches} calls)")
+        timed("create: one crud.create per row",
+              lambda i: [crud.trap.create(db, obj_in={"exam_id": EXAM_ID, "phrase": f"e{n}"}) for n in range(rows)], batches)
+        objs = []
+        timed("create: bulk_create",
+              lambda i: objs.extend(crud.trap.bulk_create(
+                  db, objs_in=[{"exam_id": EXAM_ID, "phrase": f"f{n}"} for n in range(rows)])), batches)
+        objs = objs[:rows]
+        timed("update: one crud.update per row",
+              lambda i: [crud.trap.update(db, db_obj=o, obj_in={"phrase": f"g{i}"}) for o in objs], batches)
+        timed("update: bulk_update",
+              lambda i: crud.trap.bulk_update(db, rows=[{"id": o.id, "phrase": f"h{i}"} for o in objs]), batches)
+    finally:
+        db.rollback()
+        db.execute(delete(HoneypotTrap).where(HoneypotTrap.exam_id == EXAM_ID))
+        db.commit()
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000, help="calls per single-row measurement")
+    parser.add_argument("--rows", type=int, default=500, help="rows per multi-row call")
+    args = parser.parse_args()
+    main(args.repeat, args.rows)
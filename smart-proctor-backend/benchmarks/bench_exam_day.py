@@ -0,0 +1,401 @@
+"""
+Exam-day load generator: N simulated students against a running backend.
+
+Each student, starting at a random point of the --ramp-seconds window:
+  1. logs in through /auth/login (honouring 503 + Retry-After from the
+     password hash pool) and fetches /users/me,
+  2. "connects" to the bouncer stand-in, which fetches the keystroke
+     profile from /exam/internal/keystroke-profile/{id},
+  3. answers --questions questions, each after a log-normal think time of
+     mean --think-seconds, through /exam/submit,
+  4. "disconnects": the stand-in queues the session's keystroke samples
+     and, like smart-proctor-bouncer, posts everything queued once per
+     second to /exam/internal/update-baseline:batch with idempotency keys
+     (or per student to /exam/internal/update-baseline with
+     --baseline-mode single).
+
+A --cheaters fraction of the students cheats on --cheat-rate of their
+answers: a pasted trap word, a copy of a leaked answer (collusion), or a
+filled honeypot field with a bot-speed submission.
+
+Reports throughput, error rate and p50/p95/p99 latency per endpoint, plus
+how late the generator woke students up: if that lag is large, the
+generator (one event loop) is the bottleneck, not the server; run fewer
+students per process or several processes with distinct --first-student.
+
+Needs only the backend and its local Postgres. Start the server first
+(e.g. ./start.sh, or gunicorn as in start.sh) and seed the students once:
+
+    python -m benchmarks.bench_exam_day --students 5000 --seed-only
+    python -m benchmarks.bench_exam_day --students 5000 --questions 10 --think-seconds 20 --cheaters 0.05
+    python -m benchmarks.bench_exam_day --students 5000 --cleanup
+
+Seeding writes users <prefix>-NNNNNN@loadtest.verifai.com straight to the
+database (one bcrypt hash shared by all); --cleanup deletes them with
+their violations. Thousands of students need thousands of sockets on both
+sides: raise `ulimit -n` for the server and this process.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core import security
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.integrity import IntegrityViolation
+from app.models.user import User
+
+PASSWORD = "loadtest-password"
+VOCABULARY = (
+    "algorithm allocation analysis approach argument assumption balance buffer cache "
+    "channel complexity concurrency consistency constraint context contract latency "
+    "database deadlock dependency design distribution efficiency entropy evaluation "
+    "evidence execution failure framework function gradient graph hypothesis index "
+    "inference interface invariant iteration kernel layer lock memory method model "
+    "network node operation optimization parallel parameter partition performance "
+    "pipeline pointer policy probability process protocol queue recursion register "
+    "replication request resource result sample scheduler schema search sequence "
+    "server signal solution stack state storage strategy structure system theorem "
+    "thread throughput tradeoff transaction tree value variable vector workload"
+).split()
+GLUE = "the a of to and in is that for with this it as by on which because therefore".split()
+
+def _email(prefix: str, n: int) -> str:
+    return f"{prefix}-{n:06d}@loadtest.verifai.com"
+
+# ---------------------------------------------------------
+# SEEDING
+# ---------------------------------------------------------
+def seed(prefix: str, first: int, count: int) -> None:
+    hashed = security.pwd_context.hash(PASSWORD)
+    rows = [
+        {
+            "email": _email(prefix, n),
+            "full_name": f"Load Test Student {n}",
+            "hashed_password": hashed,
+            "is_active": True,
+            "is_superuser": False,
+        }
+        for n in range(first, first + count)
+    ]
+    with SessionLocal() as db:
+        for start in range(0, len(rows), 5000):
+            db.execute(pg_insert(User).values(rows[start:start + 5000]).on_conflict_do_nothing(index_elements=["email"]))
+        db.commit()
+    print(f"Seeded {count} students ({_email(prefix, first)} ...).")
+
+def cleanup(prefix: str) -> None:
+    with SessionLocal() as db:
+        ids = select(User.id).where(User.email.like(f"{prefix}-%@loadtest.verifai.com")).scalar_subquery()
+        violations = db.execute(delete(IntegrityViolation).where(IntegrityViolation.student_id.in_(ids))).rowcount
+        users = db.execute(delete(User).where(User.email.like(f"{prefix}-%@loadtest.verifai.com"))).rowcount
+        db.commit()
+    print(f"Deleted {users} students and {violations} of their violations.")
+
+# ---------------------------------------------------------
+# MEASUREMENT
+# ---------------------------------------------------------
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return math.nan
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+class Recorder:
+    """
+    Latency samples and outcomes per endpoint. A response is an error
+    unless its status is in the call's `ok` set.
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.outcomes: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+        self.wake_lag: List[float] = []
+
+    async def call(self, endpoint: str, request, ok=(200,)) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError as e:
+            self.latencies[endpoint].append(time.perf_counter() - started)
+            self.outcomes[endpoint][type(e).__name__] += 1
+            self.errors[endpoint] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        self.outcomes[endpoint][response.status_code] += 1
+        if response.status_code not in ok:
+            self.errors[endpoint] += 1
+        return response
+
+    async def sleep(self, seconds: float) -> None:
+        due = time.perf_counter() + seconds
+        await asyncio.sleep(seconds)
+        self.wake_lag.append(max(0.0, time.perf_counter() - due))
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint in sorted(self.latencies):
+            ordered = sorted(self.latencies[endpoint])
+            endpoints[endpoint] = {
+                "requests": len(ordered),
+                "throughput_rps": len(ordered) / elapsed,
+                "errors": self.errors[endpoint],
+                "error_rate": self.errors[endpoint] / len(ordered),
+                "p50_ms": _percentile(ordered, 50) * 1000,
+                "p95_ms": _percentile(ordered, 95) * 1000,
+                "p99_ms": _percentile(ordered, 99) * 1000,
+                "max_ms": ordered[-1] * 1000,
+                "outcomes": {str(k): v for k, v in self.outcomes[endpoint].items()},
+            }
+        lag = sorted(self.wake_lag)
+        return {
+            "elapsed_seconds": elapsed,
+            "requests": sum(e["requests"] for e in endpoints.values()),
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "generator_lag_p99_ms": _percentile(lag, 99) * 1000,
+            "endpoints": endpoints,
+        }
+
+# ---------------------------------------------------------
+# BOUNCER STAND-IN
+# ---------------------------------------------------------
+class BouncerStandIn:
+    """
+    What smart-proctor-bouncer does for the backend: fetch the keystroke
+    profile when a student connects, collect the session's samples, and
+    upload them when the student disconnects, batched once per second
+    (at most 5000 per request, transient failures retried next tick).
+    """
+
+    FLUSH_INTERVAL_SECONDS = 1.0
+    MAX_BATCH = 5000
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, internal_key: str, mode: str):
+        self._client = client
+        self._recorder = recorder
+        self._headers = {"X-Internal-Key": internal_key}
+        self._mode = mode
+        self._pending: List[Dict[str, Any]] = []
+        self._singles: List[asyncio.Task] = []
+
+    async def connect(self, user_id: int) -> None:
+        await self._recorder.call(
+            "GET /exam/internal/keystroke-profile",
+            self._client.get(f"/api/v1/exam/internal/keystroke-profile/{user_id}", headers=self._headers),
+            ok=(200, 404),  # 404: no profile yet, the bouncer uses its default
+        )
+
+    def disconnect(self, user_id: int, flight: List[float], dwell: List[float]) -> None:
+        update = {
+            "user_id": user_id,
+            "new_flight_time": sum(flight) / len(flight) if flight else 0.0,
+            "flight_times": flight[:20000],
+            "dwell_times": dwell[:20000],
+            "idempotency_key": f"{user_id}-{time.time_ns()}",
+        }
+        if self._mode == "batch":
+            self._pending.append(update)
+        else:
+            self._singles.append(asyncio.create_task(self._recorder.call(
+                "POST /exam/internal/update-baseline",
+                self._client.post("/api/v1/exam/internal/update-baseline", json=update, headers=self._headers),
+            )))
+
+    async def _flush(self) -> None:
+        while self._pending:
+            batch = self._pending[:self.MAX_BATCH]
+            response = await self._recorder.call(
+                "POST /exam/internal/update-baseline:batch",
+                self._client.post("/api/v1/exam/internal/update-baseline:batch", json=batch, headers=self._headers),
+            )
+            if response is None or response.status_code >= 500:
+                return  # transient: resent next tick (idempotency keys make that safe)
+            del self._pending[:len(batch)]
+
+    async def run(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), self.FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            await self._flush()
+        if self._singles:
+            await asyncio.gather(*self._singles)
+
+# ---------------------------------------------------------
+# STUDENTS
+# ---------------------------------------------------------
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(VOCABULARY if rng.random() < 0.6 else GLUE) for _ in range(rng.randint(8, 20))]
+    return " ".join(words).capitalize() + "."
+
+def _answer(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(4, 12)))
+
+def _keystrokes(rng: random.Random, n: int, flight_mean: float) -> Tuple[List[float], List[float]]:
+    flight = [round(max(20.0, rng.gauss(flight_mean, flight_mean * 0.25)), 1) for _ in range(n)]
+    dwell = [round(max(15.0, rng.gauss(90.0, 20.0)), 1) for _ in range(n)]
+    return flight, dwell
+
+class ExamDay:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, bouncer: BouncerStandIn, args):
+        self.client = client
+        self.recorder = recorder
+        self.bouncer = bouncer
+        self.args = args
+        rng = random.Random(args.random_seed)
+        # One leaked answer per question, copied (lightly edited) by colluders.
+        self.leaked = [_answer(rng) for _ in range(args.questions)]
+        self.students_done = 0
+        self.flagged = 0
+
+    async def _login(self, rng: random.Random, email: str) -> Optional[str]:
+        for _ in range(self.args.login_attempts):
+            response = await self.recorder.call(
+                "POST /auth/login",
+                self.client.post("/api/v1/auth/login", data={"username": email, "password": PASSWORD}),
+            )
+            if response is None:
+                return None
+            if response.status_code == 503:
+                # Jittered, so rejected students do not come back in lockstep.
+                await self.recorder.sleep(float(response.headers.get("Retry-After", "1")) * rng.uniform(1, 2))
+                continue
+            if response.status_code != 200:
+                return None
+            return response.json()["access_token"]
+        return None
+
+    def _submission(self, rng: random.Random, user_id: int, question: int, cheater: bool) -> Dict[str, Any]:
+        body = {
+            "student_id": user_id,
+            "exam_id": self.args.exam_id,
+            "question_id": f"q{question + 1}",
+            "answer_text": _answer(rng),
+            "time_taken_seconds": rng.randint(90, 900),
+        }
+        if cheater and rng.random() < self.args.cheat_rate:
+            how = rng.choice(("trap", "copy", "bot"))
+            if how == "trap":
+                sentences = body["answer_text"].split(". ")
+                sentences.insert(rng.randrange(len(sentences)), f"As shown by {settings.HONEYPOT_TRAP_WORD} research")
+                body["answer_text"] = ". ".join(sentences)
+            elif how == "copy":
+                words = self.leaked[question].split()
+                for _ in range(max(1, len(words) // 40)):
+                    words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+                body["answer_text"] = " ".join(words)
+            else:
+                body["phone_extension_secondary"] = "1234"
+                body["time_taken_seconds"] = rng.randint(1, 10)
+        return body
+
+    async def student(self, n: int) -> None:
+        args = self.args
+        rng = random.Random(args.random_seed * 1_000_003 + n)
+        cheater = rng.random() < args.cheaters
+        await self.recorder.sleep(rng.uniform(0, args.ramp_seconds))
+
+        token = await self._login(rng, _email(args.prefix, n))
+        if token is None:
+            return
+        headers = {"Authorization": f"Bearer {token}"}
+        response = await self.recorder.call("GET /users/me", self.client.get("/api/v1/users/me", headers=headers))
+        if response is None or response.status_code != 200:
+            return
+        user_id = response.json()["id"]
+
+        await self.bouncer.connect(user_id)
+        flight_mean = rng.uniform(110, 220)
+        flight: List[float] = []
+        dwell: List[float] = []
+        # Log-normal think time with the requested mean.
+        sigma = 0.5
+        mu = math.log(max(args.think_seconds, 1e-3)) - sigma ** 2 / 2
+        for question in range(args.questions):
+            await self.recorder.sleep(rng.lognormvariate(mu, sigma) if args.think_seconds > 0 else 0)
+            body = self._submission(rng, user_id, question, cheater)
+            response = await self.recorder.call("POST /exam/submit", self.client.post("/api/v1/exam/submit", json=body))
+            if response is not None and response.status_code == 200 and response.json()["status"] == "FLAGGED":
+                self.flagged += 1
+            f, d = _keystrokes(rng, len(body["answer_text"]) // 4, flight_mean)
+            flight.extend(f)
+            dwell.extend(d)
+        self.bouncer.disconnect(user_id, flight, dwell)
+        self.students_done += 1
+
+async def main(args) -> Dict[str, Any]:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        bouncer = BouncerStandIn(client, recorder, args.internal_key, args.baseline_mode)
+        exam_day = ExamDay(client, recorder, bouncer, args)
+        stop = asyncio.Event()
+        bouncer_task = asyncio.create_task(bouncer.run(stop))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(exam_day.student(n) for n in range(args.first_student, args.first_student + args.students)))
+        stop.set()
+        await bouncer_task
+        elapsed = time.perf_counter() - started
+
+    report = recorder.report(elapsed)
+    report["students_finished"] = exam_day.students_done
+    report["answers_flagged"] = exam_day.flagged
+
+    print(f"{exam_day.students_done}/{args.students} students finished in {elapsed:.1f} s, "
+          f"{report['requests']} requests ({report['requests'] / elapsed:.1f}/s), "
+          f"{report['errors']} errors, {exam_day.flagged} answers flagged")
+    print(f"{'endpoint':42s} {'reqs':>7s} {'req/s':>7s} {'err%':>6s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    for endpoint, e in report["endpoints"].items():
+        print(f"{endpoint:42s} {e['requests']:7d} {e['throughput_rps']:7.1f} {e['error_rate']:6.1%} "
+              f"{e['p50_ms']:8.1f} {e['p95_ms']:8.1f} {e['p99_ms']:8.1f} {e['max_ms']:8.1f}  {e['outcomes']}")
+    print(f"generator wake-up lag p99: {report['generator_lag_p99_ms']:.1f} ms"
+          + ("  (high: the generator is saturated, results understate the server)"
+             if report["generator_lag_p99_ms"] > 100 else ""))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--first-student", type=int, default=0, help="offset, to split students across processes")
+    parser.add_argument("--prefix", default="student", help="email prefix of the seeded students")
+    parser.add_argument("--exam-id", default=f"loadtest-{int(time.time())}")
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--think-seconds", type=float, default=20.0, help="mean think time per answer")
+    parser.add_argument("--ramp-seconds", type=float, default=60.0, help="window in which students arrive")
+    parser.add_argument("--cheaters", type=float, default=0.05, help="fraction of students who cheat")
+    parser.add_argument("--cheat-rate", type=float, default=0.3, help="fraction of a cheater's answers that cheat")
+    parser.add_argument("--login-attempts", type=int, default=20, help="503s a student retries before giving up")
+    parser.add_argument("--baseline-mode", choices=("batch", "single"), default="batch")
+    parser.add_argument("--internal-key", default=settings.INTERNAL_API_KEY)
+    parser.add_argument("--connections", type=int, default=500, help="HTTP connection pool size")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the report (JSON) here")
+    parser.add_argument("--seed", action="store_true", help="create missing students before the run")
+    parser.add_argument("--seed-only", action="store_true", help="create the students and exit")
+    parser.add_argument("--cleanup", action="store_true", help="delete the students and their violations, then exit")
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup(args.prefix)
+    elif args.seed_only:
+        seed(args.prefix, args.first_student, args.students)
+    else:
+        if args.seed:
+            seed(args.prefix, args.first_student, args.students)
+        report = asyncio.run(main(args))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
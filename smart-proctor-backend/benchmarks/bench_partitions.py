@@ -0,0 +1,153 @@
+"""
+Heap vs. partitioned integrity_violations, on the configured Postgres.
+
+Builds two copies of the table in a scratch schema, `bench_partitions`:
+  heap    - the old layout: one table, PK (id) plus the three keyset indexes
+  parted  - the new layout: RANGE (timestamp), one partition per month
+and fills both with the same synthetic rows spread over the last --months
+months. Then times, per layout:
+  - batched inserts into the current month (the write-behind sink's shape)
+  - a student's first page, and the same page bounded to the last 7 days
+  - one violation type over the last 24 hours
+  - expiring the oldest month: DELETE vs. DROP of its partition
+The schema is dropped afterwards unless --keep is given.
+
+Usage:
+    python -m benchmarks.bench_partitions --rows 5000000 --months 12
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import column, insert, table as sa_table, text
+
+from app.db.session import engine
+
+SCHEMA = "bench_partitions"
+TYPES = ("TAB_SWITCH", "BOT_DETECTED", "AI_PLAGIARISM", "BIOMETRIC_MISMATCH",
+         "COLLUSION_SUSPECTED", "SPEED_ANOMALY")
+COLUMNS = (
+    "id bigint NOT NULL, student_id integer NOT NULL, violation_type varchar NOT NULL, "
+    "evidence_score double precision, metadata_log text, timestamp timestamptz NOT NULL"
+)
+INDEXES = (("ts_id", "timestamp, id"), ("student_ts_id", "student_id, timestamp, id"),
+           ("type_ts_id", "violation_type, timestamp, id"))
+
+def setup(conn, rows: int, months: int, students: int) -> None:
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"CREATE TABLE {SCHEMA}.heap ({COLUMNS}, PRIMARY KEY (id))"))
+    conn.execute(text(
+        f"CREATE TABLE {SCHEMA}.parted ({COLUMNS}, PRIMARY KEY (id, timestamp)) PARTITION BY RANGE (timestamp)"
+    ))
+    conn.execute(text(f"""
+        DO $$
+        DECLARE m timestamptz;
+        BEGIN
+            FOR m IN SELECT generate_series(
+                date_trunc('month', now()) - interval '{months} months',
+                date_trunc('month', now()) + interval '1 month', interval '1 month'
+            ) LOOP
+                EXECUTE format('CREATE TABLE {SCHEMA}.%I PARTITION OF {SCHEMA}.parted FOR VALUES FROM (%L) TO (%L)',
+                               'parted_' || to_char(m, 'YYYY_MM'), m, m + interval '1 month');
+            END LOOP;
+        END $$;
+    """))
+    started = time.perf_counter()
+    types = "ARRAY[" + ",".join(f"'{t}'" for t in TYPES) + "]"
+    conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.heap
+        SELECT g, 1 + (random() * {students - 1})::int,
+               ({types})[1 + (random() * {len(TYPES) - 1})::int],
+               random(), '{{"source": "bench"}}',
+               now() - random() * interval '{months} months'
+        FROM generate_series(1, {rows}) g
+    """))
+    conn.execute(text(f"INSERT INTO {SCHEMA}.parted SELECT * FROM {SCHEMA}.heap"))
+    for table in ("heap", "parted"):
+        for name, cols in INDEXES:
+            conn.execute(text(f"CREATE INDEX {table}_{name} ON {SCHEMA}.{table} ({cols})"))
+        conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.{table}"))
+    print(f"loaded {rows:,} rows x 2 layouts in {time.perf_counter() - started:.0f} s")
+
+def _percentiles(samples) -> str:
+    p50, p99 = np.percentile(np.array(samples) * 1000, [50, 99])
+    return f"p50 {p50:8.3f} ms   p99 {p99:8.3f} ms"
+
+def bench_inserts(table: str, batches: int, batch_size: int, next_id: int) -> str:
+    # Core insert(), so the batch goes out as multi-row INSERT ... VALUES
+    # like crud.integrity.create_many; one transaction per batch.
+    target = sa_table(
+        table, column("id"), column("student_id"), column("violation_type"),
+        column("evidence_score"), column("metadata_log"), column("timestamp"), schema=SCHEMA,
+    )
+    rng = np.random.default_rng(1)
+    now = datetime.now(timezone.utc)
+    timings = []
+    for b in range(batches):
+        rows = [
+            {"id": next_id + b * batch_size + i, "student_id": int(s), "violation_type": TYPES[int(t)],
+             "evidence_score": 0.5, "metadata_log": "{}", "timestamp": now}
+            for i, (s, t) in enumerate(zip(rng.integers(1, 50000, batch_size), rng.integers(0, len(TYPES), batch_size)))
+        ]
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(insert(target), rows)
+        timings.append(time.perf_counter() - started)
+    return _percentiles(timings)
+
+def bench_query(conn, sql: str, params_list) -> str:
+    stmt = text(sql)
+    timings = []
+    for params in params_list:
+        started = time.perf_counter()
+        conn.execute(stmt, params).all()
+        timings.append(time.perf_counter() - started)
+    return _percentiles(timings)
+
+def main(rows: int, months: int, students: int, queries: int, keep: bool) -> None:
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        setup(conn, rows, months, students)
+        rng = np.random.default_rng(2)
+        student_params = [{"s": int(s)} for s in rng.integers(1, students, queries)]
+        type_params = [{"t": TYPES[int(t)]} for t in rng.integers(0, len(TYPES), queries)]
+        page = "ORDER BY timestamp DESC, id DESC LIMIT 101"
+
+        next_id = rows + 1
+        for table in ("heap", "parted"):
+            print(f"\n[{table}]")
+            print(f"  {'insert 200-row batch':<34} {bench_inserts(table, queries, 200, next_id)}")
+            print(f"  {'student first page':<34} " + bench_query(
+                conn, f"SELECT * FROM {SCHEMA}.{table} WHERE student_id = :s {page}", student_params))
+            print(f"  {'student page, last 7 days':<34} " + bench_query(
+                conn, f"SELECT * FROM {SCHEMA}.{table} WHERE student_id = :s "
+                      f"AND timestamp >= now() - interval '7 days' {page}", student_params))
+            print(f"  {'type page, last 24 hours':<34} " + bench_query(
+                conn, f"SELECT * FROM {SCHEMA}.{table} WHERE violation_type = :t "
+                      f"AND timestamp >= now() - interval '24 hours' {page}", type_params))
+
+        oldest = conn.execute(text(
+            f"SELECT date_trunc('month', now()) - interval '{months} months' + interval '1 month'"
+        )).scalar()
+        started = time.perf_counter()
+        deleted = conn.execute(text(f"DELETE FROM {SCHEMA}.heap WHERE timestamp < :cutoff"), {"cutoff": oldest}).rowcount
+        print(f"\nexpire oldest month: heap DELETE of {deleted:,} rows {time.perf_counter() - started:8.3f} s", end="")
+        name = conn.execute(text(f"SELECT 'parted_' || to_char(date_trunc('month', now()) - interval '{months} months', 'YYYY_MM')")).scalar()
+        started = time.perf_counter()
+        conn.execute(text(f"DROP TABLE {SCHEMA}.{name}"))
+        print(f"   vs. DROP partition {time.perf_counter() - started:8.3f} s")
+
+        if not keep:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--students", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=300, help="samples per measurement")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = parser.parse_args()
+    main(args.rows, args.months, args.students, args.queries, args.keep)
@@ -0,0 +1,275 @@
+"""
+Micro-benchmark suite for the backend hot paths, with JSON baselines.
+
+`run` times each case and optionally saves the results; `compare` puts two
+result files side by side and exits non-zero when a case got slower than
+--threshold (relative, on the median), so a change to these modules can
+be judged against a baseline recorded on the same machine:
+
+    python -m benchmarks.bench_suite run --output /tmp/before.json
+    ... change the code ...
+    python -m benchmarks.bench_suite run --output /tmp/after.json
+    python -m benchmarks.bench_suite compare /tmp/before.json /tmp/after.json --threshold 0.1
+
+Cases (select with --only, a substring of the name):
+    honeypot.*      HoneypotService field check and LLM-poisoning check
+    trap_scan.*     trap-word scanning of 1 KB to 1 MB answers, 200 traps
+    jwt.*           create_access_token and jwt.decode
+    bcrypt.verify   security.verify_password (through the hash pool)
+    crud.*          CRUDBase.create / CRUDBase.update (honeypot_traps)
+    deps.*          deps.get_current_user (decode + users lookup)
+    submit.*        POST /api/v1/exam/submit end to end through TestClient
+
+The crud, deps and submit cases need the usual POSTGRES_* database with
+migrations applied and at least one user (`python -m app.initial_data`);
+--no-db skips them. The models use Postgres-only features (partitions,
+ON CONFLICT, NOTIFY), so there is no SQLite mode: point POSTGRES_* at a
+local scratch server. Rows the suite creates are deleted afterwards.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core import security
+from app.core.config import settings
+from app.services.honeypot import honeypot_service
+from app.services.trap_scanner import TrapAutomaton
+
+BENCH_EXAM_ID = "bench-suite"
+WORDS = (
+    "the of and to in is that for it as was with be by on not this are or from "
+    "system memory process data network exam answer student question result method"
+).split()
+
+def _text(n_chars: int) -> str:
+    out, size, i = [], 0, 0
+    while size < n_chars:
+        word = WORDS[(i * 7919) % len(WORDS)]
+        out.append(word)
+        size += len(word) + 1
+        i += 1
+    return " ".join(out)[:n_chars]
+
+# ---------------------------------------------------------
+# TIMING
+# ---------------------------------------------------------
+def measure(fn: Callable[[], Any], rounds: int, round_seconds: float) -> Dict[str, Any]:
+    """
+    Calibrates how many calls fill `round_seconds`, then times `rounds`
+    such rounds. Reports seconds per call.
+    """
+    fn()  # warm-up (caches, lazy imports, pool connections)
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= round_seconds / 10 or iterations >= 1 << 20:
+            break
+        iterations *= 10 if elapsed < round_seconds / 100 else 2
+    iterations = max(1, int(iterations * round_seconds / max(elapsed, 1e-9)))
+
+    per_call: List[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        per_call.append((time.perf_counter() - started) / iterations)
+    return {
+        "median": statistics.median(per_call),
+        "min": min(per_call),
+        "max": max(per_call),
+        "iterations": iterations,
+        "rounds": rounds,
+    }
+
+# ---------------------------------------------------------
+# CASES
+# ---------------------------------------------------------
+def offline_cases() -> Dict[str, Callable[[], Any]]:
+    cases: Dict[str, Callable[[], Any]] = {}
+
+    answer = _text(2000)
+    cases["honeypot.verify_field"] = lambda: honeypot_service.verify_honeypot_field("")
+    cases["honeypot.check_llm_poisoning_2kb"] = lambda: honeypot_service.check_llm_poisoning(answer)
+
+    scanner = TrapAutomaton(
+        [(settings.HONEYPOT_TRAP_WORD, None)] + [(f"Project {n} Nakatomi", None) for n in range(200)]
+    )
+    for label, size in (("1kb", 1 << 10), ("16kb", 1 << 14), ("256kb", 1 << 18), ("1mb", 1 << 20)):
+        text = _text(size)
+        cases[f"trap_scan.{label}"] = lambda text=text: honeypot_service.find_trap_words(text, scanner)
+
+    token = security.create_access_token(1)
+    cases["jwt.create_access_token"] = lambda: security.create_access_token(1)
+    cases["jwt.decode"] = lambda: security.jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    hashed = security.pwd_context.hash("benchmark-password")
+    cases["bcrypt.verify"] = lambda: security.verify_password("benchmark-password", hashed)
+    return cases
+
+def db_cases(stack: ExitStack) -> Dict[str, Callable[[], Any]]:
+    """
+    Cases that need Postgres. Registers their cleanup on `stack`.
+    """
+    from fastapi.testclient import TestClient
+    from sqlalchemy import delete
+
+    from app import crud
+    from app.api import deps
+    from app.main import app
+    from app.models.collusion import AnswerSignature
+    from app.models.honeypot import HoneypotTrap
+    from app.models.user import User
+    from app.schemas.exam import TrapPhrase
+    from app.db.session import SessionLocal
+
+    class BenchTrap(TrapPhrase):
+        exam_id: str
+
+    db = SessionLocal()
+    stack.callback(db.close)
+
+    def cleanup() -> None:
+        db.rollback()
+        db.execute(delete(HoneypotTrap).where(HoneypotTrap.exam_id == BENCH_EXAM_ID))
+        db.execute(delete(AnswerSignature).where(AnswerSignature.exam_id == BENCH_EXAM_ID))
+        db.commit()
+    stack.callback(cleanup)
+
+    cases: Dict[str, Callable[[], Any]] = {}
+    trap_in = BenchTrap(exam_id=BENCH_EXAM_ID, phrase="Project 2501")
+    cases["crud.create"] = lambda: crud.trap.create(db, obj_in=trap_in)
+    trap = crud.trap.create(db, obj_in=trap_in)
+    flip = iter(range(1 << 62))
+    cases["crud.update"] = lambda: crud.trap.update(db, db_obj=trap, obj_in={"phrase": f"Project {next(flip)}"})
+
+    user = db.query(User).order_by(User.id).first()
+    if user is None:
+        raise SystemExit("No users found: run `python -m app.initial_data` first, or pass --no-db.")
+    token = security.create_access_token(user.id)
+
+    def get_current_user() -> None:
+        with SessionLocal() as session:
+            deps.get_current_user(db=session, token=token)
+    cases["deps.get_current_user"] = get_current_user
+
+    client = stack.enter_context(TestClient(app))
+    clean = {
+        "student_id": str(user.id), "exam_id": BENCH_EXAM_ID, "question_id": "q1",
+        "answer_text": _text(1500), "time_taken_seconds": 120,
+    }
+    client.post("/api/v1/exam/submit", json=clean).raise_for_status()
+    cases["submit.clean_answer"] = lambda: client.post("/api/v1/exam/submit", json=clean)
+    return cases
+
+def run(only: Optional[str], no_db: bool, rounds: int, round_seconds: float) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    with ExitStack() as stack:
+        cases = offline_cases()
+        if not no_db:
+            cases.update(db_cases(stack))
+        for name, fn in cases.items():
+            if only and only not in name:
+                continue
+            result = results[name] = measure(fn, rounds, round_seconds)
+            print(f"{name:36s} {_fmt(result['median'])}  (min {_fmt(result['min'])}, {result['iterations']} x {rounds})")
+    return results
+
+# ---------------------------------------------------------
+# BASELINES
+# ---------------------------------------------------------
+def _fmt(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit:2s}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment() -> Dict[str, Any]:
+    """
+    Where a result was recorded; numbers only compare within one environment.
+    """
+    return {
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def save(results: Dict[str, Any], path: str) -> None:
+    document = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        **environment(),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+    print(f"Saved {len(results)} results to {path}")
+
+def compare(baseline_path: str, current_path: str, threshold: float, metric: str) -> int:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(current_path) as f:
+        current = json.load(f)
+    if baseline.get("platform") != current.get("platform"):
+        print(f"warning: recorded on different platforms ({baseline.get('platform')} vs {current.get('platform')})")
+
+    regressions = 0
+    print(f"{'case':36s} {'baseline':>11s} {'current':>11s} {'change':>8s}")
+    for name in sorted(set(baseline["results"]) | set(current["results"])):
+        before, after = baseline["results"].get(name), current["results"].get(name)
+        if before is None or after is None:
+            print(f"{name:36s} {'only in ' + ('current' if before is None else 'baseline'):>32s}")
+            continue
+        change = after[metric] / before[metric] - 1
+        flag = ""
+        if change > threshold:
+            flag, regressions = "  REGRESSION", regressions + 1
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:36s} {_fmt(before[metric])} {_fmt(after[metric])} {change:+7.1%}{flag}")
+
+    print(f"{regressions} regression(s) beyond {threshold:.0%} on the {metric}.")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time the cases")
+    run_parser.add_argument("--output", help="save the results (JSON) here")
+    run_parser.add_argument("--only", help="run only cases whose name contains this")
+    run_parser.add_argument("--no-db", action="store_true", help="skip the cases that need Postgres")
+    run_parser.add_argument("--rounds", type=int, default=7)
+    run_parser.add_argument("--round-seconds", type=float, default=0.2, help="target duration of one round")
+
+    compare_parser = commands.add_parser("compare", help="compare two saved results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown that fails")
+    compare_parser.add_argument("--metric", choices=("median", "min"), default="median")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        results = run(args.only, args.no_db, args.rounds, args.round_seconds)
+        if args.output:
+            save(results, args.output)
+    else:
+        sys.exit(compare(args.baseline, args.current, args.threshold, args.metric))
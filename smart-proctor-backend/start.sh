@@ -11,15 +11,24 @@ python backend_pre_start.py
 echo "Running Alembic Migrations..."
 alembic upgrade head
 
-# 3. Create Initial Data (Admin User)
+# 3. Create Upcoming Violation Partitions (and expire old ones)
+echo "Maintaining Violation Partitions..."
+python -m app.partition_maintenance
+
+# 4. Create Initial Data (Admin User)
 echo "Seeding Initial Data..."
 python -m app.initial_data
 
-# 4. Start the Server
+# 5. Start the Server
 echo "Starting Production Server..."
+# Workers publish their metrics to files in this directory and /metrics
+# sums them; files from a previous run would be summed in, so start empty.
+export METRICS_DIR=${METRICS_DIR:-/tmp/verifai-metrics}
+rm -rf "$METRICS_DIR" && mkdir -p "$METRICS_DIR"
 # Web Concurrency = Number of CPU cores * 2 + 1 (Standard Formula)
+# The app reads WEB_CONCURRENCY too, to split DB_CONNECTION_BUDGET per worker
 # We bind to 0.0.0.0 so Docker can map the port
 exec gunicorn app.main:app \
-    --workers 4 \
+    --workers ${WEB_CONCURRENCY:-4} \
     --worker-class uvicorn.workers.UvicornWorker \
     --bind 0.0.0.0:8000
\ No newline at end of file
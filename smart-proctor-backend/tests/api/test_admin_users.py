@@ -0,0 +1,31 @@
+import asyncio
+import uuid
+
+from app.api.admin import create_user_by_admin
+
+USERS = "/api/v1/admin/users"
+
+def test_create_user_by_admin(client, superuser_headers):
+    from sqlalchemy import delete
+    from app.db.session import SessionLocal
+    from app.models.user import User
+
+    email = f"pytest-{uuid.uuid4().hex[:12]}@tests.verifai.com"
+    payload = {"email": email, "password": "correct-horse", "full_name": "Created By Admin"}
+    try:
+        response = client.post(USERS, json=payload, headers=superuser_headers)
+        assert response.status_code == 200
+        assert response.json()["email"] == email
+
+        assert client.post(USERS, json=payload, headers=superuser_headers).status_code == 400
+
+        login = client.post("/api/v1/auth/login", data={"username": email, "password": "correct-horse"})
+        assert login.status_code == 200
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(User).where(User.email == email))
+            db.commit()
+
+def test_create_user_by_admin_runs_on_the_event_loop():
+    # A sync route would queue for bcrypt on a Starlette threadpool thread.
+    assert asyncio.iscoroutinefunction(create_user_by_admin)
@@ -0,0 +1,44 @@
+"""
+Pins the statements the submission routes issue per request. Raising a
+limit here should come with a reason in the commit that does it.
+"""
+import uuid
+
+import pytest
+
+SUBMIT = "/api/v1/exam/submit"
+SUBMIT_BATCH = "/api/v1/exam/submit:batch"
+
+def _answer(student, exam_id: str, question_id: str, n: int) -> dict:
+    return {
+        "student_id": student.id,
+        "exam_id": exam_id,
+        "question_id": question_id,
+        "answer_text": f"Answer {n}: the mitochondria produces ATP through cellular respiration, attempt {uuid.uuid4()}.",
+        "time_taken_seconds": 120,
+    }
+
+@pytest.fixture
+def exam_id(client):
+    # A fresh exam per test, so the trap automaton and LSH index start cold.
+    return f"pytest-{uuid.uuid4().hex[:12]}"
+
+def test_submit_query_budget(client, student, exam_id, query_budget):
+    # Warm the per-exam trap automaton cache; it is loaded once per worker.
+    assert client.post(SUBMIT, json=_answer(student, exam_id, "q1", 0)).status_code == 200
+
+    # The collusion catch-up read; signatures and violations are written behind.
+    with query_budget(1, "POST /submit"):
+        response = client.post(SUBMIT, json=_answer(student, exam_id, "q1", 1))
+    assert response.status_code == 200
+
+@pytest.mark.parametrize("size", [5, 50])
+def test_submit_batch_query_budget(client, student, exam_id, query_budget, size):
+    answers = [_answer(student, exam_id, f"q{n % 5}", n) for n in range(size)]
+
+    # Cold: one trap lookup for the exam plus one catch-up read for all
+    # of its questions, however many answers the batch holds.
+    with query_budget(2, f"POST /submit:batch ({size} answers)"):
+        response = client.post(SUBMIT_BATCH, json=answers)
+    assert response.status_code == 200
+    assert len(response.json()) == size
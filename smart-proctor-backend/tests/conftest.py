@@ -0,0 +1,141 @@
+"""
+Shared fixtures.
+
+Unit tests need nothing but the requirements. Tests using `client` run the
+app against the database configured through the usual POSTGRES_* settings
+(migrations applied) and are skipped when it can't be reached.
+"""
+import os
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+import pytest
+
+# Settings without defaults; the real values come from the environment.
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("INTERNAL_API_KEY", "test-internal-key")
+os.environ.setdefault("POSTGRES_SERVER", "localhost")
+os.environ.setdefault("POSTGRES_USER", "postgres")
+os.environ.setdefault("POSTGRES_PASSWORD", "postgres")
+os.environ.setdefault("POSTGRES_DB", "verifai")
+
+from app.core.query_profiler import QueryProfile, capture_requests, profile_queries
+
+TEST_EMAIL = "pytest-student@tests.verifai.com"
+TEST_ADMIN_EMAIL = "pytest-admin@tests.verifai.com"
+
+# ---------------------------------------------------------
+# DATABASE
+# ---------------------------------------------------------
+@pytest.fixture(scope="session")
+def database():
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    from app.db.session import engine
+
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError as e:
+        pytest.skip(f"Postgres not reachable: {e.orig}")
+    return engine
+
+@pytest.fixture(scope="session")
+def client(database):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+@contextmanager
+def _throwaway_user(email: str, full_name: str, is_superuser: bool = False):
+    from sqlalchemy import delete
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from app.core import security
+    from app.db.session import SessionLocal
+    from app.models.integrity import IntegrityViolation
+    from app.models.user import User
+
+    with SessionLocal() as db:
+        db.execute(
+            pg_insert(User)
+            .values(
+                email=email,
+                full_name=full_name,
+                hashed_password=security.pwd_context.hash("pytest-password"),
+                is_active=True,
+                is_superuser=is_superuser,
+            )
+            .on_conflict_do_nothing(index_elements=["email"])
+        )
+        db.commit()
+        user = db.query(User).filter(User.email == email).one()
+        db.expunge(user)
+    yield user
+    with SessionLocal() as db:
+        # ON DELETE CASCADE takes their signatures, rollups and risk rows.
+        db.execute(delete(IntegrityViolation).where(IntegrityViolation.student_id == user.id))
+        db.execute(delete(User).where(User.id == user.id))
+        db.commit()
+
+@pytest.fixture(scope="session")
+def student(database):
+    """
+    A throwaway student, deleted with everything recorded for them.
+    """
+    with _throwaway_user(TEST_EMAIL, "Pytest Student") as user:
+        yield user
+
+@pytest.fixture(scope="session")
+def superuser_headers(database):
+    """
+    Authorization header of a throwaway superuser.
+    """
+    from app.core import security
+
+    with _throwaway_user(TEST_ADMIN_EMAIL, "Pytest Admin", is_superuser=True) as user:
+        yield {"Authorization": f"Bearer {security.create_access_token(user.id)}"}
+
+# ---------------------------------------------------------
+# QUERY BUDGETS
+# ---------------------------------------------------------
+class QueryCount:
+    """
+    Statements of a `query_budget` block: the block's own (direct CRUD
+    calls) plus those of every request it made through TestClient.
+    """
+
+    def __init__(self, direct: QueryProfile, requests: List[Tuple[str, QueryProfile]]):
+        self.direct = direct
+        self.requests = requests
+
+    def total(self) -> QueryProfile:
+        total = QueryProfile()
+        for profile in [self.direct] + [profile for _, profile in self.requests]:
+            total.count += profile.count
+            total.db_seconds += profile.db_seconds
+            total.fingerprints.update(profile.fingerprints)
+        return total
+
+    @property
+    def count(self) -> int:
+        return self.total().count
+
+@pytest.fixture
+def query_budget():
+    """
+    Fails the test (QueryBudgetExceeded, an AssertionError) when the
+    enclosed block issues more than `limit` statements:
+
+        def test_submit(client, query_budget):
+            with query_budget(2, "POST /submit") as queries:
+                client.post("/api/v1/exam/submit", json=answer)
+    """
+    @contextmanager
+    def budget(limit: int, label: str = "block") -> Iterator[QueryCount]:
+        with capture_requests() as requests, profile_queries() as direct:
+            queries = QueryCount(direct, requests)
+            yield queries
+        queries.total().check_budget(limit, label)
+    return budget
@@ -0,0 +1,118 @@
+import math
+import random
+
+import pytest
+
+from app.core.keystroke_stats import (
+    FLIGHT_BIN_MS,
+    HISTOGRAM_BINS,
+    KeystrokeStats,
+    RunningStats,
+    histogram_from_bytes,
+    histogram_to_bytes,
+)
+
+def _direct(xs):
+    # Two-pass reference: count, mean, sum of squared deviations.
+    n = len(xs)
+    mean = sum(xs) / n
+    return n, mean, sum((x - mean) ** 2 for x in xs)
+
+def _stats(xs):
+    stats = RunningStats(FLIGHT_BIN_MS)
+    stats.add_many(xs)
+    return stats
+
+def _assert_matches(stats, xs):
+    n, mean, m2 = _direct(xs)
+    assert stats.count == n
+    assert stats.mean == pytest.approx(mean, rel=1e-12)
+    assert stats.m2 == pytest.approx(m2, rel=1e-9)
+    assert stats.variance == pytest.approx(m2 / (n - 1), rel=1e-9)
+
+@pytest.fixture
+def samples():
+    rng = random.Random(7)
+    return [rng.lognormvariate(5.0, 0.6) for _ in range(1000)]
+
+# ---------------------------------------------------------
+# WELFORD
+# ---------------------------------------------------------
+def test_add_matches_two_pass(samples):
+    _assert_matches(_stats(samples), samples)
+
+def test_add_is_stable_with_a_large_offset():
+    # Naive sum-of-squares loses every digit here; Welford keeps them.
+    xs = [1e9 + x for x in (4.0, 7.0, 13.0, 16.0)]
+    stats = _stats(xs)
+    assert stats.mean == pytest.approx(1e9 + 10.0)
+    assert stats.variance == pytest.approx(30.0, rel=1e-9)
+
+@pytest.mark.parametrize("bad", [0.0, -3.0, math.nan, math.inf])
+def test_invalid_samples_are_skipped(bad):
+    stats = _stats([100.0, bad, 300.0])
+    _assert_matches(stats, [100.0, 300.0])
+    assert sum(stats.hist) == 2
+
+def test_small_counts_have_zero_variance():
+    assert RunningStats(FLIGHT_BIN_MS).variance == 0.0
+    assert _stats([120.0]).std == 0.0
+
+# ---------------------------------------------------------
+# CHAN MERGE
+# ---------------------------------------------------------
+@pytest.mark.parametrize("split", [1, 10, 500, 999])
+def test_merge_matches_the_concatenation(samples, split):
+    merged = _stats(samples[:split])
+    merged.merge(_stats(samples[split:]))
+    _assert_matches(merged, samples)
+    assert list(merged.hist) == list(_stats(samples).hist)
+
+def test_merge_of_many_chunks(samples):
+    merged = RunningStats(FLIGHT_BIN_MS)
+    for i in range(0, len(samples), 37):
+        merged.merge(_stats(samples[i:i + 37]))
+    _assert_matches(merged, samples)
+
+def test_merge_with_empty_summaries(samples):
+    stats = _stats(samples)
+    stats.merge(RunningStats(FLIGHT_BIN_MS))
+    _assert_matches(stats, samples)
+
+    empty = RunningStats(FLIGHT_BIN_MS)
+    empty.merge(stats)
+    _assert_matches(empty, samples)
+    assert list(empty.hist) == list(stats.hist)
+
+def test_copy_is_independent(samples):
+    stats = _stats(samples[:10])
+    copy = stats.copy()
+    copy.add_many(samples[10:])
+    _assert_matches(stats, samples[:10])
+    assert sum(stats.hist) == 10
+
+def test_keystroke_stats_merge_both_channels():
+    a, b = KeystrokeStats(), KeystrokeStats()
+    a.flight.add_many([100.0, 200.0])
+    b.flight.add(300.0)
+    b.dwell.add_many([80.0, 90.0])
+    a.merge(b)
+    _assert_matches(a.flight, [100.0, 200.0, 300.0])
+    _assert_matches(a.dwell, [80.0, 90.0])
+
+# ---------------------------------------------------------
+# HISTOGRAM
+# ---------------------------------------------------------
+def test_histogram_bins_and_overflow():
+    stats = _stats([1.0, FLIGHT_BIN_MS - 0.5, FLIGHT_BIN_MS, 1e6])
+    assert stats.hist[0] == 2
+    assert stats.hist[1] == 1
+    assert stats.hist[HISTOGRAM_BINS - 1] == 1
+
+def test_histogram_bytes_round_trip(samples):
+    hist = _stats(samples).hist
+    raw = histogram_to_bytes(hist)
+    assert len(raw) == 4 * HISTOGRAM_BINS
+    assert raw[:4] == hist[0].to_bytes(4, "little")
+    assert list(histogram_from_bytes(raw)) == list(hist)
+    assert list(histogram_from_bytes(None)) == [0] * HISTOGRAM_BINS
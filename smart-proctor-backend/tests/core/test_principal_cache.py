@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+from app.core.principal_cache import Principal, PrincipalCache
+from app.schemas.token import TokenPayload
+
+def _principal(user_id: int, **changes) -> Principal:
+    fields = dict(id=user_id, email=f"u{user_id}@example.com", full_name=None, is_active=True, is_superuser=False)
+    return Principal(**{**fields, **changes})
+
+def _put(cache: PrincipalCache, token: str, user_id: int) -> None:
+    cache.put(token, TokenPayload(sub=user_id, exp=int(time.time()) + 600), _principal(user_id))
+
+# ---------------------------------------------------------
+# LOCAL CACHE
+# ---------------------------------------------------------
+def test_invalidate_drops_every_token_of_the_user():
+    cache = PrincipalCache(maxsize=10, ttl_seconds=60)
+    _put(cache, "a1", 1)
+    _put(cache, "a2", 1)
+    _put(cache, "b1", 2)
+    cache.invalidate_user(1)
+    assert cache.get("a1") is None and cache.get("a2") is None
+    assert cache.get("b1") == _principal(2)
+
+def test_invalidations_count_only_real_drops():
+    cache = PrincipalCache(maxsize=10, ttl_seconds=60)
+    cache.invalidate_user(1)
+    assert cache.stats()["invalidations"] == 0
+    _put(cache, "a1", 1)
+    cache.invalidate_user(1)
+    cache.invalidate_user(1)
+    assert cache.stats()["invalidations"] == 1
+
+def test_no_notification_without_a_channel():
+    assert PrincipalCache(maxsize=10, ttl_seconds=60)._notify_stmt(1) is None
+
+# ---------------------------------------------------------
+# BROADCAST
+# ---------------------------------------------------------
+def test_committed_user_writes_invalidate_other_workers(student, monkeypatch):
+    from app import crud
+    from app.core.config import settings
+    from app.core.principal_cache import principal_cache
+    from app.db.session import SessionLocal
+    from app.services.principal_listener import PrincipalListener
+
+    # This worker's cache (used by crud.user) and another worker's.
+    channel = f"pytest_principals_{student.id}"
+    monkeypatch.setattr(principal_cache, "channel", channel)
+    other = PrincipalCache(maxsize=10, ttl_seconds=60, channel=channel)
+    listener = PrincipalListener(
+        other, settings.SQLALCHEMY_DATABASE_URI.replace("postgresql+psycopg://", "postgresql://", 1),
+    )
+
+    def rename(name: str) -> None:
+        with SessionLocal() as db:
+            crud.user.update(db, db_obj=crud.user.get(db, id=student.id), obj_in={"full_name": name})
+
+    def rolled_back() -> None:
+        with SessionLocal() as db:
+            principal_cache.stage_invalidation(db, student.id)
+            db.rollback()
+
+    async def notified(count: int) -> bool:
+        for _ in range(20):
+            await asyncio.sleep(0.05)
+            if listener.stats()["notifications"] >= count:
+                return True
+        return False
+
+    async def scenario() -> None:
+        listener.start()
+        for _ in range(100):
+            if listener.listening:
+                break
+            await asyncio.sleep(0.05)
+        assert listener.listening
+        _put(other, "token", student.id)
+
+        # Neither a rolled back write nor one that changes nothing notifies.
+        await asyncio.to_thread(rolled_back)
+        await asyncio.to_thread(rename, student.full_name)
+        assert not await notified(1)
+        assert other.get("token") is not None
+
+        await asyncio.to_thread(rename, "Renamed Student")
+        assert await notified(1)
+        assert other.get("token") is None
+        await listener.stop()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        rename(student.full_name)
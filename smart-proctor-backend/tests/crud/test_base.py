@@ -0,0 +1,25 @@
+import asyncio
+
+def test_get_and_remove_by_id_with_a_composite_primary_key(student):
+    # integrity_violations is keyed (id, timestamp) since it was partitioned.
+    from app import crud
+    from app.db.session import AsyncSessionLocal, SessionLocal
+
+    with SessionLocal() as db:
+        violation = crud.integrity.create_violation(
+            db, student_id=student.id, violation_type="PYTEST", evidence_score=0.5, metadata_log="crud base",
+        )
+        violation_id = violation.id
+
+    async def get():
+        async with AsyncSessionLocal() as db:
+            return await crud.integrity.get_async(db, id=violation_id)
+
+    found = asyncio.run(get())
+    assert found is not None and found.violation_type == "PYTEST"
+
+    with SessionLocal() as db:
+        assert crud.integrity.get(db, id=violation_id) is not None
+        removed = crud.integrity.remove(db, id=violation_id)
+        assert removed.id == violation_id
+        assert crud.integrity.get(db, id=violation_id) is None
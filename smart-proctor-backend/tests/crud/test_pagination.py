@@ -0,0 +1,76 @@
+import base64
+from datetime import datetime, timezone
+
+import pytest
+
+from app.crud.pagination import (
+    InvalidCursor,
+    build_page,
+    decode_cursor,
+    encode_cursor,
+    parse_cursor_datetime,
+    parse_cursor_int,
+)
+
+def _raw_cursor(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+# ---------------------------------------------------------
+# CURSOR CODEC
+# ---------------------------------------------------------
+def test_round_trip_with_datetime_key():
+    ts = datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor((ts, 4821))
+    timestamp, row_id = decode_cursor(cursor, arity=2)
+    assert parse_cursor_datetime(timestamp) == ts
+    assert parse_cursor_int(row_id) == 4821
+
+def test_cursor_is_url_safe_and_unpadded():
+    # Payload lengths 1..3 mod 3 exercise every padding case.
+    for key in ([1], [12], [123], ["?>?>"], [2 ** 62]):
+        cursor = encode_cursor(key)
+        assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+        assert decode_cursor(cursor, arity=1) == key
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64 at all!",
+    _raw_cursor("{not json"),
+    _raw_cursor('{"id": 1}'),     # not a list
+    _raw_cursor("42"),
+    base64.urlsafe_b64encode(b"\xff\xfe[1]").decode(),  # not UTF-8
+])
+def test_malformed_cursors(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, arity=1)
+
+def test_arity_must_match():
+    cursor = encode_cursor([1, 2])
+    assert decode_cursor(cursor, arity=2) == [1, 2]
+    for arity in (1, 3):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor, arity=arity)
+
+@pytest.mark.parametrize("value", ["12", 1.5, True, None, [1]])
+def test_parse_cursor_int_rejects_non_integers(value):
+    with pytest.raises(InvalidCursor):
+        parse_cursor_int(value)
+
+@pytest.mark.parametrize("value", [None, 1700000000, "yesterday", ""])
+def test_parse_cursor_datetime_rejects_non_timestamps(value):
+    with pytest.raises(InvalidCursor):
+        parse_cursor_datetime(value)
+
+# ---------------------------------------------------------
+# PAGES
+# ---------------------------------------------------------
+def test_build_page_with_more_rows():
+    page = build_page([1, 2, 3, 4], limit=3, key_of=lambda row: [row])
+    assert page.items == [1, 2, 3]
+    assert decode_cursor(page.next_cursor, arity=1) == [3]
+
+@pytest.mark.parametrize("rows", [[], [1, 2], [1, 2, 3]])
+def test_build_page_last_page(rows):
+    page = build_page(rows, limit=3, key_of=lambda row: [row])
+    assert page.items == rows
+    assert page.next_cursor is None
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from app.services.biometrics import (
+    MAX_SAMPLE_MS,
+    N_FEATURES,
+    VARIANCE_FLOOR,
+    _row_quantiles,
+    chi2_cdf,
+    group_stats,
+    mahalanobis,
+    merge_stats,
+    pad_windows,
+)
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(13)
+
+def _direct(features):
+    mean = features.mean(axis=0)
+    centered = features - mean
+    return len(features), mean, centered.T @ centered
+
+# ---------------------------------------------------------
+# CHI-SQUARE CDF
+# ---------------------------------------------------------
+@pytest.mark.parametrize("x, dof, expected", [
+    # Critical values from the standard chi-square table.
+    (5.9915, 2, 0.95),
+    (9.4877, 4, 0.95),
+    (13.2767, 4, 0.99),
+    (5.3481, 6, 0.50),
+    (12.5916, 6, 0.95),
+    (16.8119, 6, 0.99),
+    (1.6354, 6, 0.05),
+])
+def test_chi2_cdf_matches_table(x, dof, expected):
+    assert chi2_cdf(np.array([x]), dof)[0] == pytest.approx(expected, abs=1e-4)
+
+def test_chi2_cdf_closed_form_for_two_dof():
+    x = np.linspace(0.0, 40.0, 81)
+    assert np.allclose(chi2_cdf(x, 2), 1.0 - np.exp(-x / 2.0))
+
+def test_chi2_cdf_shape_and_range():
+    x = np.linspace(0.0, 200.0, 1001)
+    cdf = chi2_cdf(x)
+    assert cdf.shape == x.shape
+    assert cdf[0] == 0.0
+    assert np.all(np.diff(cdf) >= 0.0)
+    assert cdf[-1] == pytest.approx(1.0)
+
+# ---------------------------------------------------------
+# MODEL STATISTICS
+# ---------------------------------------------------------
+def test_group_stats_matches_per_group_computation(rng):
+    features = rng.normal(100.0, 20.0, size=(60, N_FEATURES))
+    groups = rng.integers(0, 4, size=60)
+    counts, means, m2s = group_stats(features, groups, 5)
+    for g in range(4):
+        n, mean, m2 = _direct(features[groups == g])
+        assert counts[g] == n
+        assert np.allclose(means[g], mean)
+        assert np.allclose(m2s[g], m2)
+    # A group without rows stays empty.
+    assert counts[4] == 0 and not means[4].any() and not m2s[4].any()
+
+@pytest.mark.parametrize("n_a, n_b", [(1, 1), (5, 40), (40, 5), (0, 7), (7, 0)])
+def test_merge_stats_matches_the_concatenation(rng, n_a, n_b):
+    a = rng.normal(200.0, 30.0, size=(n_a, N_FEATURES))
+    b = rng.normal(260.0, 10.0, size=(n_b, N_FEATURES))
+
+    def summary(x):
+        if not len(x):
+            return 0, np.zeros(N_FEATURES), np.zeros((N_FEATURES, N_FEATURES))
+        return _direct(x)
+
+    (na, ma, m2a), (nb, mb, m2b) = summary(a), summary(b)
+    n, mean, m2 = merge_stats(
+        np.array([na]), ma[None], m2a[None], np.array([nb]), mb[None], m2b[None]
+    )
+    n_all, mean_all, m2_all = _direct(np.vstack([a, b]))
+    assert n[0] == n_all
+    assert np.allclose(mean[0], mean_all)
+    assert np.allclose(m2[0], m2_all)
+
+def test_merge_stats_is_vectorized_over_users(rng):
+    # Two users, each with an old (a) and a new (b) batch.
+    old = [rng.normal(size=(k, N_FEATURES)) for k in (3, 2)]
+    new = [rng.normal(size=(k, N_FEATURES)) for k in (8, 6)]
+    n_a, mean_a, m2_a = (np.array(x) for x in zip(*map(_direct, old)))
+    n_b, mean_b, m2_b = (np.array(x) for x in zip(*map(_direct, new)))
+    n, mean, m2 = merge_stats(n_a, mean_a, m2_a, n_b, mean_b, m2_b)
+    for user in range(2):
+        n_all, mean_all, m2_all = _direct(np.vstack([old[user], new[user]]))
+        assert n[user] == n_all
+        assert np.allclose(mean[user], mean_all)
+        assert np.allclose(m2[user], m2_all)
+
+# ---------------------------------------------------------
+# DISTANCE
+# ---------------------------------------------------------
+def test_mahalanobis_matches_direct_inverse(rng):
+    history = rng.normal(150.0, 25.0, size=(30, N_FEATURES))
+    n, mean, m2 = _direct(history)
+    probes = rng.normal(150.0, 40.0, size=(3, N_FEATURES))
+    distances = mahalanobis(
+        probes, np.full(3, n), np.repeat(mean[None], 3, axis=0), np.repeat(m2[None], 3, axis=0)
+    )
+    cov_inv = np.linalg.inv(m2 / (n - 1) + np.diag(VARIANCE_FLOOR))
+    for probe, distance in zip(probes, distances):
+        delta = probe - mean
+        assert distance == pytest.approx(np.sqrt(delta @ cov_inv @ delta))
+
+# ---------------------------------------------------------
+# WINDOWS
+# ---------------------------------------------------------
+def test_pad_windows_masks_invalid_samples():
+    out = pad_windows([[100.0, 0.0, MAX_SAMPLE_MS, 120.0, 130.0], [90.0]], 4)
+    assert out.shape == (2, 4)
+    assert out[0, 0] == 100.0 and out[0, 3] == 120.0
+    assert np.isnan(out[0, 1]) and np.isnan(out[0, 2])
+    assert out[1, 0] == 90.0 and np.isnan(out[1, 1:]).all()
+
+def test_row_quantiles_match_nanquantile(rng):
+    values = rng.uniform(50.0, 500.0, size=(20, 32))
+    values[rng.random(values.shape) < 0.3] = np.nan
+    quartiles, counts = _row_quantiles(values)
+    assert np.array_equal(counts, np.count_nonzero(~np.isnan(values), axis=1))
+    assert np.allclose(quartiles, np.nanquantile(values, [0.25, 0.5, 0.75], axis=1).T)
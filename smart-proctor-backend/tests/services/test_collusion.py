@@ -0,0 +1,164 @@
+import numpy as np
+import pytest
+
+from app.services.collusion import CollusionDetector, CollusionMatch, LSHIndex, MinHasher, shingles
+
+NUM_PERM = 128
+BANDS = 16
+
+@pytest.fixture
+def hasher():
+    return MinHasher(NUM_PERM)
+
+def _sets(rng, shared: int, own: int):
+    # Two shingle hash sets with Jaccard shared / (shared + 2 * own).
+    pool = rng.choice(2 ** 32, size=shared + 2 * own, replace=False).astype(np.uint64)
+    return pool[:shared + own], np.concatenate([pool[:shared], pool[shared + own:]])
+
+def _similarity(a, b) -> float:
+    return float((a == b).mean())
+
+# ---------------------------------------------------------
+# SHINGLES AND MINHASH
+# ---------------------------------------------------------
+def test_shingles_are_distinct_casefolded_word_grams():
+    assert len(shingles("The cat sat. the CAT sat!", 2)) == 3  # the cat, cat sat, sat the
+    assert set(shingles("One two three", 3)) == set(shingles("one, TWO; three", 3))
+    assert len(shingles("too short", 3)) == 0
+
+def test_signature_is_deterministic(hasher):
+    hashes = shingles("a fairly ordinary answer about photosynthesis in plants", 3)
+    sig = hasher.signature(hashes)
+    assert sig.shape == (NUM_PERM,) and sig.dtype == np.uint32
+    assert np.array_equal(sig, MinHasher(NUM_PERM).signature(hashes[::-1]))
+    assert not np.array_equal(sig, MinHasher(NUM_PERM, seed=2).signature(hashes))
+
+@pytest.mark.parametrize("shared, own", [(100, 0), (90, 10), (60, 20), (50, 50), (0, 80)])
+def test_minhash_estimates_jaccard(hasher, shared, own):
+    rng = np.random.default_rng(shared * 1000 + own)
+    a, b = _sets(rng, shared, own)
+    jaccard = shared / (shared + 2 * own)
+    estimate = _similarity(hasher.signature(a), hasher.signature(b))
+    # Binomial standard error at 128 permutations is at most ~0.045.
+    assert estimate == pytest.approx(jaccard, abs=0.15)
+
+# ---------------------------------------------------------
+# LSH BANDING
+# ---------------------------------------------------------
+def test_num_perm_must_split_into_bands():
+    with pytest.raises(ValueError):
+        LSHIndex(100, 16)
+
+def test_band_keys_depend_only_on_their_band(hasher):
+    index = LSHIndex(NUM_PERM, BANDS)
+    sig = hasher.signature(np.arange(1, 50, dtype=np.uint64))
+    changed = sig.copy()
+    changed[index.rows * 3] ^= 1  # first value of band 3
+    keys = index.band_keys(np.stack([sig, changed]))
+    assert keys.shape == (2, BANDS)
+    assert (keys[0] != keys[1]).tolist() == [band == 3 for band in range(BANDS)]
+
+def test_band_keys_are_salted_per_band():
+    # The same values in different bands must not share a bucket.
+    index = LSHIndex(NUM_PERM, BANDS)
+    keys = index.band_keys(np.zeros((1, NUM_PERM), dtype=np.uint32))[0]
+    assert len(set(keys.tolist())) == BANDS
+
+def test_candidate_probability_follows_the_s_curve(hasher):
+    # P(candidate) = 1 - (1 - J^rows)^bands: ~1 at J=0.9, ~0 at J=0.2.
+    rng = np.random.default_rng(5)
+    found = {0.9: 0, 0.2: 0}
+    for trial in range(40):
+        for jaccard, (shared, own) in ((0.9, (180, 10)), (0.2, (40, 80))):
+            a, b = _sets(rng, shared, own)
+            index = LSHIndex(NUM_PERM, BANDS)
+            index.add(1, hasher.signature(a))
+            found[jaccard] += len(index.candidates(hasher.signature(b))) > 0
+    assert found[0.9] == 40
+    assert found[0.2] <= 2
+
+# ---------------------------------------------------------
+# INDEX
+# ---------------------------------------------------------
+def test_query_returns_best_match_per_student(hasher):
+    rng = np.random.default_rng(3)
+    base = rng.choice(2 ** 32, size=200, replace=False).astype(np.uint64)
+    index = LSHIndex(NUM_PERM, BANDS)
+    index.add(1, hasher.signature(base[:190]))          # J ~ 0.95
+    index.add(1, hasher.signature(base[:150]))          # J ~ 0.75, same student
+    index.add(2, hasher.signature(base[10:200]))        # J ~ 0.90
+    index.add(3, hasher.signature(base[100:] + np.uint64(7)))  # unrelated
+
+    matches = index.query(hasher.signature(base), threshold=0.7)
+    assert [student for student, _ in matches] == [1, 2]
+    assert matches[0][1] >= matches[1][1] >= 0.7
+
+def test_add_skips_answers_already_indexed(hasher):
+    index = LSHIndex(NUM_PERM, BANDS)
+    sig = hasher.signature(np.arange(1, 40, dtype=np.uint64))
+    index.add(1, sig)
+    index.add(1, sig)
+    index.add(2, sig)
+    assert index.size == 2
+
+    # Catch-up of our own stored rows (and overlapping re-reads) adds nothing.
+    index.add_many([10, 11], [1, 2], np.stack([sig, sig]))
+    index.add_many([11], [2], sig[None, :])
+    assert index.size == 2
+    assert index.high_water == 11
+
+def test_merge_keeps_every_key_findable(hasher, monkeypatch):
+    monkeypatch.setattr(LSHIndex, "MERGE_EVERY", 4 * BANDS)
+    rng = np.random.default_rng(11)
+    index = LSHIndex(NUM_PERM, BANDS)
+    sigs = [hasher.signature(rng.choice(2 ** 32, size=30, replace=False).astype(np.uint64)) for _ in range(25)]
+    for student, sig in enumerate(sigs[:10]):
+        index.add(student, sig)
+    index.add_many(list(range(100, 110)), list(range(10, 20)), np.stack(sigs[10:20]))
+    for student, sig in enumerate(sigs[20:], start=20):
+        index.add(student, sig)
+    # Some keys merged into the sorted arrays, the latest still pending.
+    assert len(index._keys) and index._pending
+    for student, sig in enumerate(sigs):
+        assert index.query(sig, threshold=1.0) == [(student, 1.0)]
+
+# ---------------------------------------------------------
+# DETECTOR
+# ---------------------------------------------------------
+def test_short_answers_have_no_signature():
+    detector = CollusionDetector(
+        num_perm=NUM_PERM, bands=BANDS, threshold=0.7, shingle_words=3, min_shingles=5, max_questions=4,
+    )
+    assert detector.signature("Paris") is None
+    assert detector.signature("the capital of france is paris on the seine") is not None
+
+def test_build_rows_flags_both_students():
+    rows = CollusionDetector.build_rows(
+        exam_id="e1", question_id="q1", student_id=1, matches=[CollusionMatch(2, 0.91234)],
+    )
+    assert [(r["student_id"], r["violation_type"], r["evidence_score"]) for r in rows] == [
+        (1, "COLLUSION_SUSPECTED", 0.9123),
+        (2, "COLLUSION_SUSPECTED", 0.9123),
+    ]
+    assert all(r["exam_id"] == "e1" for r in rows)
+
+def test_catch_up_is_incremental_between_sweeps():
+    detector = CollusionDetector(
+        num_perm=NUM_PERM, bands=BANDS, threshold=0.7, shingle_words=3, min_shingles=5, max_questions=4,
+    )
+    sweep, overlap = detector.CATCHUP_SWEEP_SECONDS, detector.CATCHUP_OVERLAP
+    index = LSHIndex(NUM_PERM, BANDS)
+    now = 1000.0
+
+    # First read loads everything and counts as a sweep.
+    assert detector.catch_up_from(index, now) == 0
+    index.high_water = 5000
+    # Until the next sweep, only ids above the highest one read.
+    assert detector.catch_up_from(index, now + 1) == 5000
+    index.high_water = 5200
+    assert detector.catch_up_from(index, now + sweep - 1) == 5200
+    # A sweep goes back below the previous sweep's high water.
+    assert detector.catch_up_from(index, now + sweep) == 0
+    index.high_water = 9000
+    assert detector.catch_up_from(index, now + sweep + 1) == 9000
+    assert detector.catch_up_from(index, now + 2 * sweep) == 5200 - overlap
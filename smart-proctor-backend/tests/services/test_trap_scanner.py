@@ -0,0 +1,114 @@
+import pytest
+
+from app.services import trap_scanner
+from app.services.trap_scanner import TrapAutomaton, TrapMatch, TrapScannerCache, fold_text
+
+def _naive(traps, text):
+    # Reference: substring search over the folded text, offsets in folded chars.
+    folded = fold_text(text)
+    found = set()
+    for phrase, _ in traps:
+        needle = fold_text(phrase).strip()
+        start = folded.find(needle)
+        while needle and start != -1:
+            found.add((phrase, start, start + len(needle)))
+            start = folded.find(needle, start + 1)
+    return found
+
+# ---------------------------------------------------------
+# FOLDING
+# ---------------------------------------------------------
+@pytest.mark.parametrize("text, folded", [
+    ("Cyberdyne", "cyberdyne"),
+    ("Cybérdyne", "cyberdyne"),          # combining mark dropped
+    ("Ｃｙｂｅｒ", "cyber"),              # fullwidth
+    ("Cyber\u200bdyne", "cyberdyne"),    # zero-width space dropped
+    ("\ufeffﬁle", "file"),               # BOM dropped, ligature expanded
+    ("Straße", "strasse"),               # full casefold
+])
+def test_fold_text(text, folded):
+    assert fold_text(text) == folded
+
+# ---------------------------------------------------------
+# MATCHING
+# ---------------------------------------------------------
+def test_overlapping_and_nested_phrases():
+    traps = [("he", None), ("she", None), ("his", None), ("hers", None)]
+    text = "ushers and his"
+    matches = TrapAutomaton(traps).scan(text)
+    assert {(m.phrase, m.start, m.end) for m in matches} == _naive(traps, text)
+    assert {m.phrase for m in matches} == {"he", "she", "hers", "his"}
+
+def test_offsets_point_into_the_original_text():
+    text = "Ask ＣＹＢＥＲ\u200bdÿne now"
+    [match] = TrapAutomaton([("Cyberdyne", None)]).scan(text)
+    assert match == TrapMatch("Cyberdyne", 4, len(text) - len(" now"), None)
+    assert text[match.start:match.end] == "ＣＹＢＥＲ\u200bdÿne"
+
+def test_offsets_across_expanding_characters():
+    # 'ß' folds to two chars and 'ﬁ' to two: the match still starts at them.
+    text = "the grosse ﬁx: Große fix"
+    automaton = TrapAutomaton([("GROSSE", None), ("fix", None)])
+    spans = sorted(text[m.start:m.end] for m in automaton.scan(text))
+    assert spans == ["Große", "fix", "grosse", "ﬁx"]
+
+def test_question_scoped_traps():
+    automaton = TrapAutomaton([("exam wide", None), ("only q1", "q1")])
+    text = "exam wide and only q1"
+    assert {m.phrase for m in automaton.scan(text, question_id="q1")} == {"exam wide", "only q1"}
+    assert {m.phrase for m in automaton.scan(text, question_id="q2")} == {"exam wide"}
+    # Without a question every trap applies.
+    assert {m.phrase for m in automaton.scan(text)} == {"exam wide", "only q1"}
+
+def test_repeated_and_adjacent_matches():
+    traps = [("aa", None)]
+    text = "aaaa"
+    matches = TrapAutomaton(traps).scan(text)
+    assert [(m.start, m.end) for m in matches] == [(0, 2), (1, 3), (2, 4)]
+
+def test_matches_agree_with_naive_search():
+    traps = [("abab", None), ("bab", None), ("b", None), ("abc", None), ("cab", None)]
+    text = "ababcababcabab" * 3
+    matches = TrapAutomaton(traps).scan(text)
+    assert {(m.phrase, m.start, m.end) for m in matches} == _naive(traps, text)
+
+def test_blank_phrases_and_empty_input():
+    automaton = TrapAutomaton([("  ", None), ("\u200b", None)])
+    assert len(automaton) == 0
+    assert automaton.scan("anything") == []
+    assert TrapAutomaton([("word", None)]).scan("") == []
+
+# ---------------------------------------------------------
+# CACHE
+# ---------------------------------------------------------
+def test_cache_evicts_least_recently_used():
+    cache = TrapScannerCache(maxsize=2, ttl_seconds=60)
+    a, b, c = (TrapAutomaton([(p, None)]) for p in "abc")
+    cache.put("a", a)
+    cache.put("b", b)
+    assert cache.get("a") is a
+    cache.put("c", c)
+    assert cache.get("b") is None
+    assert cache.get("a") is a and cache.get("c") is c
+
+def test_cache_expires_and_invalidates(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(trap_scanner.time, "monotonic", lambda: now[0])
+    cache = TrapScannerCache(maxsize=4, ttl_seconds=30)
+    automaton = TrapAutomaton([("x", None)])
+    cache.put("exam", automaton)
+    now[0] += 29
+    assert cache.get("exam") is automaton
+    now[0] += 2
+    assert cache.get("exam") is None
+
+    cache.put("exam", automaton)
+    cache.invalidate("exam")
+    assert cache.get("exam") is None
+
+def test_fold_cache_is_bounded():
+    # Answers can cycle through the whole Unicode range.
+    text = "".join(chr(cp) for cp in range(0x3000, 0x3000 + 3 * trap_scanner.FOLD_LRU_SIZE))
+    TrapAutomaton([("trap", None)]).scan(text)
+    fold_text(text)
+    assert trap_scanner._fold_other.cache_info().currsize <= trap_scanner.FOLD_LRU_SIZE
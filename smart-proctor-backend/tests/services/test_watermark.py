@@ -0,0 +1,108 @@
+import pytest
+
+from app.services.watermark import (
+    FRAME_BITS,
+    TOKEN_BITS,
+    ZW_END,
+    ZW_ONE,
+    ZW_START,
+    ZW_ZERO,
+    WatermarkCodec,
+    WatermarkHit,
+    WatermarkIndex,
+    _checksum,
+)
+
+@pytest.fixture
+def codec():
+    return WatermarkCodec("test-secret")
+
+def _flip(frame: str, bit: int) -> str:
+    i = 1 + bit  # skip ZW_START
+    flipped = ZW_ONE if frame[i] == ZW_ZERO else ZW_ZERO
+    return frame[:i] + flipped + frame[i + 1:]
+
+# ---------------------------------------------------------
+# FRAME
+# ---------------------------------------------------------
+def test_frame_layout(codec):
+    frame = codec.frame_for(42)
+    assert len(frame) == FRAME_BITS + 2
+    assert frame[0] == ZW_START and frame[-1] == ZW_END
+    assert set(frame[1:-1]) <= {ZW_ZERO, ZW_ONE}
+
+    bits = int("".join("1" if c == ZW_ONE else "0" for c in frame[1:-1]), 2)
+    token = codec.token_for(42)
+    assert bits >> (FRAME_BITS - TOKEN_BITS) == token
+    assert bits & 0xFFFF == _checksum(token)
+
+def _crc16_xmodem(data: bytes) -> int:
+    # Bitwise reference: polynomial 0x1021, initial value 0.
+    crc = 0
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021 if crc & 0x8000 else crc << 1) & 0xFFFF
+    return crc
+
+@pytest.mark.parametrize("token", [0, 1, 0x313233343536, (1 << TOKEN_BITS) - 1])
+def test_checksum_is_crc16_xmodem_of_the_token_bytes(token):
+    assert _checksum(token) == _crc16_xmodem(token.to_bytes(TOKEN_BITS // 8, "big"))
+
+def test_tokens_are_keyed_and_stable(codec):
+    assert codec.token_for(7) == WatermarkCodec("test-secret").token_for(7)
+    assert codec.token_for(7) != WatermarkCodec("other-secret").token_for(7)
+    assert codec.token_for(7) != codec.token_for(8)
+    assert 0 <= codec.token_for(7) < 1 << TOKEN_BITS
+
+# ---------------------------------------------------------
+# DECODE
+# ---------------------------------------------------------
+def test_round_trip(codec):
+    text = "prefix " + codec.frame_for(1) + " middle " + codec.frame_for(2)
+    assert codec.decode(text) == [
+        WatermarkHit(codec.token_for(1), len("prefix ")),
+        WatermarkHit(codec.token_for(2), len("prefix ") + FRAME_BITS + 2 + len(" middle ")),
+    ]
+
+def test_every_single_bit_flip_is_rejected(codec):
+    frame = codec.frame_for(99)
+    for bit in range(FRAME_BITS):
+        assert codec.decode(_flip(frame, bit)) == [], bit
+
+def test_truncated_or_unframed_payloads_are_ignored(codec):
+    frame = codec.frame_for(5)
+    assert codec.decode("no watermark here") == []
+    assert codec.decode(frame[:-1]) == []                        # no end marker
+    assert codec.decode(frame[0] + frame[2:]) == []              # 63 bits
+    assert codec.decode(frame[1:]) == []                         # no start marker
+    assert codec.decode("x" + frame[:-1] + frame) == [WatermarkHit(codec.token_for(5), 1 + FRAME_BITS + 1)]
+
+# ---------------------------------------------------------
+# EMBED
+# ---------------------------------------------------------
+def test_embed_single_word(codec):
+    assert codec.embed("Explain", 3) == "Explain" + codec.frame_for(3)
+
+def test_embed_repeats_every_n_words(codec):
+    words = [f"w{i}" for i in range(100)]
+    marked = codec.embed(" ".join(words), 3, every_words=40)
+    hits = codec.decode(marked)
+    # After words 0, 40 and 80.
+    assert [hit.token for hit in hits] == [codec.token_for(3)] * 3
+    stripped = marked.replace(codec.frame_for(3), "")
+    assert stripped == " ".join(words)
+
+def test_partial_copy_still_carries_the_mark(codec):
+    marked = codec.embed(" ".join(f"w{i}" for i in range(100)), 11, every_words=10)
+    excerpt = marked[len(marked) // 3: len(marked) // 2]
+    assert {hit.token for hit in codec.decode(excerpt)} == {codec.token_for(11)}
+
+# ---------------------------------------------------------
+# INDEX
+# ---------------------------------------------------------
+def test_index_resolves_registered_tokens(codec):
+    index = WatermarkIndex(codec)
+    token = index.register(17)
+    unknown = codec.token_for(18)
+    assert index.resolve([token, unknown]) == {token: 17, unknown: None}
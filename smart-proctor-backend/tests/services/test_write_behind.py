@@ -0,0 +1,79 @@
+from typing import Any, List
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.services import write_behind
+from app.services.keystroke_profiles import KeystrokeProfileStore
+from app.services.write_behind import BackgroundFlusher
+
+class RecordingFlusher(BackgroundFlusher):
+    """
+    Persists into a list; rows equal to "bad" violate a constraint and the
+    first `outages` transactions fail to connect.
+    """
+
+    def __init__(self, outages: int = 0):
+        super().__init__()
+        self.outages = outages
+        self.transactions: List[List[Any]] = []
+        self.stored: List[Any] = []
+        self.lost: List[Any] = []
+
+    def _persist(self, db, rows):
+        self.transactions.append(list(rows))
+        if self.outages:
+            self.outages -= 1
+            raise OperationalError("INSERT", {}, Exception("connection refused"))
+        if "bad" in rows:
+            raise IntegrityError("INSERT", {}, Exception("violates foreign key constraint"))
+        self.stored.extend(rows)
+
+    def _lost(self, rows, error):
+        self.lost.extend(rows)
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept: List[float] = []
+    monkeypatch.setattr(write_behind.time, "sleep", slept.append)
+    return slept
+
+def test_rejected_batch_quarantines_only_the_bad_group(sleeps):
+    flusher = RecordingFlusher()
+    flusher._flush([["a", "b"], ["bad", "c"], ["d"]])
+    assert flusher.stored == ["a", "b", "d"]
+    assert flusher.lost == ["bad", "c"]
+    # The whole batch, then each group once: rejections are not retried.
+    assert len(flusher.transactions) == 4
+    assert sleeps == []
+    stats = flusher._flush_stats()
+    assert (stats["written"], stats["quarantined"], stats["failed"]) == (3, 2, 0)
+
+def test_connection_failures_back_off_and_retry(sleeps):
+    flusher = RecordingFlusher(outages=2)
+    flusher._flush([["a"], ["b"]])
+    assert flusher.stored == ["a", "b"]
+    assert sleeps == [0.1, 0.2]
+
+def test_exhausted_retries_count_as_failed(sleeps):
+    flusher = RecordingFlusher(outages=BackgroundFlusher.MAX_FLUSH_ATTEMPTS)
+    flusher._flush([["a"], ["b"]])
+    # An unreachable database is not split group by group.
+    assert len(flusher.transactions) == BackgroundFlusher.MAX_FLUSH_ATTEMPTS
+    assert flusher.lost == ["a", "b"]
+    stats = flusher._flush_stats()
+    assert (stats["written"], stats["quarantined"], stats["failed"]) == (0, 0, 2)
+
+def test_keystroke_store_flushes_each_user_as_a_group(sleeps):
+    class Store(KeystrokeProfileStore):
+        def _persist(self, db, rows):
+            if any(user_id == 2 for user_id, _ in rows):
+                raise IntegrityError("INSERT", {}, Exception("violates foreign key constraint"))
+            written.extend(user_id for user_id, _ in rows)
+
+    written: List[int] = []
+    store = Store(flush_interval_ms=1000, max_pending_users=10)
+    store._flush_deltas({user_id: store.build_delta([100.0]) for user_id in (1, 2, 3)})
+    assert written == [1, 3]
+    stats = store.stats()
+    assert (stats["written"], stats["quarantined"], stats["failed"]) == (2, 1, 0)
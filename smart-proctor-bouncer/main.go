@@ -25,6 +25,11 @@ import (
 var (
 	jwtKey        []byte
 	allowedOrigins []string
+	internalKey    string
+	backendURL     string
+
+	// Short timeout: a slow backend must never delay the WebSocket handshake.
+	backendClient = &http.Client{Timeout: 2 * time.Second}
 
 	// Thread-safe map to track active connections
 	activeClients   = make(map[string]*websocket.Conn)
@@ -65,6 +70,13 @@ type Heartbeat struct {
 	DwellTime  float64 `json:"dwell_time"`  // ms key held down
 }
 
+// Subset of the backend's KeystrokeProfile we need for live checks.
+type KeystrokeProfile struct {
+	FlightCount int     `json:"flight_count"`
+	FlightMean  float64 `json:"flight_mean"`
+	FlightStd   float64 `json:"flight_std"`
+}
+
 type Alert struct {
 	Status  string `json:"status"`
 	Message string `json:"message"`
@@ -82,6 +94,14 @@ func init() {
 	}
 	jwtKey = []byte(secret)
 
+	internalKey = os.Getenv("INTERNAL_API_KEY")
+
+	// Determine Backend URL (Localhost vs Docker)
+	backendURL = os.Getenv("BACKEND_URL")
+	if backendURL == "" {
+		backendURL = "http://localhost:8000" // Default for local testing
+	}
+
 	origins := os.Getenv("ALLOWED_ORIGINS")
 	if origins != "" {
 		allowedOrigins = strings.Split(origins, ",")
@@ -126,6 +146,7 @@ func handleConnections(w http.ResponseWriter, r *http.Request) {
 	defer ws.Close()
 
 	studentID := claims.Sub
+	connectedAt := time.Now()
 	clientsMutex.Lock()
 	activeClients[studentID] = ws
 	clientsMutex.Unlock()
@@ -133,9 +154,18 @@ func handleConnections(w http.ResponseWriter, r *http.Request) {
 	log.Printf("✅ Secure Link Established: Student %s", studentID)
 
 	// --- SESSION STATS TRACKING ---
-	var baselineFlightTime float64 = 150.0 // Mock baseline for now
+	var baselineFlightTime float64 = defaultBaselineFlightTime
 	var sessionTotalFlightTime float64 = 0.0
 	var sessionKeystrokes int = 0
+	flightSamples := make([]float64, 0, 256)
+	dwellSamples := make([]float64, 0, 256)
+
+	// Personal baseline from the backend's keystroke profile, once per connection.
+	if profile, err := fetchKeystrokeProfile(studentID); err != nil {
+		log.Printf("⚠️  No keystroke profile for Student %s (%v), using default baseline", studentID, err)
+	} else if profile.FlightCount >= minProfileSamples {
+		baselineFlightTime = profile.FlightMean
+	}
 
 	// D. CLEANUP & SAVE ON DISCONNECT
 	defer func() {
@@ -146,7 +176,13 @@ func handleConnections(w http.ResponseWriter, r *http.Request) {
 		// SAVE DNA: If we gathered enough data, send it to Python
 		if sessionKeystrokes > 5 {
 			avg := sessionTotalFlightTime / float64(sessionKeystrokes)
-			go saveUserBaselineToBackend(studentID, avg)
+			queueBaselineUpdate(BaselineUpdate{
+				UserID:         studentID,
+				NewFlightTime:  avg,
+				FlightTimes:    flightSamples,
+				DwellTimes:     dwellSamples,
+				IdempotencyKey: fmt.Sprintf("%s-%d", studentID, connectedAt.UnixNano()),
+			})
 		}
 
 		log.Printf("🔌 Disconnected: Student %s", studentID)
@@ -164,6 +200,12 @@ func handleConnections(w http.ResponseWriter, r *http.Request) {
 		if beat.FlightTime > 0 && beat.FlightTime < 2000 { // Ignore pauses > 2s
 			sessionTotalFlightTime += beat.FlightTime
 			sessionKeystrokes++
+			if len(flightSamples) < maxSessionSamples {
+				flightSamples = append(flightSamples, beat.FlightTime)
+			}
+		}
+		if beat.DwellTime > 0 && beat.DwellTime < 2000 && len(dwellSamples) < maxSessionSamples {
+			dwellSamples = append(dwellSamples, beat.DwellTime)
 		}
 
 		// 2. BOT DETECTION (Superhuman Speed)
@@ -184,34 +226,154 @@ func handleConnections(w http.ResponseWriter, r *http.Request) {
 	} // <--- [FIX] Closing brace for "for" loop
 } // <--- [FIX] Closing brace for "handleConnections" function
 
-// --- NEW: SENDS DATA TO PYTHON BACKEND ---
-func saveUserBaselineToBackend(studentID string, avgFlightTime float64) {
-	payload := map[string]interface{}{
-		"user_id":         studentID,
-		"new_flight_time": avgFlightTime,
+const (
+	defaultBaselineFlightTime = 150.0
+	minProfileSamples         = 50    // below this the profile mean is too noisy
+	maxSessionSamples         = 20000 // matches the backend's per-update limit
+)
+
+// --- LOADS THE STUDENT'S BASELINE FROM PYTHON BACKEND ---
+func fetchKeystrokeProfile(studentID string) (*KeystrokeProfile, error) {
+	url := fmt.Sprintf("%s/api/v1/exam/internal/keystroke-profile/%s", backendURL, studentID)
+	req, err := http.NewRequest(http.MethodGet, url, nil)
+	if err != nil {
+		return nil, err
 	}
+	req.Header.Set("X-Internal-Key", internalKey)
 
-	jsonBody, _ := json.Marshal(payload)
+	resp, err := backendClient.Do(req)
+	if err != nil {
+		return nil, err
+	}
+	defer resp.Body.Close()
+	if resp.StatusCode != http.StatusOK {
+		return nil, fmt.Errorf("status %d", resp.StatusCode)
+	}
 
-	// Determine Backend URL (Localhost vs Docker)
-	backendURL := os.Getenv("BACKEND_URL")
-	if backendURL == "" {
-		backendURL = "http://localhost:8000" // Default for local testing
+	var profile KeystrokeProfile
+	if err := json.NewDecoder(resp.Body).Decode(&profile); err != nil {
+		return nil, err
 	}
+	return &profile, nil
+}
+
+// ---------------------------------------------------------
+// BASELINE UPLOADS (batched)
+// ---------------------------------------------------------
+// Disconnects are queued and sent to the backend once per second as a
+// single batch, so an exam ending for 5,000 students costs a handful of
+// requests instead of 5,000. Every update carries an idempotency key, which
+// makes resending a failed batch safe.
+
+type BaselineUpdate struct {
+	UserID         string    `json:"user_id"`
+	NewFlightTime  float64   `json:"new_flight_time"`
+	FlightTimes    []float64 `json:"flight_times"`
+	DwellTimes     []float64 `json:"dwell_times"`
+	IdempotencyKey string    `json:"idempotency_key"`
+}
+
+const (
+	baselineFlushInterval = time.Second
+	maxBaselineBatch      = 5000  // backend limit per request
+	maxPendingBaselines   = 50000 // beyond this the oldest updates are dropped
+)
+
+var baselineQueue = make(chan BaselineUpdate, maxBaselineBatch)
 
-	url := fmt.Sprintf("%s/api/v1/exam/internal/update-baseline", backendURL)
-	resp, err := http.Post(url, "application/json", bytes.NewBuffer(jsonBody))
+func queueBaselineUpdate(update BaselineUpdate) {
+	select {
+	case baselineQueue <- update:
+	default:
+		log.Printf("⚠️  Baseline queue full, dropping update for Student %s", update.UserID)
+	}
+}
+
+// runBaselineFlusher sends queued updates until ctx is cancelled, then
+// makes one final attempt and closes done.
+func runBaselineFlusher(ctx context.Context, done chan<- struct{}) {
+	defer close(done)
+	ticker := time.NewTicker(baselineFlushInterval)
+	defer ticker.Stop()
+
+	var pending []BaselineUpdate
+	for {
+		select {
+		case update := <-baselineQueue:
+			pending = append(pending, update)
+			if len(pending) > maxPendingBaselines {
+				pending = pending[len(pending)-maxPendingBaselines:]
+			}
+		case <-ticker.C:
+			pending = flushBaselines(pending)
+		case <-ctx.Done():
+		drain:
+			for {
+				select {
+				case update := <-baselineQueue:
+					pending = append(pending, update)
+				default:
+					break drain
+				}
+			}
+			if pending = flushBaselines(pending); len(pending) > 0 {
+				log.Printf("❌ Exiting with %d unsent baseline updates", len(pending))
+			}
+			return
+		}
+	}
+}
+
+// flushBaselines sends `pending` in batches and returns what must be retried.
+func flushBaselines(pending []BaselineUpdate) []BaselineUpdate {
+	for len(pending) > 0 {
+		n := len(pending)
+		if n > maxBaselineBatch {
+			n = maxBaselineBatch
+		}
+		retry, err := postBaselineBatch(pending[:n])
+		if err != nil {
+			log.Printf("❌ Baseline batch failed: %v", err)
+			if retry {
+				return pending
+			}
+		}
+		pending = pending[n:]
+	}
+	return nil
+}
+
+// --- NEW: SENDS DATA TO PYTHON BACKEND ---
+// postBaselineBatch reports retry=true when the error is transient.
+func postBaselineBatch(batch []BaselineUpdate) (retry bool, err error) {
+	jsonBody, err := json.Marshal(batch)
 	if err != nil {
-		log.Printf("❌ Failed to contact Backend: %v", err)
-		return
+		return false, err
+	}
+
+	url := fmt.Sprintf("%s/api/v1/exam/internal/update-baseline:batch", backendURL)
+	req, err := http.NewRequest(http.MethodPost, url, bytes.NewBuffer(jsonBody))
+	if err != nil {
+		return false, err
+	}
+	req.Header.Set("Content-Type", "application/json")
+	req.Header.Set("X-Internal-Key", internalKey)
+
+	resp, err := backendClient.Do(req)
+	if err != nil {
+		return true, err
 	}
 	defer resp.Body.Close()
 
-	if resp.StatusCode == 200 {
-		log.Printf("🧬 DNA Saved for User %s: %.2fms", studentID, avgFlightTime)
-	} else {
-		log.Printf("❌ Backend rejected update: Status %d", resp.StatusCode)
+	if resp.StatusCode >= 500 {
+		return true, fmt.Errorf("backend status %d", resp.StatusCode)
+	}
+	if resp.StatusCode != http.StatusOK {
+		// Rejected as invalid; resending the same batch can't succeed.
+		return false, fmt.Errorf("backend rejected batch: status %d", resp.StatusCode)
 	}
+	log.Printf("🧬 DNA Saved for %d sessions", len(batch))
+	return false, nil
 }
 
 // ---------------------------------------------------------
@@ -236,6 +398,10 @@ func main() {
 
 	server := &http.Server{Addr: ":" + port, Handler: nil}
 
+	flusherCtx, stopFlusher := context.WithCancel(context.Background())
+	flusherDone := make(chan struct{})
+	go runBaselineFlusher(flusherCtx, flusherDone)
+
 	go func() {
 		fmt.Printf("🛡️  VerifAI Bouncer Running on Port %s\n", port)
 		if err := server.ListenAndServe(); err != nil && err != http.ErrServerClosed {
@@ -250,5 +416,8 @@ func main() {
 	ctx, cancel := context.WithTimeout(context.Background(), 5*time.Second)
 	defer cancel()
 	server.Shutdown(ctx)
+	// Final flush of queued baselines.
+	stopFlusher()
+	<-flusherDone
 	log.Println("Bouncer Exited Properly")
 }
\ No newline at end of file